@@ -0,0 +1,106 @@
+import argparse
+import json
+import os
+import sys
+from time import perf_counter
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "lib", "python"))
+
+from shared.models.DTO.ProcessIngredientsInput import IngredientToProcessDTO
+from shared.models.SupportedLanguage import SupportedLanguage
+from shared.models.chat.chat_models import (
+    _chat_models,
+    batch_response_schema,
+    create_batch_chat_models,
+    create_chat_models,
+)
+from shared.utils.ingredient_parsing import parse_request_body
+
+SAMPLE_LINES: dict[SupportedLanguage, list[str]] = {
+    "pl": ["2 ząbki czosnku", "500 g mąki pszennej typ 650", "sól i pieprz do smaku"],
+    "en": ["2 cloves garlic", "500 g all-purpose flour", "salt and pepper to taste"],
+}
+
+
+def sample_output(lines: list[str]) -> str:
+    return json.dumps(
+        {
+            "lines": [
+                {
+                    "lineId": str(lineId),
+                    "ingredients": [
+                        {
+                            "name": line,
+                            "quantity": None,
+                            "unit": None,
+                            "preparationNotes": None,
+                        }
+                    ],
+                }
+                for lineId, line in enumerate(lines, start=1)
+            ]
+        }
+    )
+
+
+def clear_caches():
+    _chat_models.cache_clear()
+    batch_response_schema.cache_clear()
+
+
+def invocation(lang: SupportedLanguage, output: str, cold: bool):
+    # the work a parse start and a parse success invocation do with the chat models
+    if cold:
+        clear_caches()
+
+    ingredients = [
+        IngredientToProcessDTO(recipeId="r", ingredientId=str(index), content=line)
+        for index, line in enumerate(SAMPLE_LINES[lang])
+    ]
+    parse_request_body(ingredients, lang, "prompt", "model")
+
+    _, Ingredients = create_chat_models(lang)
+    _, IngredientLines = create_batch_chat_models(lang)
+    Ingredients.model_validate_json(
+        json.dumps({"ingredients": json.loads(output)["lines"][0]["ingredients"]})
+    )
+    IngredientLines.model_validate_json(output)
+
+
+def measure(lang: SupportedLanguage, iterations: int, cold: bool) -> float:
+    output = sample_output(SAMPLE_LINES[lang])
+    invocation(lang, output, cold)
+
+    start = perf_counter()
+
+    for _ in range(iterations):
+        invocation(lang, output, cold)
+
+    return (perf_counter() - start) / iterations * 1000
+
+
+def run(args: argparse.Namespace):
+    for lang in args.lang:
+        rebuiltMs = measure(lang, args.iterations, cold=True)
+        cachedMs = measure(lang, args.iterations, cold=False)
+
+        print(
+            f"{lang}: rebuilt models {rebuiltMs:.3f} ms, cached models {cachedMs:.3f} ms, "
+            f"saving {rebuiltMs - cachedMs:.3f} ms ({rebuiltMs / cachedMs:.0f}x) per invocation"
+        )
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Measures the per invocation cost of building the chat models and schemas against reusing the cached ones"
+    )
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument(
+        "--lang", nargs="+", choices=["pl", "en"], default=["pl", "en"]
+    )
+
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    run(parse_args())
@@ -0,0 +1,367 @@
+import argparse
+from dataclasses import asdict, dataclass
+import gc
+import json
+import os
+import platform
+import resource
+import socket
+import sys
+from time import perf_counter
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "lib", "python"))
+
+from recipe_scrapers.__version__ import __version__ as recipeScrapersVersion
+from shared.models.ExtractionStrategy import ExtractionStrategy
+from shared.models.exceptions.apiExceptions import UnableToParseRecipeException
+from shared.scraping.extract import extract_recipe
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "corpus")
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# differences below this are timer noise, whatever the relative change
+LATENCY_NOISE_FLOOR_MS = 0.5
+
+
+@dataclass
+class CorpusPage:
+    file: str
+    url: str
+    lang: str
+    expectedStrategy: str | None
+
+
+@dataclass
+class PageResult:
+    file: str
+    lang: str
+    expectedStrategy: str | None
+    strategy: str | None
+    p50Ms: float
+    p95Ms: float
+    p99Ms: float
+    peakMemoryKb: float
+
+
+@dataclass
+class Summary:
+    pages: int
+    p50Ms: float
+    p95Ms: float
+    p99Ms: float
+    peakMemoryKb: float
+    maxRssKb: int
+    successRate: float
+    wildModeRate: float
+
+
+def percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered) + 0.5) - 1))
+
+    return ordered[index]
+
+
+def forbid_network():
+    def connect(*args, **kwargs):
+        raise RuntimeError("The scraping benchmark must not use the network")
+
+    socket.socket.connect = connect  # type: ignore[method-assign]
+    socket.create_connection = connect  # type: ignore[assignment]
+
+
+def load_corpus(directory: str) -> list[CorpusPage]:
+    with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as f:
+        return [CorpusPage(**page) for page in json.load(f)["pages"]]
+
+
+def extract_strategy(html: str, url: str) -> str | None:
+    try:
+        return extract_recipe(html, url, parseIngredients=False).strategy.value
+    except UnableToParseRecipeException:
+        return None
+
+
+def run_page(
+    page: CorpusPage, directory: str, iterations: int, warmup: int
+) -> tuple[PageResult, list[float]]:
+    with open(os.path.join(directory, page.file), encoding="utf-8") as f:
+        html = f.read()
+
+    for _ in range(warmup):
+        extract_strategy(html, page.url)
+
+    gc.collect()
+    gc.disable()
+    timingsMs: list[float] = []
+    strategy: str | None = None
+
+    try:
+        for _ in range(iterations):
+            start = perf_counter()
+            strategy = extract_strategy(html, page.url)
+            timingsMs.append((perf_counter() - start) * 1000)
+    finally:
+        gc.enable()
+
+    # measured in a separate run, tracing would skew the latencies
+    tracemalloc.start()
+    extract_strategy(html, page.url)
+    _, peakBytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return (
+        PageResult(
+            file=page.file,
+            lang=page.lang,
+            expectedStrategy=page.expectedStrategy,
+            strategy=strategy,
+            p50Ms=percentile(timingsMs, 50),
+            p95Ms=percentile(timingsMs, 95),
+            p99Ms=percentile(timingsMs, 99),
+            peakMemoryKb=peakBytes / 1024,
+        ),
+        timingsMs,
+    )
+
+
+def summarize(results: list[PageResult], timingsMs: list[float]) -> Summary:
+    recipePages = [result for result in results if result.expectedStrategy is not None]
+    extracted = [result for result in recipePages if result.strategy is not None]
+
+    return Summary(
+        pages=len(results),
+        p50Ms=percentile(timingsMs, 50),
+        p95Ms=percentile(timingsMs, 95),
+        p99Ms=percentile(timingsMs, 99),
+        peakMemoryKb=max(result.peakMemoryKb for result in results),
+        maxRssKb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        successRate=len(extracted) / max(len(recipePages), 1),
+        wildModeRate=sum(
+            result.strategy == ExtractionStrategy.wildMode.value for result in extracted
+        )
+        / max(len(extracted), 1),
+    )
+
+
+def report(results: list[PageResult], summary: Summary) -> str:
+    lines = [
+        f"{'page':<36} {'lang':<4} {'strategy':<18} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'peak KB':>9}"
+    ]
+
+    for result in results:
+        strategy = result.strategy or "-"
+
+        if result.strategy != result.expectedStrategy:
+            strategy += f" (!= {result.expectedStrategy or '-'})"
+
+        lines.append(
+            f"{result.file:<36} {result.lang:<4} {strategy:<18} "
+            f"{result.p50Ms:>8.2f} {result.p95Ms:>8.2f} {result.p99Ms:>8.2f} "
+            f"{result.peakMemoryKb:>9.0f}"
+        )
+
+    lines += [
+        "",
+        f"pages: {summary.pages}, recipe-scrapers {recipeScrapersVersion}, python {platform.python_version()}",
+        f"latency p50 {summary.p50Ms:.2f} ms, p95 {summary.p95Ms:.2f} ms, p99 {summary.p99Ms:.2f} ms",
+        f"peak traced memory {summary.peakMemoryKb:.0f} KB, max rss {summary.maxRssKb} KB",
+        f"success rate {100 * summary.successRate:.1f}%, wild mode rate {100 * summary.wildModeRate:.1f}%",
+    ]
+
+    return "\n".join(lines)
+
+
+def _slower(current: float, baseline: float, tolerance: float) -> bool:
+    return (
+        current > baseline * (1 + tolerance)
+        and current - baseline > LATENCY_NOISE_FLOOR_MS
+    )
+
+
+def compare_summary(
+    summary: Summary, baselineSummary: dict, latencyTolerance: float
+) -> list[str]:
+    regressions: list[str] = []
+
+    if summary.successRate < baselineSummary["successRate"]:
+        regressions.append(
+            f"success rate dropped from {100 * baselineSummary['successRate']:.1f}% to {100 * summary.successRate:.1f}%"
+        )
+
+    if summary.wildModeRate > baselineSummary["wildModeRate"]:
+        regressions.append(
+            f"wild mode rate rose from {100 * baselineSummary['wildModeRate']:.1f}% to {100 * summary.wildModeRate:.1f}%"
+        )
+
+    for percentileName in ("p50Ms", "p95Ms"):
+        if _slower(
+            getattr(summary, percentileName),
+            baselineSummary[percentileName],
+            latencyTolerance,
+        ):
+            regressions.append(
+                f"aggregate {percentileName} went from {baselineSummary[percentileName]:.2f} to {getattr(summary, percentileName):.2f}"
+            )
+
+    return regressions
+
+
+def compare_pages(
+    results: list[PageResult],
+    baselinePages: dict,
+    latencyTolerance: float,
+    memoryTolerance: float,
+) -> list[str]:
+    regressions: list[str] = []
+
+    for result in results:
+        if result.strategy != result.expectedStrategy:
+            regressions.append(
+                f"{result.file}: expected {result.expectedStrategy}, extracted with {result.strategy}"
+            )
+
+        baselinePage = baselinePages.get(result.file)
+
+        if baselinePage is None:
+            continue
+
+        if result.strategy != baselinePage["strategy"]:
+            regressions.append(
+                f"{result.file}: strategy changed from {baselinePage['strategy']} to {result.strategy}"
+            )
+
+        if _slower(result.p50Ms, baselinePage["p50Ms"], latencyTolerance):
+            regressions.append(
+                f"{result.file}: p50 went from {baselinePage['p50Ms']:.2f} ms to {result.p50Ms:.2f} ms"
+            )
+
+        if result.peakMemoryKb > baselinePage["peakMemoryKb"] * (1 + memoryTolerance):
+            regressions.append(
+                f"{result.file}: peak memory went from {baselinePage['peakMemoryKb']:.0f} KB to {result.peakMemoryKb:.0f} KB"
+            )
+
+    return regressions
+
+
+def write_baseline(path: str, results: list[PageResult], summary: Summary):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "recipeScrapersVersion": recipeScrapersVersion,
+                "python": platform.python_version(),
+                "summary": {
+                    name: round(value, 3) if isinstance(value, float) else value
+                    for name, value in asdict(summary).items()
+                },
+                "pages": {
+                    result.file: {
+                        "strategy": result.strategy,
+                        "p50Ms": round(result.p50Ms, 3),
+                        "p95Ms": round(result.p95Ms, 3),
+                        "peakMemoryKb": round(result.peakMemoryKb, 1),
+                    }
+                    for result in results
+                },
+            },
+            f,
+            indent=2,
+        )
+        f.write("\n")
+
+
+def run(args: argparse.Namespace) -> int:
+    forbid_network()
+
+    corpus = load_corpus(args.corpus)
+
+    if args.page:
+        corpus = [page for page in corpus if page.file in args.page]
+
+    results: list[PageResult] = []
+    allTimingsMs: list[float] = []
+
+    for page in corpus:
+        result, timingsMs = run_page(page, args.corpus, args.iterations, args.warmup)
+        results.append(result)
+        allTimingsMs += timingsMs
+
+    summary = summarize(results, allTimingsMs)
+
+    print(report(results, summary))
+
+    if args.update_baseline:
+        write_baseline(args.baseline, results, summary)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}, run with --update-baseline first")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    regressions = compare_pages(
+        results, baseline["pages"], args.latency_tolerance, args.memory_tolerance
+    )
+
+    # the aggregates of a subset of the corpus are not comparable with the baseline
+    if not args.page:
+        regressions += compare_summary(
+            summary, baseline["summary"], args.latency_tolerance
+        )
+
+    if baseline.get("recipeScrapersVersion") != recipeScrapersVersion:
+        print(
+            f"\nThe baseline was recorded with recipe-scrapers {baseline.get('recipeScrapersVersion')}"
+        )
+
+    if regressions:
+        print("\nREGRESSIONS AGAINST THE BASELINE:", file=sys.stderr)
+
+        for regression in regressions:
+            print(f"  - {regression}", file=sys.stderr)
+
+        return 1
+
+    print("\nNo regressions against the baseline")
+
+    return 0
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmarks the recipe extraction over the stored html corpus, without any network access"
+    )
+    parser.add_argument("--corpus", default=CORPUS_DIR)
+    parser.add_argument(
+        "--baseline",
+        default=BASELINE_PATH,
+        help="latencies are machine dependent, record the baseline on the machine that compares against it",
+    )
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument(
+        "--page", action="append", default=[], help="only run this corpus file"
+    )
+    parser.add_argument(
+        "--latency-tolerance",
+        type=float,
+        default=0.5,
+        help="allowed relative latency increase",
+    )
+    parser.add_argument(
+        "--memory-tolerance",
+        type=float,
+        default=0.2,
+        help="allowed relative peak memory increase",
+    )
+    parser.add_argument("--update-baseline", action="store_true")
+
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(run(parse_args()))
@@ -1,8 +1,13 @@
 from pydantic import Field
 from shared.models.environment.MessagesConfig import MessagesConfig
+from shared.models.environment.ScrapeLeaseConfig import ScrapeLeaseConfig
 from shared.models.environment.settings import BaseEnvironment
+from shared.utils.str_to_timedelta import SerializableTimedelta
 
 
 class Environment(BaseEnvironment):
     recipesTableName: str = Field(validation_alias="RECIPES_TABLE_NAME")
     notification: MessagesConfig = Field(validation_alias="NOTIFICATION")
+    recipeCacheTableName: str = Field(validation_alias="RECIPE_CACHE_TABLE_NAME")
+    recipeCacheTTL: SerializableTimedelta = Field(validation_alias="RECIPE_CACHE_TTL")
+    scrapeLease: ScrapeLeaseConfig | None = Field(None, validation_alias="SCRAPE_LEASE")
@@ -0,0 +1,7 @@
+from pydantic import Field
+from shared.models.environment.ParseSchedulingConfig import ParseSchedulingConfig
+from shared.models.environment.settings import BaseEnvironment
+
+
+class Environment(BaseEnvironment):
+    parseScheduling: ParseSchedulingConfig = Field(validation_alias="PARSE_SCHEDULING")
@@ -0,0 +1,17 @@
+from aws_lambda_powertools import Logger, Metrics
+from aws_lambda_powertools.utilities.typing import LambdaContext
+from shared.utils.environment import validate_environment
+from shared.utils.parse_scheduling import dispatch_parses, fail_expired_parses
+from .env import Environment
+
+log = Logger("dispatch-parses")
+metrics = Metrics()
+
+
+@log.inject_lambda_context(log_event=True)
+@metrics.log_metrics
+@validate_environment(model=Environment, log=log)
+def handler(event: dict, context: LambdaContext, *, env: Environment):
+    # the queue is otherwise only dispatched by new parses, which may never come after the slots leak
+    fail_expired_parses(env.parseScheduling, log)
+    dispatch_parses(env.parseScheduling, log)
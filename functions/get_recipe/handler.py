@@ -3,14 +3,17 @@ import boto3
 import botocore
 import botocore.exceptions
 from shared.models.authorization.CognitoUserClaims import CognitoUserClaims
-from shared.models.database.RecipeDbItem import RecipeDbItem
+from shared.models.RecipeScrapeStatus import RecipeScrapeStatus
+from shared.models.database.RecipeDbItem import PendingRecipeDbItem, RecipeDbItem
 from shared.models.database.ScrapedRecipe import ScrapedRecipe
 from aws_lambda_powertools import Logger
 from shared.models.requests.paths.GetRecipePathParams import GetRecipePathParams
 from shared.models.responses.HttpResponse import (
+    AcceptedResponse,
     MultiStatusResponse,
     NotFoundResponse,
     OkResponse,
+    UnprocessableEntityResponse,
 )
 from shared.openapi.tags import RecipesTag
 from shared.utils.dump_response import dump_response
@@ -31,8 +34,10 @@ log = Logger("get-recipe")
     log,
     responses=[
         OkResponse[ScrapedRecipe],
+        AcceptedResponse[str],
         MultiStatusResponse[str],
         NotFoundResponse,
+        UnprocessableEntityResponse,
     ],
     path=GetRecipePathParams,
     operationId="getRecipe",
@@ -60,7 +65,22 @@ def handler(
 
         log.debug("raw recipe from dynamo", extra={"rawRecipe": rawRecipe})
 
-        recipeRow = RecipeDbItem.from_dynamo(rawRecipe["Item"])  # pyright: ignore[reportTypedDictNotRequiredAccess]
+        rawItem = rawRecipe["Item"]  # pyright: ignore[reportTypedDictNotRequiredAccess]
+
+        if "ScrapeStatus" in rawItem:
+            pendingRow = PendingRecipeDbItem.from_dynamo(rawItem)
+
+            if pendingRow.OwnerId != jwtClaims.userId:
+                return NotFoundResponse()
+
+            if pendingRow.ScrapeStatus == RecipeScrapeStatus.pending:
+                return AcceptedResponse(body="The recipe is still being scraped")
+
+            return UnprocessableEntityResponse(
+                body=pendingRow.FailureReason or "Unable to scrape the recipe"
+            )
+
+        recipeRow = RecipeDbItem.from_dynamo(rawItem)
 
         if not recipeRow.IsComplete or recipeRow.OwnerId != jwtClaims.userId:
             return NotFoundResponse()
@@ -7,13 +7,13 @@ from pydantic import ValidationError
 from shared.models.DTO.ParseIngredientInput import (
     ParseIngredientInputWithError,
 )
-from shared.models.DTO.ProcessIngredientsInput import IngredientToProcessDTO
-from shared.models.DTO.ProcessedIngredient import ProcessedIngredientCollection
-from shared.models.Ingredient import Ingredient
+from shared.models.DTO.ParseTaskOutput import ParseTaskResults, ParseTaskRetry
+from shared.models.DTO.ProcessIngredientsInput import IngredientBatchToProcessDTO
 from shared.models.IngredientParseStatus import IngredientParseStatus
 from shared.models.database.StoredResponse import StoredResponse
 from shared.utils.dump_response import dump_response
 from shared.utils.environment import validate_environment
+from shared.utils.ingredient_parsing import too_long_ingredients, unparsed_result
 from .env import Environment
 
 
@@ -26,7 +26,7 @@ log = Logger("parse-ingredient-fail")
 @dump_response
 def handler(
     event: ParseIngredientInputWithError, context: LambdaContext, *, env: Environment
-):
+) -> ParseTaskResults | ParseTaskRetry:
     responsesTable = boto3.resource("dynamodb").Table(env.dynamoResponsesTableName)
 
     try:
@@ -35,22 +35,40 @@ def handler(
             ReturnValues="NONE",
         )
 
-        return ProcessedIngredientCollection(
-            originalIngredient=IngredientToProcessDTO(
-                recipeId=event.recipeId,
-                ingredientId=event.ingredientId,
-                content=event.content,
-            ),
-            result=[
-                Ingredient(
-                    name=event.content,
-                    originalText=event.content,
-                    isProcessed=True,
-                )
-            ],
-            status=IngredientParseStatus.generalAiError
-            if event.error.error == "ResponseFailed"
-            else IngredientParseStatus.ingredientTooLong,
+        if event.error.error == "ResponseFailed":
+            status = IngredientParseStatus.generalAiError
+        else:
+            status = IngredientParseStatus.ingredientTooLong
+
+            # a batch that was already split once is not split again, so the retries always end
+            if len(event.tooLongIngredientIds) == 0:
+                tooLong = too_long_ingredients(event.ingredients)
+
+                if 0 < len(tooLong) < len(event.ingredients):
+                    log.info(
+                        "Parsing the batch again without the lines that are too long",
+                        extra={
+                            "tooLongIngredientIds": [
+                                ingredient.ingredientId for ingredient in tooLong
+                            ]
+                        },
+                    )
+
+                    return ParseTaskRetry(
+                        retryBatch=IngredientBatchToProcessDTO.model_validate(
+                            event.model_dump(exclude={"error"})
+                            | {
+                                "tooLongIngredientIds": [
+                                    ingredient.ingredientId for ingredient in tooLong
+                                ]
+                            }
+                        )
+                    )
+
+        return ParseTaskResults(
+            results=[
+                unparsed_result(ingredient, status) for ingredient in event.ingredients
+            ]
         )
     except ValidationError:
         log.exception("Invalid dynamodb content")
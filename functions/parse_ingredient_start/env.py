@@ -1,21 +1,27 @@
-from pydantic import BaseModel, Field
+from pydantic import Field
 
-from shared.models.environment.AiConfig import AiConfig
+from shared.models.environment.AiConfigWithModel import AiConfigWithModel
+from shared.models.environment.AiRateLimitConfig import AiRateLimitConfig
+from shared.models.environment.ParseCacheConfig import ParseCacheConfig
+from shared.models.environment.ParseSchedulingConfig import ParseSchedulingConfig
+from shared.models.environment.PromptIdByLanguage import PromptIdByLanguage
 from shared.models.environment.settings import BaseEnvironment
 
 
-class PromptIdByLanguage(BaseModel):
-    pl: str = Field(validation_alias="PL")
-    en: str = Field(validation_alias="EN")
-
-
-class AiConfigWithModel(AiConfig):
-    model: str = Field(validation_alias="MODEL_NAME")
-
-
 class Environment(BaseEnvironment):
     ai: AiConfigWithModel = Field(validation_alias="AI")
     promptId: PromptIdByLanguage = Field(validation_alias="PROMPT_ID")
     dynamoResponsesTableName: str = Field(
         validation_alias="DYNAMO_RESPONSES_TABLE_NAME"
     )
+    parseCache: ParseCacheConfig = Field(validation_alias="PARSE_CACHE")
+    # values above 1 send every line to the AI
+    localParseMinConfidence: float = Field(
+        0.9, ge=0, validation_alias="LOCAL_PARSE_MIN_CONFIDENCE"
+    )
+    aiRateLimit: AiRateLimitConfig | None = Field(
+        None, validation_alias="AI_RATE_LIMIT"
+    )
+    parseScheduling: ParseSchedulingConfig | None = Field(
+        None, validation_alias="PARSE_SCHEDULING"
+    )
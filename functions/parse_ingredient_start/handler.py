@@ -1,64 +1,127 @@
 from datetime import datetime, timedelta
-from aws_lambda_powertools import Logger
+from aws_lambda_powertools import Logger, Metrics
 import boto3
 from openai import BadRequestError, OpenAI, RateLimitError
 from aws_lambda_powertools.utilities.typing import LambdaContext
 from aws_lambda_powertools.utilities.parser import event_parser
 from shared.models.DTO.ParseIngredientInput import ParseIngredientInput
-from shared.models.chat.chat_models import create_chat_models, schema_name
+from shared.models.DTO.ParseTaskOutput import ParseTaskResults
+from shared.models.SupportedLanguage import SupportedLanguage
 from shared.models.database.StoredResponse import StoredResponse
 from shared.models.exceptions.chatExceptions import (
     InputTooLongException,
     OutOfCreditsException,
 )
+from shared.utils.ai_rate_limit import (
+    acquire_ai_request,
+    record_ai_success,
+    record_ai_throttle,
+)
 from shared.utils.dump_response import dump_response
 from shared.utils.environment import validate_environment
+from shared.utils.ingredient_parsing import (
+    CachedLines,
+    batch_lang,
+    parse_request_body,
+    resolve_cached_lines,
+)
+from shared.utils.parse_scheduling import admit_parse, enqueue_parse, release_parse
 from botocore.exceptions import ClientError
 from .env import Environment
 
 log = Logger("parse-ingredient-start")
+metrics = Metrics()
 
 
 @log.inject_lambda_context(log_event=True)
+@metrics.log_metrics
 @event_parser(model=ParseIngredientInput)
 @dump_response
 @validate_environment(model=Environment, log=log)
 def handler(event: ParseIngredientInput, context: LambdaContext, *, env: Environment):
-    client = OpenAI(api_key=env.ai.api_key, base_url=env.ai.base_url)
+    batch = event.batch
+    lang = batch_lang(batch)
+    promptId = env.promptId.for_lang(lang)
+
+    cachedLines = resolve_cached_lines(
+        batch,
+        lang,
+        promptId,
+        env.ai.model,
+        env.parseCache,
+        env.localParseMinConfidence,
+        log,
+    )
+
+    # batches of executions started before the owner was passed along skip the scheduler
+    scheduler = env.parseScheduling
+    slotId = event.schedulerSlotId
+
+    if len(cachedLines.pendingIngredients) == 0:
+        if scheduler is not None and batch.ownerId is not None and slotId is not None:
+            release_parse(scheduler, batch.ownerId, slotId, log)
+
+        log.info(
+            "All ingredient lines parsed locally or found in the parse cache",
+            extra={"localParses": cachedLines.localParses},
+        )
+
+        # completes the map item right away, without a response to wait for
+        boto3.client("stepfunctions").send_task_success(
+            taskToken=event.taskToken,
+            output=ParseTaskResults(results=cachedLines.cachedResults).model_dump_json(),
+        )
+        return
 
-    if event.ingredient.lang is not None and "pl" in event.ingredient.lang:
-        lang = "pl"
-    elif event.ingredient.lang is not None and "en" in event.ingredient.lang:
-        lang = "en"
-    else:
-        lang = event.ingredient.defaultLang
+    if scheduler is not None and batch.ownerId is not None and not event.admitted:
+        slotId = admit_parse(scheduler, batch.ownerId, log)
 
-    promptId = env.promptId.pl if lang == "pl" else env.promptId.en
+        if slotId is None:
+            enqueue_parse(scheduler, batch.ownerId, event, log)
+            return
+
+    try:
+        start_response(event, env, lang, promptId, cachedLines, slotId)
+    except Exception as e:
+        if scheduler is not None and batch.ownerId is not None and slotId is not None:
+            release_parse(scheduler, batch.ownerId, slotId, log)
+
+        if not event.admitted:
+            raise
+
+        # scheduled invocations are asynchronous, so the error goes to the waiting map item instead
+        boto3.client("stepfunctions").send_task_failure(
+            taskToken=event.taskToken, error=type(e).__name__, cause=str(e)
+        )
 
-    _, Ingredients = create_chat_models(lang)
+
+def start_response(
+    event: ParseIngredientInput,
+    env: Environment,
+    lang: SupportedLanguage,
+    promptId: str,
+    cachedLines: CachedLines,
+    schedulerSlotId: str | None,
+):
+    client = OpenAI(api_key=env.ai.api_key, base_url=env.ai.base_url)
+    batch = event.batch
 
     try:
+        if env.aiRateLimit is not None:
+            acquire_ai_request(env.aiRateLimit, log)
+
         response = client.responses.create(
-            prompt={
-                "id": promptId,
-            },
-            input=event.ingredient.content,
-            text={
-                "format": {
-                    "type": "json_schema",
-                    "name": schema_name[lang],
-                    "strict": False,
-                    "schema": Ingredients.model_json_schema(),
-                },
-                "verbosity": "low",
-            },
-            reasoning={"effort": "minimal"},
+            **parse_request_body(
+                cachedLines.pendingIngredients, lang, promptId, env.ai.model
+            ),
             store=True,
             background=True,
             service_tier="flex",
-            model=env.ai.model,
         )
 
+        if env.aiRateLimit is not None:
+            record_ai_success(env.aiRateLimit, log)
+
         dynamo = boto3.resource("dynamodb")
         responsesTable = dynamo.Table(env.dynamoResponsesTableName)
 
@@ -66,9 +129,13 @@ def handler(event: ParseIngredientInput, context: LambdaContext, *, env: Environ
             Item=StoredResponse(
                 ResponseId=response.id,
                 TaskToken=event.taskToken,
-                OriginalIngredientInput=event.ingredient,
-                RetryCount=event.ingredient.retryCount,
+                OriginalBatchInput=batch,
+                RetryCount=batch.retryCount,
                 ExpiresAt=datetime.now() + timedelta(days=1),
+                ParseCacheKeys=cachedLines.pendingCacheKeys,
+                CachedResults=cachedLines.cachedResults,
+                SchedulerOwnerId=batch.ownerId if schedulerSlotId is not None else None,
+                SchedulerSlotId=schedulerSlotId,
             ).model_dump(),
             ReturnValues="NONE",
         )
@@ -80,6 +147,9 @@ def handler(event: ParseIngredientInput, context: LambdaContext, *, env: Environ
             log.exception("Out of openai credits")
             raise OutOfCreditsException() from e
 
+        if env.aiRateLimit is not None:
+            record_ai_throttle(env.aiRateLimit, log)
+
         raise e
     except BadRequestError as e:
         if e.code == "string_above_max_length":
@@ -1,5 +1,7 @@
 from pydantic import Field
 from shared.models.environment.AiConfig import AiConfig
+from shared.models.environment.ParseCacheConfig import ParseCacheConfig
+from shared.models.environment.ParseSchedulingConfig import ParseSchedulingConfig
 from shared.models.environment.settings import BaseEnvironment
 
 
@@ -12,3 +14,8 @@ class Environment(BaseEnvironment):
     dynamoResponsesTableName: str = Field(
         validation_alias="DYNAMO_RESPONSES_TABLE_NAME"
     )
+    maxRetryCount: int = Field(validation_alias="MAX_RETRY_COUNT", ge=0)
+    parseCache: ParseCacheConfig = Field(validation_alias="PARSE_CACHE")
+    parseScheduling: ParseSchedulingConfig | None = Field(
+        None, validation_alias="PARSE_SCHEDULING"
+    )
@@ -4,10 +4,8 @@ from aws_lambda_powertools.utilities.parser import event_parser
 import boto3
 from openai import InvalidWebhookSignatureError, OpenAI
 from pydantic import ValidationError
-from shared.models.DTO.WebhokOutput import WebhookOutput
-from shared.models.database.StoredResponse import (
-    StoredResponseProjection,
-)
+from shared.models.DTO.ParseTaskOutput import ParseTaskResults, ParseTaskRetry
+from shared.models.database.StoredResponse import StoredResponse
 from shared.models.lambda_events.WebhookApiGatewayEvent import WebhookApiGatewayEvent
 from shared.models.responses.HttpResponse import (
     BadRequestResponse,
@@ -15,6 +13,13 @@ from shared.models.responses.HttpResponse import (
 )
 from shared.utils.dump_response import dump_response
 from shared.utils.environment import validate_environment
+from shared.utils.ingredient_parsing import (
+    cache_parsed_lines,
+    missing_ingredients,
+    parse_results,
+    parsed_lines,
+)
+from shared.utils.parse_scheduling import dispatch_parses, release_parse
 from .env import Environment
 
 log = Logger("parse-result-webhook")
@@ -34,6 +39,10 @@ def handler(event: WebhookApiGatewayEvent, context: LambdaContext, *, env: Envir
     try:
         openaiEvent = client.webhooks.unwrap(event.body, event.headers)
 
+        # ingredient parsing batches are picked up by polling
+        if openaiEvent.type.startswith("batch."):
+            return EmptyOkResponse()
+
         if openaiEvent.type not in [
             "response.completed",
             "response.failed",
@@ -44,14 +53,36 @@ def handler(event: WebhookApiGatewayEvent, context: LambdaContext, *, env: Envir
         responsesTable = boto3.resource("dynamodb").Table(env.dynamoResponsesTableName)
 
         storedResponseRaw = responsesTable.get_item(
-            Key={StoredResponseProjection.get_primary_key_name(): openaiEvent.data.id},  # pyright: ignore[reportAttributeAccessIssue]
+            Key={StoredResponse.get_primary_key_name(): openaiEvent.data.id},  # pyright: ignore[reportAttributeAccessIssue]
             ReturnConsumedCapacity="NONE",
-            ProjectionExpression=StoredResponseProjection.top_level_fields_projection(),
-        )
+        ).get("Item")
 
-        storedResponse = StoredResponseProjection.from_dynamo(
-            storedResponseRaw.get("Item", {})
-        )
+        if storedResponseRaw is None:
+            log.warning(
+                "The stored response is missing",
+                extra={"responseId": openaiEvent.data.id},  # pyright: ignore[reportAttributeAccessIssue]
+            )
+
+            # its slot is already released or has expired, the dispatch reclaims expired slots
+            if env.parseScheduling is not None:
+                dispatch_parses(env.parseScheduling, log)
+
+            return EmptyOkResponse()
+
+        storedResponse = StoredResponse.from_dynamo(storedResponseRaw)
+
+        # the response is finished either way, so its slot goes to the next queued batch
+        if (
+            env.parseScheduling is not None
+            and storedResponse.SchedulerOwnerId is not None
+            and storedResponse.SchedulerSlotId is not None
+        ):
+            release_parse(
+                env.parseScheduling,
+                storedResponse.SchedulerOwnerId,
+                storedResponse.SchedulerSlotId,
+                log,
+            )
 
         sfnClient = boto3.client("stepfunctions")
 
@@ -72,13 +103,24 @@ def handler(event: WebhookApiGatewayEvent, context: LambdaContext, *, env: Envir
             finally:
                 return EmptyOkResponse()
 
+        response = client.responses.retrieve(storedResponse.ResponseId)
+
+        # the parsed lines go to the map item directly, nothing reads the stored response after this
         sfnClient.send_task_success(
             taskToken=storedResponse.TaskToken,
-            output=WebhookOutput(
-                responseId=openaiEvent.data.id,  # pyright: ignore[reportAttributeAccessIssue]
+            output=parse_task_output(
+                env,
+                storedResponse,
+                response.output_text,
+                response.usage.total_tokens if response.usage is not None else 0,
             ).model_dump_json(),
         )
 
+        responsesTable.delete_item(
+            Key={StoredResponse.get_primary_key_name(): storedResponse.ResponseId},
+            ReturnValues="NONE",
+        )
+
         return EmptyOkResponse()
     except InvalidWebhookSignatureError:
         log.exception("Invalid openai webhook signature")
@@ -86,3 +128,40 @@ def handler(event: WebhookApiGatewayEvent, context: LambdaContext, *, env: Envir
     except ValidationError:
         log.exception("Invalid data retrieved from dynamo")
         return EmptyOkResponse()
+
+
+def parse_task_output(
+    env: Environment,
+    storedResponse: StoredResponse,
+    outputText: str | None,
+    totalTokens: int,
+) -> ParseTaskResults | ParseTaskRetry:
+    parsedLines = parsed_lines(storedResponse, outputText, log)
+    missingIngredients = missing_ingredients(storedResponse, parsedLines)
+
+    cache_parsed_lines(env.parseCache, storedResponse, parsedLines, totalTokens, log)
+
+    if len(missingIngredients) > 0:
+        log.warning(
+            "Some ingredient lines are missing from the ai response",
+            extra={
+                "missingIngredientIds": [
+                    ingredient.ingredientId for ingredient in missingIngredients
+                ]
+            },
+        )
+
+        if storedResponse.RetryCount < env.maxRetryCount:
+            retryBatch = storedResponse.OriginalBatchInput.model_copy(
+                update={"retryCount": storedResponse.RetryCount + 1}
+            )
+
+            return ParseTaskRetry(retryBatch=retryBatch)
+
+        log.warning(
+            "Failed to parse the ingredients even after retries",
+            extra={"retryCount": storedResponse.RetryCount},
+        )
+
+    return ParseTaskResults(results=parse_results(storedResponse, parsedLines))
+
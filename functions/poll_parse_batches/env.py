@@ -0,0 +1,20 @@
+from pydantic import Field
+from shared.models.environment.AiConfig import AiConfig
+from shared.models.environment.BatchParsingConfig import BatchParsingConfig
+from shared.models.environment.ParseCacheConfig import ParseCacheConfig
+from shared.models.environment.settings import BaseEnvironment
+
+
+class Environment(BaseEnvironment):
+    ai: AiConfig = Field(validation_alias="AI")
+    dynamoResponsesTableName: str = Field(
+        validation_alias="DYNAMO_RESPONSES_TABLE_NAME"
+    )
+    parseCache: ParseCacheConfig = Field(validation_alias="PARSE_CACHE")
+    batchParsing: BatchParsingConfig = Field(validation_alias="BATCH_PARSING")
+    processIngredientStepFnArn: str = Field(
+        validation_alias="PROCESS_INGREDIENTS_STEP_FN_ARN"
+    )
+    assembleRecipeFunctionName: str = Field(
+        validation_alias="ASSEMBLE_RECIPE_FUNCTION_NAME"
+    )
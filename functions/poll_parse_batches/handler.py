@@ -0,0 +1,100 @@
+from aws_lambda_powertools import Logger, Metrics
+from aws_lambda_powertools.metrics import MetricUnit
+from aws_lambda_powertools.utilities.typing import LambdaContext
+import boto3
+from botocore.exceptions import ClientError
+from openai import OpenAI
+from shared.models.database.ParseBatchJobItem import ParseBatchJobItem
+from shared.utils.batch_parsing import (
+    BatchOutput,
+    complete_parse_requests,
+    get_parse_requests,
+    read_batch_output,
+)
+from shared.utils.environment import validate_environment
+from .env import Environment
+
+log = Logger("poll-parse-batches")
+metrics = Metrics()
+
+ACTIVE_BATCH_STATUSES = ["validating", "in_progress", "finalizing", "cancelling"]
+
+
+def read_batch_outputs(
+    client: OpenAI, outputFileId: str | None
+) -> dict[str, BatchOutput]:
+    # failed and expired batches may still have partial output
+    if outputFileId is None:
+        return {}
+
+    return dict(
+        read_batch_output(line)
+        for line in client.files.content(outputFileId).text.splitlines()
+        if line.strip() != ""
+    )
+
+
+def finish_job(client: OpenAI, env: Environment, job: ParseBatchJobItem) -> bool:
+    batch = client.batches.retrieve(job.BatchId)
+
+    if batch.status in ACTIVE_BATCH_STATUSES:
+        return False
+
+    log.info(
+        "Ingredient parsing batch finished",
+        extra={
+            "batchId": job.BatchId,
+            "status": batch.status,
+            "requestCounts": batch.request_counts,
+        },
+    )
+
+    requests = get_parse_requests(env.dynamoResponsesTableName, job.RequestIds)
+
+    complete_parse_requests(
+        requests,
+        read_batch_outputs(client, batch.output_file_id),
+        parseCache=env.parseCache,
+        assembleRecipeFunctionName=env.assembleRecipeFunctionName,
+        processIngredientStepFnArn=env.processIngredientStepFnArn,
+        log=log,
+        responsesTableName=env.dynamoResponsesTableName,
+    )
+
+    boto3.resource("dynamodb").Table(env.batchParsing.jobsTableName).delete_item(
+        Key={ParseBatchJobItem.get_primary_key_name(): job.BatchId},
+        ReturnValues="NONE",
+    )
+
+    return True
+
+
+@log.inject_lambda_context(log_event=True)
+@metrics.log_metrics
+@validate_environment(model=Environment, log=log)
+def handler(event: dict, context: LambdaContext, *, env: Environment):
+    client = OpenAI(api_key=env.ai.api_key, base_url=env.ai.base_url)
+    jobsTable = boto3.resource("dynamodb").Table(env.batchParsing.jobsTableName)
+
+    scanArgs = {}
+    finished = 0
+
+    try:
+        while True:
+            page = jobsTable.scan(**scanArgs)
+
+            for rawItem in page.get("Items", []):
+                if finish_job(client, env, ParseBatchJobItem.from_dynamo(rawItem)):
+                    finished += 1
+
+            if "LastEvaluatedKey" not in page:
+                break
+
+            scanArgs["ExclusiveStartKey"] = page["LastEvaluatedKey"]
+    except ClientError:
+        log.exception("Boto3 client exception occurred")
+        raise
+
+    metrics.add_metric(
+        name="IngredientParseBatchesFinished", unit=MetricUnit.Count, value=finished
+    )
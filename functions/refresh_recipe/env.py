@@ -0,0 +1,6 @@
+from shared.models.environment.QuotaBaseEnv import QuotaBaseEnv
+from shared.models.environment.ScrapeEnvironment import ScrapeEnvironment
+
+
+class Environment(QuotaBaseEnv, ScrapeEnvironment):
+    pass
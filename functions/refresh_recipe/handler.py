@@ -0,0 +1,142 @@
+from urllib.error import HTTPError
+from aws_lambda_powertools import Logger, Metrics
+from aws_lambda_powertools.utilities.parser.models import APIGatewayProxyEventV2Model
+from aws_lambda_powertools.utilities.typing import LambdaContext
+import boto3
+from botocore.exceptions import ClientError
+from pydantic import TypeAdapter
+from shared.models.authorization.CognitoUserClaims import CognitoUserClaims
+from shared.models.database.QuotaItem import QuotaItem
+from shared.models.database.RecipeDbItem import RecipeDbItem
+from shared.models.exceptions.apiExceptions import UnableToParseRecipeException
+from shared.models.exceptions.fetchExceptions import PageFetchException
+from shared.models.exceptions.scrapeExceptions import (
+    HostUnavailableException,
+    RecentScrapeFailureException,
+)
+from shared.models.requests.paths.GetRecipePathParams import GetRecipePathParams
+from shared.models.requests.queries.RefreshQuery import RefreshQuery
+from shared.models.responses.HttpResponse import (
+    ConflictResponse,
+    InternalServerErrorResponse,
+    NotFoundResponse,
+    OkResponse,
+    ServiceUnavailableResponse,
+    TooManyRequestsHeaders,
+    UnprocessableEntityResponse,
+)
+from shared.models.responses.RefreshRecipeResult import RefreshRecipeResult
+from shared.openapi.tags import RecipesTag
+from shared.scraping.pipeline import describe_scrape_failure
+from shared.scraping.refresh import is_refreshing, run_refresh
+from shared.utils.dump_response import dump_response
+from shared.utils.environment import validate_environment
+from shared.utils.http_pool import HttpConnectionPool
+from shared.utils.openapi import openapi_endpoint
+from shared.utils.verify_quota import refund_user_quota, verify_user_quota
+from .env import Environment
+
+log = Logger("refresh-recipe")
+metrics = Metrics()
+
+# kept at module level so that warm containers reuse keep-alive connections
+httpPool = HttpConnectionPool()
+
+
+@log.inject_lambda_context(log_event=True)
+@metrics.log_metrics
+@dump_response
+@verify_user_quota(log)
+@openapi_endpoint(
+    log,
+    responses=[
+        OkResponse[RefreshRecipeResult],
+        NotFoundResponse,
+        ConflictResponse,
+        UnprocessableEntityResponse,
+        ServiceUnavailableResponse,
+    ],
+    path=GetRecipePathParams,
+    query=TypeAdapter(RefreshQuery | None),
+    summary="Scrapes an existing recipe again, reparsing only the ingredients that have changed",
+    description="Refresh the recipe from its source page. Unchanged pages are detected with a conditional request, and only new or edited ingredient lines go through the AI parsing again",
+    operationId="refreshRecipe",
+    tags=[RecipesTag],
+)
+@validate_environment(model=Environment, log=log)
+def handler(
+    rawEvent: APIGatewayProxyEventV2Model,
+    _: LambdaContext,
+    *,
+    env: Environment,
+    jwtClaims: CognitoUserClaims,
+    quotaItems: list[QuotaItem],
+    path: GetRecipePathParams,
+    query: RefreshQuery | None = None,
+    **kwargs,
+):
+    try:
+        rawItem = (
+            boto3.resource("dynamodb")
+            .Table(env.recipesTableName)
+            .get_item(
+                Key={RecipeDbItem.get_primary_key_name(): path.recipeId},
+                ReturnConsumedCapacity="NONE",
+            )
+            .get("Item")
+        )
+
+        # nothing is refreshed in these cases, so the request is not charged
+        if rawItem is None or "ScrapeStatus" in rawItem:
+            refund_user_quota(quotaItems, log)
+            return NotFoundResponse()
+
+        item = RecipeDbItem.from_dynamo(rawItem)
+
+        if item.OwnerId != jwtClaims.userId:
+            refund_user_quota(quotaItems, log)
+            return NotFoundResponse()
+
+        if not item.IsComplete or is_refreshing(item):
+            refund_user_quota(quotaItems, log)
+            return ConflictResponse(body="The recipe is still being processed")
+
+        outcome = run_refresh(
+            item,
+            env,
+            defaultToLang=(query or RefreshQuery()).defaultToLang,
+            pool=httpPool,
+            log=log,
+        )
+
+        # an unchanged page costs no parsing
+        if not outcome.changed:
+            refund_user_quota(quotaItems, log)
+
+        return OkResponse(
+            body=RefreshRecipeResult(
+                recipeId=item.RecipeId,
+                changed=outcome.changed,
+                reparsedIngredients=len(outcome.changedIngredients),
+            )
+        )
+    except ClientError:
+        log.exception("Boto3 client exception occurred")
+        return InternalServerErrorResponse()
+    except RecentScrapeFailureException as e:
+        refund_user_quota(quotaItems, log)
+        return UnprocessableEntityResponse(body=describe_scrape_failure(e))
+    except HostUnavailableException as e:
+        refund_user_quota(quotaItems, log)
+        return ServiceUnavailableResponse(
+            body=describe_scrape_failure(e),
+            headers=TooManyRequestsHeaders(retryAfter=e.retryAfter),
+        )
+    except UnableToParseRecipeException as e:
+        log.exception("Unable to parse the refreshed recipe")
+        refund_user_quota(quotaItems, log)
+        return UnprocessableEntityResponse(body=describe_scrape_failure(e))
+    except (HTTPError, PageFetchException) as e:
+        log.exception("Unable to load data from the recipe url")
+        refund_user_quota(quotaItems, log)
+        return UnprocessableEntityResponse(body=describe_scrape_failure(e))
@@ -1,187 +1,141 @@
 from datetime import datetime
-import itertools
+from time import monotonic
 from urllib.error import HTTPError
-from urllib.request import Request, urlopen
+from uuid import uuid4
+from aws_lambda_powertools import Metrics
 from aws_lambda_powertools.utilities.typing import LambdaContext
 import boto3
 from botocore.exceptions import ClientError
 from pydantic import TypeAdapter
-from recipe_scrapers import scrape_html
-from recipe_scrapers._exceptions import RecipeScrapersExceptions
-from shared.models.DTO.ProcessIngredientsInput import (
-    IngredientToProcessWithLangInfoDTO,
-    ProcessIngredientsInputTypeAdapter,
-)
-from shared.models.IngredientParseStatus import IngredientParseStatus
-from shared.models.Ingredient import Ingredient
-from shared.models.IngredientGroup import IngredientGroup
-from shared.models.Recipe import Recipe
+from shared.models.DTO.ScrapeRecipeJob import ScrapeRecipeJob
+from shared.models.RecipeScrapeStatus import RecipeScrapeStatus
 from shared.models.authorization.CognitoUserClaims import CognitoUserClaims
-from shared.models.database.RecipeDbItem import RecipeDbItem
-from shared.models.database.ScrapedRecipe import ScrapedRecipe
+from shared.models.database.QuotaItem import QuotaItem
+from shared.models.database.RecipeDbItem import PendingRecipeDbItem
 from shared.models.exceptions.apiExceptions import UnableToParseRecipeException
+from shared.models.exceptions.fetchExceptions import PageFetchException
+from shared.models.exceptions.scrapeExceptions import (
+    HostUnavailableException,
+    RecentScrapeFailureException,
+)
 from shared.models.requests.ScrapeRecipeRequestBody import (
     ScrapeRecipeRequestBody,
 )
 from aws_lambda_powertools.utilities.parser.models import APIGatewayProxyEventV2Model
 from shared.models.requests.queries.ScrapeQuery import ScrapeQuery
 from shared.models.responses.HttpResponse import (
+    AcceptedResponse,
     InternalServerErrorResponse,
     OkResponse,
+    ServiceUnavailableResponse,
+    TooManyRequestsHeaders,
     UnprocessableEntityResponse,
 )
 from shared.openapi.tags import RecipesTag
+from shared.scraping.pipeline import describe_scrape_failure, run_scrape
 from shared.utils.environment import validate_environment
 from shared.utils.dump_response import dump_response
+from shared.utils.http_pool import HttpConnectionPool
+from shared.utils.idempotency import idempotent_request
 from shared.utils.openapi import openapi_endpoint
-from shared.utils.verify_quota import verify_user_quota
+from shared.utils.verify_quota import refund_user_quota, verify_user_quota
 from .env import Environment
 from aws_lambda_powertools import Logger
 
 log = Logger("scrape-recipe")
+metrics = Metrics()
+
+# kept at module level so that warm containers reuse keep-alive connections
+httpPool = HttpConnectionPool()
 
 
 @log.inject_lambda_context(log_event=True)
+@metrics.log_metrics
+@idempotent_request(log)
 @dump_response
 @verify_user_quota(log)
 @openapi_endpoint(
     log,
     responses=[
         OkResponse[str],
+        AcceptedResponse[str],
         UnprocessableEntityResponse,
+        ServiceUnavailableResponse,
     ],
     query=ScrapeQuery,
     body=TypeAdapter(ScrapeRecipeRequestBody | None),
     summary="Starts the processing of the recipe under the provided url, optionally with AI ingredient parsing",
-    description="Start the recipe processing",
+    description="Start the recipe processing. With runAsync the recipe is scraped in the background and its id is returned right away",
     operationId="scrapeRecipe",
     tags=[RecipesTag],
 )
 @validate_environment(model=Environment, log=log)
 def handler(
     rawEvent: APIGatewayProxyEventV2Model,
-    _: LambdaContext,
+    context: LambdaContext,
     *,
     env: Environment,
     jwtClaims: CognitoUserClaims,
+    quotaItems: list[QuotaItem],
     query: ScrapeQuery,
     body: ScrapeRecipeRequestBody | None = None,
     **kwargs,
 ):
-    try:
-        wild_mode = False
-
-        html = urlopen(Request(query.url)).read().decode("utf-8")
+    job = ScrapeRecipeJob(
+        url=query.url,
+        parseIngredients=query.parseIngredients,
+        defaultToLang=query.defaultToLang,
+        ownerId=jwtClaims.userId,
+        notificationToken=body.notificationToken if body is not None else None,
+    )
 
-        try:
-            result = scrape_html(html, org_url=query.url)
-        except RecipeScrapersExceptions:
-            try:
-                result = scrape_html(html, org_url=query.url, wild_mode=True)
-                wild_mode = True
-            except RecipeScrapersExceptions:
-                raise UnableToParseRecipeException()
-
-        rd = result.to_json()
-
-        ingredientGroups = [
-            IngredientGroup(
-                name=ig.get("purpose", None),
-                ingredients=[
-                    Ingredient(
-                        name=name,
-                        originalText=name,
-                        isProcessed=not query.parseIngredients,
-                    )
-                    for name in ig.get("ingredients", [])
-                ],
+    try:
+        if query.runAsync:
+            job.recipeId = str(uuid4())
+            job.quotaItems = quotaItems
+
+            boto3.resource("dynamodb").Table(env.recipesTableName).put_item(
+                Item=PendingRecipeDbItem(
+                    RecipeId=job.recipeId,
+                    NotificationEndpointARN=None,
+                    OwnerId=jwtClaims.userId,
+                    ExpiresAt=datetime.now() + env.recipeTTL,
+                    ScrapeStatus=RecipeScrapeStatus.pending,
+                ).model_dump(),
+                ReturnValues="NONE",
             )
-            for ig in rd["ingredient_groups"]
-        ]
-
-        recipe = Recipe(
-            title=rd["title"],
-            imageUrl=rd["image"],
-            lang=rd["language"],
-            url=rd["canonical_url"],
-            description=rd.get("description", None),
-            category=rd.get("category", None),
-            ingredientGroups=ingredientGroups,
-            steps=rd["instructions_list"],
-        )
 
-        recipeContent = ScrapedRecipe(
-            wildModeUsed=wild_mode,
-            recipe=recipe,
-            ingredientStatuses={
-                ingredient.id: IngredientParseStatus.off
-                for ingredient in itertools.chain.from_iterable(
-                    group.ingredients for group in ingredientGroups
-                )
-            }
-            if not query.parseIngredients
-            else {},
-        )
-
-        recipesTable = boto3.resource("dynamodb").Table(env.recipesTableName)
-        recipeExpiresAt = datetime.now() + env.recipeTTL
-
-        notificationEndpointArn: str | None = None
-
-        if query.parseIngredients and body is not None:
-            snsClient = boto3.client("sns")
-            # TODO: handle IOS - from useragent header or smth
-            result = snsClient.create_platform_endpoint(
-                PlatformApplicationArn=env.platformApplicationARN.android,
-                Token=body.notificationToken,
+            boto3.client("sqs").send_message(
+                QueueUrl=env.scrapeQueueUrl,
+                MessageBody=job.model_dump_json(),
             )
-            notificationEndpointArn = result["EndpointArn"]
-
-        recipesTable.put_item(
-            Item=RecipeDbItem(
-                RecipeId=recipe.id,
-                Content=recipeContent,
-                IsComplete=not query.parseIngredients,
-                HasParsingSucceeded=None if query.parseIngredients else True,
-                ExpiresAt=recipeExpiresAt,
-                NotificationEndpointARN=notificationEndpointArn,
-                OwnerId=jwtClaims.userId,
-            ).model_dump(),
-            ReturnValues="NONE",
-        )
 
-        if query.parseIngredients:
-            stepFnClient = boto3.client("stepfunctions")
+            return AcceptedResponse(body=job.recipeId)
 
-            stepFnClient.start_execution(
-                stateMachineArn=env.processIngredientStepFnArn,
-                input=ProcessIngredientsInputTypeAdapter.dump_json(
-                    [
-                        IngredientToProcessWithLangInfoDTO(
-                            content=ingredient.name,
-                            recipeId=recipe.id,
-                            ingredientId=ingredient.id,
-                            defaultLang=query.defaultToLang,
-                            lang=rd.get("language"),
-                            recipeExpiresAt=recipeExpiresAt,
-                        )
-                        for ingredient in itertools.chain.from_iterable(
-                            group.ingredients for group in ingredientGroups
-                        )
-                    ],
-                    ensure_ascii=True,
-                ).decode("utf-8"),
+        return OkResponse(
+            body=run_scrape(
+                job,
+                env,
+                pool=httpPool,
+                log=log,
+                deadline=monotonic() + context.get_remaining_time_in_millis() / 1000,
             )
-
-        return OkResponse(body=recipeContent.recipe.id)
+        )
     except ClientError:
         log.exception("Boto3 client exception occurred")
         return InternalServerErrorResponse()
-    except UnableToParseRecipeException:
+    except RecentScrapeFailureException as e:
+        refund_user_quota(quotaItems, log)
+        return UnprocessableEntityResponse(body=describe_scrape_failure(e))
+    except HostUnavailableException as e:
+        refund_user_quota(quotaItems, log)
+        return ServiceUnavailableResponse(
+            body=describe_scrape_failure(e),
+            headers=TooManyRequestsHeaders(retryAfter=e.retryAfter),
+        )
+    except UnableToParseRecipeException as e:
         log.exception("Unable to parse the recipe from the given website")
-        return UnprocessableEntityResponse(body="Unable to parse the recipe")
-    except HTTPError as e:
+        return UnprocessableEntityResponse(body=describe_scrape_failure(e))
+    except (HTTPError, PageFetchException) as e:
         log.exception("Unable to load data from the provided url")
-        return UnprocessableEntityResponse(
-            body=f"Unable to load content from the provided url (received status code {e.status})"
-        )
+        return UnprocessableEntityResponse(body=describe_scrape_failure(e))
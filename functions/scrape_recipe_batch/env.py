@@ -0,0 +1,7 @@
+from pydantic import Field
+from shared.models.environment.QuotaBaseEnv import QuotaBaseEnv
+from shared.models.environment.ScrapeEnvironment import ScrapeEnvironment
+
+
+class Environment(QuotaBaseEnv, ScrapeEnvironment):
+    batchConcurrency: int = Field(8, validation_alias="BATCH_CONCURRENCY", gt=0)
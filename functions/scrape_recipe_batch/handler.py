@@ -0,0 +1,198 @@
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from aws_lambda_powertools import Logger, Metrics
+from aws_lambda_powertools.utilities.parser.models import APIGatewayProxyEventV2Model
+from aws_lambda_powertools.utilities.typing import LambdaContext
+import boto3
+from botocore.exceptions import ClientError
+from pydantic import ValidationError
+from shared.models.DTO.ScrapeRecipeJob import ScrapeRecipeJob
+from shared.models.authorization.CognitoUserClaims import CognitoUserClaims
+from shared.models.database.QuotaItem import QuotaItem
+from shared.models.database.RecipeDbItem import RecipeDbItem
+from shared.models.exceptions.apiExceptions import UnableToParseRecipeException
+from shared.models.exceptions.fetchExceptions import PageFetchException
+from shared.models.exceptions.scrapeExceptions import (
+    HostUnavailableException,
+    RecentScrapeFailureException,
+)
+from shared.models.requests.ScrapeRecipeBatchRequestBody import (
+    MAX_BATCH_SIZE,
+    ScrapeRecipeBatchRequestBody,
+)
+from shared.models.responses.HttpResponse import (
+    InternalServerErrorResponse,
+    MultiStatusResponse,
+    OkResponse,
+)
+from shared.models.responses.ScrapeBatchResult import (
+    ScrapeBatchItemResult,
+    ScrapeBatchResult,
+)
+from shared.openapi.tags import RecipesTag
+from shared.scraping.pipeline import (
+    describe_scrape_failure,
+    prepare_recipe,
+    start_ingredient_processing,
+)
+from shared.utils.buffered_metrics import (
+    BufferedMetric,
+    buffer_metrics,
+    emit_metrics,
+)
+from shared.utils.dump_response import dump_response
+from shared.utils.environment import validate_environment
+from shared.utils.http_pool import HttpConnectionPool
+from shared.utils.openapi import openapi_endpoint
+from shared.utils.verify_quota import refund_user_quota, verify_user_quota
+from .env import Environment
+
+log = Logger("scrape-recipe-batch")
+metrics = Metrics()
+
+# kept at module level so that warm containers reuse keep-alive connections
+httpPool = HttpConnectionPool()
+
+refundableExceptions = (RecentScrapeFailureException, HostUnavailableException)
+
+scrapeExceptions = (
+    *refundableExceptions,
+    UnableToParseRecipeException,
+    HTTPError,
+    PageFetchException,
+)
+
+
+def batch_cost(event: APIGatewayProxyEventV2Model) -> int:
+    try:
+        body = ScrapeRecipeBatchRequestBody.model_validate_json(
+            event.body if isinstance(event.body, str) else ""
+        )
+    except ValidationError:
+        # rejected later by the body validation
+        return 1
+
+    return min(len(body.urls), MAX_BATCH_SIZE)
+
+
+def is_charged(outcome: RecipeDbItem | Exception) -> bool:
+    # internal errors are refunded like the failures that never reached the page
+    if isinstance(outcome, refundableExceptions):
+        return False
+
+    return isinstance(outcome, (RecipeDbItem, *scrapeExceptions))
+
+
+@log.inject_lambda_context(log_event=True)
+@metrics.log_metrics
+@dump_response
+@verify_user_quota(log, cost=batch_cost)
+@openapi_endpoint(
+    log,
+    responses=[
+        OkResponse[ScrapeBatchResult],
+        MultiStatusResponse[ScrapeBatchResult],
+    ],
+    body=ScrapeRecipeBatchRequestBody,
+    summary="Starts the processing of multiple recipes at once, optionally with AI ingredient parsing",
+    description=f"Scrape up to {MAX_BATCH_SIZE} recipes concurrently. Each url costs one quota unit, and the results are reported per url",
+    operationId="scrapeRecipeBatch",
+    tags=[RecipesTag],
+)
+@validate_environment(model=Environment, log=log)
+def handler(
+    rawEvent: APIGatewayProxyEventV2Model,
+    _: LambdaContext,
+    *,
+    env: Environment,
+    jwtClaims: CognitoUserClaims,
+    quotaItems: list[QuotaItem],
+    body: ScrapeRecipeBatchRequestBody,
+    **kwargs,
+):
+    jobs = [
+        ScrapeRecipeJob(
+            url=url,
+            parseIngredients=body.parseIngredients,
+            defaultToLang=body.defaultToLang,
+            ownerId=jwtClaims.userId,
+        )
+        for url in body.urls
+    ]
+
+    def prepare(job: ScrapeRecipeJob) -> RecipeDbItem | Exception:
+        try:
+            return prepare_recipe(job, env, pool=httpPool, log=log)
+        except scrapeExceptions as e:
+            log.info(
+                "Unable to scrape a recipe from the batch",
+                extra={"url": job.url, "error": describe_scrape_failure(e)},
+            )
+            return e
+        except ClientError as e:
+            log.exception("Boto3 client exception occurred", extra={"url": job.url})
+            return e
+        except Exception as e:
+            # a single url must not fail the whole batch
+            log.exception("Unexpected exception while scraping", extra={"url": job.url})
+            return e
+
+    def prepare_in_worker(
+        job: ScrapeRecipeJob,
+    ) -> tuple[RecipeDbItem | Exception, list[BufferedMetric]]:
+        with buffer_metrics() as buffer:
+            return prepare(job), buffer
+
+    with ThreadPoolExecutor(max_workers=min(env.batchConcurrency, len(jobs))) as pool:
+        workerResults = list(pool.map(prepare_in_worker, jobs))
+
+    outcomes: list[RecipeDbItem | Exception] = []
+
+    # the buffered metrics are added on the main thread, the metric set is not thread safe
+    for outcome, buffer in workerResults:
+        outcomes.append(outcome)
+        emit_metrics(buffer)
+
+    items = [outcome for outcome in outcomes if isinstance(outcome, RecipeDbItem)]
+
+    try:
+        with boto3.resource("dynamodb").Table(
+            env.recipesTableName
+        ).batch_writer() as batch:
+            for item in items:
+                batch.put_item(Item=item.model_dump())
+
+        for item in items:
+            if not item.IsComplete:
+                start_ingredient_processing(env, item, body.defaultToLang)
+    except ClientError:
+        log.exception("Boto3 client exception occurred")
+        return InternalServerErrorResponse()
+
+    refund_user_quota(
+        [
+            quotaItem
+            for quotaItem, outcome in zip(quotaItems, outcomes)
+            if not is_charged(outcome)
+        ],
+        log,
+    )
+
+    results = ScrapeBatchResult(
+        results=[
+            ScrapeBatchItemResult(url=job.url, recipeId=outcome.RecipeId)
+            if isinstance(outcome, RecipeDbItem)
+            else ScrapeBatchItemResult(
+                url=job.url,
+                error=describe_scrape_failure(outcome)
+                if isinstance(outcome, scrapeExceptions)
+                else "Internal server error",
+            )
+            for job, outcome in zip(jobs, outcomes)
+        ]
+    )
+
+    if len(items) < len(jobs):
+        return MultiStatusResponse(body=results)
+
+    return OkResponse(body=results)
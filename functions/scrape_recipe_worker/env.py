@@ -0,0 +1,5 @@
+from shared.models.environment.ScrapeEnvironment import ScrapeEnvironment
+
+
+class Environment(ScrapeEnvironment):
+    pass
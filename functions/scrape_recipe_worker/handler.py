@@ -0,0 +1,100 @@
+from datetime import datetime
+from time import monotonic
+from urllib.error import HTTPError
+from aws_lambda_powertools import Logger, Metrics
+from aws_lambda_powertools.utilities.typing import LambdaContext
+from aws_lambda_powertools.utilities.parser import event_parser
+from aws_lambda_powertools.utilities.parser.models.sqs import SqsModel
+import boto3
+import botocore.exceptions
+from pydantic import ValidationError
+from shared.models.DTO.ScrapeRecipeJob import ScrapeRecipeJob
+from shared.models.RecipeScrapeStatus import RecipeScrapeStatus
+from shared.models.database.RecipeDbItem import PendingRecipeDbItem
+from shared.models.exceptions.apiExceptions import UnableToParseRecipeException
+from shared.models.exceptions.fetchExceptions import PageFetchException
+from shared.models.exceptions.scrapeExceptions import (
+    HostUnavailableException,
+    RecentScrapeFailureException,
+)
+from shared.scraping.pipeline import describe_scrape_failure, run_scrape
+from shared.utils.environment import validate_environment
+from shared.utils.http_pool import HttpConnectionPool
+from shared.utils.verify_quota import refund_user_quota
+from .env import Environment
+
+log = Logger("scrape-recipe-worker")
+metrics = Metrics()
+
+# kept at module level so that warm containers reuse keep-alive connections
+httpPool = HttpConnectionPool()
+
+
+def mark_failed(env: Environment, job: ScrapeRecipeJob, reason: str):
+    assert job.recipeId is not None
+
+    boto3.resource("dynamodb").Table(env.recipesTableName).put_item(
+        Item=PendingRecipeDbItem(
+            RecipeId=job.recipeId,
+            NotificationEndpointARN=None,
+            OwnerId=job.ownerId,
+            ExpiresAt=datetime.now() + env.recipeTTL,
+            ScrapeStatus=RecipeScrapeStatus.failed,
+            FailureReason=reason,
+        ).model_dump(),
+        ReturnValues="NONE",
+    )
+
+
+@log.inject_lambda_context(log_event=True)
+@metrics.log_metrics
+@event_parser(
+    model=SqsModel,
+)
+@validate_environment(model=Environment, log=log)
+def handler(
+    event: SqsModel,
+    context: LambdaContext,
+    *,
+    env: Environment,
+):
+    batchItemFailures: list[dict[str, str]] = []
+    deadline = monotonic() + context.get_remaining_time_in_millis() / 1000
+
+    for record in event.Records:
+        try:
+            job = ScrapeRecipeJob.model_validate_json(record.body)  # pyright: ignore[reportArgumentType]
+        except ValidationError:
+            log.exception("Invalid message body")
+            continue
+
+        try:
+            try:
+                recipeId = run_scrape(
+                    job, env, pool=httpPool, log=log, deadline=deadline
+                )
+                log.info("Scraped the recipe", extra={"recipeId": recipeId})
+            except (RecentScrapeFailureException, HostUnavailableException) as e:
+                # nothing was fetched, so the request is not charged, like in the sync mode
+                log.info(
+                    "Unable to scrape the recipe",
+                    extra={"url": job.url, "error": describe_scrape_failure(e)},
+                )
+                mark_failed(env, job, describe_scrape_failure(e))
+                refund_user_quota(job.quotaItems, log)
+            except (
+                UnableToParseRecipeException,
+                HTTPError,
+                PageFetchException,
+            ) as e:
+                log.exception("Unable to scrape the recipe", extra={"url": job.url})
+                mark_failed(env, job, describe_scrape_failure(e))
+        except botocore.exceptions.ClientError:
+            log.exception("Boto3 client exception occurred")
+            batchItemFailures.append({"itemIdentifier": record.messageId})
+        except Exception:
+            # only this message is retried, the rest of the batch is done
+            log.exception("Unexpected exception while scraping the recipe")
+            batchItemFailures.append({"itemIdentifier": record.messageId})
+
+    return {"batchItemFailures": batchItemFailures}
@@ -1,5 +1,6 @@
 from pydantic import Field
 from shared.models.environment.MessagesConfig import MessagesConfig
+from shared.models.environment.ScrapeLeaseConfig import ScrapeLeaseConfig
 from shared.models.environment.settings import BaseEnvironment
 
 
@@ -8,3 +9,4 @@ class Environment(BaseEnvironment):
     failedProcessingNotification: MessagesConfig = Field(
         validation_alias="FAIL_NOTIFICATION"
     )
+    scrapeLease: ScrapeLeaseConfig | None = Field(None, validation_alias="SCRAPE_LEASE")
@@ -1,4 +1,4 @@
-from aws_lambda_powertools import Logger
+from aws_lambda_powertools import Logger, Metrics
 from aws_lambda_powertools.utilities.typing import LambdaContext
 from aws_lambda_powertools.utilities.parser import event_parser
 import boto3
@@ -6,32 +6,28 @@ import botocore
 import botocore.exceptions
 from pydantic import ValidationError
 from shared.models.DTO.ProcessIngredientsInput import (
+    IngredientBatchToProcessDTO,
     IngredientToProcessDTO,
-    IngredientToProcessWithLangInfoDTO,
 )
 from shared.models.DTO.ProcessedIngredient import ProcessedIngredientCollection
-from shared.models.database.RecipeDbItem import RecipeDbItemProjection
+from shared.models.database.RecipeDbItem import RecipeDbItem, RecipeDbItemProjection
 from shared.models.lambda_events.FailHandlerEvent import (
     FailHandlerEventTypeAdapter,
     FailHandlerEvent,
 )
-from shared.models.notifications.GCMNotification import (
-    GCMNotification,
-    Notification,
-    NotificationContent,
-)
-from shared.models.notifications.RecipeReadyNotificationData import (
-    RecipeReadyNotificationData,
-)
+from shared.scraping.single_flight import complete_scrape_waiters
 from shared.utils.dump_response import dump_response
 from shared.utils.environment import validate_environment
 from shared.utils.messages import PushNotificationContent, get_messages
+from shared.utils.notifications import send_recipe_notification
 from .env import Environment
 
 log = Logger("send_failed_notification")
+metrics = Metrics()
 
 
 @log.inject_lambda_context(log_event=True)
+@metrics.log_metrics
 @event_parser(
     model=FailHandlerEventTypeAdapter,
 )
@@ -50,12 +46,16 @@ def handler(
     try:
         match event:
             case [
-                ProcessedIngredientCollection(
-                    originalIngredient=IngredientToProcessDTO(recipeId=myRecipeId)
-                )
+                [
+                    ProcessedIngredientCollection(
+                        originalIngredient=IngredientToProcessDTO(recipeId=myRecipeId)
+                    ),
+                    *_,
+                ],
+                *_,
             ]:
                 recipeId = myRecipeId
-            case [IngredientToProcessWithLangInfoDTO(recipeId=myRecipeId)]:
+            case [IngredientBatchToProcessDTO(recipeId=myRecipeId), *_]:
                 recipeId = myRecipeId
             case _:
                 log.error("Unknown event type")
@@ -72,23 +72,28 @@ def handler(
         recipeItem = RecipeDbItemProjection.from_dynamo(rawRecipeItem.get("Item", {}))
 
         if recipeItem.NotificationEndpointARN is not None:
-            snsClient = boto3.client("sns")
+            send_recipe_notification(
+                recipeItem.NotificationEndpointARN, message, recipeId
+            )
 
-            snsClient.publish(
-                MessageStructure="json",
-                Message=GCMNotification(
-                    GCM=Notification(
-                        notification=NotificationContent(
-                            body=message.body, title=message.title
-                        ),
-                        data=RecipeReadyNotificationData(recipeId=recipeId),
-                    )
-                ).model_dump_json(),
-                TargetArn=recipeItem.NotificationEndpointARN,
+        try:
+            # a failed refresh is dropped, the previous content stays complete and served
+            recipesTable.update_item(
+                Key={RecipeDbItemProjection.get_primary_key_name(): recipeId},
+                UpdateExpression="REMOVE PendingRefresh",
+                ConditionExpression="attribute_exists(PendingRefresh)",
+                ReturnValues="NONE",
             )
-            snsClient.delete_endpoint(EndpointArn=recipeItem.NotificationEndpointARN)
+            log.warning("Dropped the recipe refresh", extra={"recipeId": recipeId})
+            return
+        except botocore.exceptions.ClientError as e:
+            if (
+                e.response.get("Error", {}).get("Code")
+                != "ConditionalCheckFailedException"
+            ):
+                raise
 
-        recipesTable.update_item(
+        updatedItem = recipesTable.update_item(
             Key={RecipeDbItemProjection.get_primary_key_name(): recipeId},
             UpdateExpression="SET IsComplete = :isComplete, HasParsingSucceeded = :hasSucceeded, NotificationEndpointARN = :endpointArn",
             ExpressionAttributeValues={
@@ -96,8 +101,17 @@ def handler(
                 ":hasSucceeded": False,
                 ":endpointArn": None,
             },
-            ReturnValues="NONE",
-        )
+            ReturnValues="ALL_NEW",
+        )["Attributes"]
+
+        if env.scrapeLease is not None and updatedItem.get("LeaseKey") is not None:
+            complete_scrape_waiters(
+                env.scrapeLease,
+                env.recipesTableName,
+                RecipeDbItem.from_dynamo(updatedItem),
+                message,
+                log,
+            )
     except botocore.exceptions.ClientError:
         log.exception("Error when calling some aws service")
     except ValidationError:
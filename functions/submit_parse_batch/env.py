@@ -0,0 +1,26 @@
+from pydantic import Field
+from shared.models.environment.AiConfigWithModel import AiConfigWithModel
+from shared.models.environment.BatchParsingConfig import BatchParsingConfig
+from shared.models.environment.ParseCacheConfig import ParseCacheConfig
+from shared.models.environment.PromptIdByLanguage import PromptIdByLanguage
+from shared.models.environment.settings import BaseEnvironment
+
+
+class Environment(BaseEnvironment):
+    ai: AiConfigWithModel = Field(validation_alias="AI")
+    promptId: PromptIdByLanguage = Field(validation_alias="PROMPT_ID")
+    dynamoResponsesTableName: str = Field(
+        validation_alias="DYNAMO_RESPONSES_TABLE_NAME"
+    )
+    parseCache: ParseCacheConfig = Field(validation_alias="PARSE_CACHE")
+    # values above 1 send every line to the AI
+    localParseMinConfidence: float = Field(
+        0.9, ge=0, validation_alias="LOCAL_PARSE_MIN_CONFIDENCE"
+    )
+    batchParsing: BatchParsingConfig = Field(validation_alias="BATCH_PARSING")
+    processIngredientStepFnArn: str = Field(
+        validation_alias="PROCESS_INGREDIENTS_STEP_FN_ARN"
+    )
+    assembleRecipeFunctionName: str = Field(
+        validation_alias="ASSEMBLE_RECIPE_FUNCTION_NAME"
+    )
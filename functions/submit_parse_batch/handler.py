@@ -0,0 +1,277 @@
+from dataclasses import dataclass
+from datetime import datetime
+import itertools
+from typing import TYPE_CHECKING
+from uuid import uuid4
+from aws_lambda_powertools import Logger, Metrics
+from aws_lambda_powertools.metrics import MetricUnit
+from aws_lambda_powertools.utilities.typing import LambdaContext
+import boto3
+from botocore.exceptions import ClientError
+from openai import OpenAI, OpenAIError
+from pydantic import ValidationError
+from shared.models.DTO.ProcessIngredientsInput import (
+    ProcessIngredientsInputTypeAdapter,
+)
+from shared.models.database.ParseBatchJobItem import ParseBatchJobItem
+from shared.models.database.StoredResponse import StoredParseRequest
+from shared.utils.batch_parsing import (
+    BATCH_ENDPOINT,
+    batch_request_line,
+    complete_parse_requests,
+    delete_parse_requests,
+)
+from shared.utils.environment import validate_environment
+from shared.utils.ingredient_parsing import (
+    batch_lang,
+    parse_request_body,
+    resolve_cached_lines,
+)
+from .env import Environment
+
+if TYPE_CHECKING:
+    from mypy_boto3_sqs.type_defs import MessageTypeDef
+
+log = Logger("submit-parse-batch")
+metrics = Metrics()
+
+SQS_RECEIVE_LIMIT = 10
+
+
+@dataclass
+class QueuedRecipe:
+    receiptHandle: str
+    requests: list[StoredParseRequest]
+    requestLines: list[str]
+
+
+def receive_messages(env: Environment) -> list["MessageTypeDef"]:
+    sqs = boto3.client("sqs")
+    messages: list["MessageTypeDef"] = []
+
+    # every recipe is at least one request, the exact count is known only after the cache lookup
+    while len(messages) < env.batchParsing.maxRequests:
+        received = sqs.receive_message(
+            QueueUrl=env.batchParsing.queueUrl,
+            MaxNumberOfMessages=SQS_RECEIVE_LIMIT,
+            WaitTimeSeconds=0,
+        ).get("Messages", [])
+
+        if len(received) == 0:
+            break
+
+        messages += received
+
+    return messages
+
+
+def prepare_recipe(
+    message: "MessageTypeDef", env: Environment, expiresAt: datetime
+) -> QueuedRecipe:
+    # the request ids come from the message id, so that a redelivered message is recognized
+    messageId = message.get("MessageId") or str(uuid4())
+
+    try:
+        batches = ProcessIngredientsInputTypeAdapter.validate_json(
+            message.get("Body", "")
+        )
+    except ValidationError:
+        log.exception("Invalid message body")
+        batches = []
+
+    requests: list[StoredParseRequest] = []
+    requestLines: list[str] = []
+
+    for index, batch in enumerate(batches):
+        lang = batch_lang(batch)
+        promptId = env.promptId.for_lang(lang)
+
+        cachedLines = resolve_cached_lines(
+            batch,
+            lang,
+            promptId,
+            env.ai.model,
+            env.parseCache,
+            env.localParseMinConfidence,
+            log,
+        )
+
+        request = StoredParseRequest(
+            ResponseId=f"batchreq_{messageId}_{index}",
+            ExpiresAt=expiresAt,
+            OriginalBatchInput=batch,
+            RetryCount=batch.retryCount,
+            ParseCacheKeys=cachedLines.pendingCacheKeys,
+            CachedResults=cachedLines.cachedResults,
+        )
+        requests.append(request)
+
+        if len(cachedLines.pendingIngredients) > 0:
+            requestLines.append(
+                batch_request_line(
+                    request.ResponseId,
+                    parse_request_body(
+                        cachedLines.pendingIngredients, lang, promptId, env.ai.model
+                    ),
+                )
+            )
+
+    return QueuedRecipe(
+        receiptHandle=message.get("ReceiptHandle", ""),
+        requests=requests,
+        requestLines=requestLines,
+    )
+
+
+def delete_messages(env: Environment, recipes: list[QueuedRecipe]):
+    sqs = boto3.client("sqs")
+
+    for chunk in itertools.batched(recipes, SQS_RECEIVE_LIMIT):
+        sqs.delete_message_batch(
+            QueueUrl=env.batchParsing.queueUrl,
+            Entries=[
+                {"Id": str(index), "ReceiptHandle": recipe.receiptHandle}
+                for index, recipe in enumerate(chunk)
+            ],
+        )
+
+
+def submitted_request_ids(env: Environment) -> set[str]:
+    jobsTable = boto3.resource("dynamodb").Table(env.batchParsing.jobsTableName)
+    requestIds: set[str] = set()
+    scanArgs = {}
+
+    while True:
+        page = jobsTable.scan(**scanArgs)
+
+        for rawItem in page.get("Items", []):
+            requestIds.update(ParseBatchJobItem.from_dynamo(rawItem).RequestIds)
+
+        if "LastEvaluatedKey" not in page:
+            return requestIds
+
+        scanArgs["ExclusiveStartKey"] = page["LastEvaluatedKey"]
+
+
+def submit_batch(env: Environment, recipes: list[QueuedRecipe], expiresAt: datetime):
+    dynamo = boto3.resource("dynamodb")
+    requests = [request for recipe in recipes for request in recipe.requests]
+
+    # stored before the submission, so that a finished batch always finds them
+    with dynamo.Table(env.dynamoResponsesTableName).batch_writer() as writer:
+        for request in requests:
+            writer.put_item(Item=request.model_dump())
+
+    client = OpenAI(api_key=env.ai.api_key, base_url=env.ai.base_url)
+
+    try:
+        inputFile = client.files.create(
+            file=(
+                "ingredients.jsonl",
+                "\n".join(
+                    itertools.chain.from_iterable(
+                        recipe.requestLines for recipe in recipes
+                    )
+                ).encode("utf-8"),
+                "application/jsonl",
+            ),
+            purpose="batch",
+        )
+        batch = client.batches.create(
+            input_file_id=inputFile.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h",
+        )
+    except OpenAIError:
+        # the messages stay in the queue and are submitted again by the next run
+        delete_parse_requests(env.dynamoResponsesTableName, requests)
+        raise
+
+    try:
+        dynamo.Table(env.batchParsing.jobsTableName).put_item(
+            Item=ParseBatchJobItem(
+                BatchId=batch.id,
+                RequestIds=[request.ResponseId for request in requests],
+                ExpiresAt=expiresAt,
+            ).model_dump(),
+            ReturnValues="NONE",
+        )
+    except ClientError:
+        # nothing would read the output of a batch without its job
+        delete_parse_requests(env.dynamoResponsesTableName, requests)
+        client.batches.cancel(batch.id)
+        raise
+
+    requestCount = sum(len(recipe.requestLines) for recipe in recipes)
+
+    log.info(
+        "Submitted the ingredient parsing batch",
+        extra={
+            "batchId": batch.id,
+            "recipes": len(recipes),
+            "requests": requestCount,
+        },
+    )
+    metrics.add_metric(
+        name="IngredientParseBatchRequests",
+        unit=MetricUnit.Count,
+        value=requestCount,
+    )
+
+
+@log.inject_lambda_context(log_event=True)
+@metrics.log_metrics
+@validate_environment(model=Environment, log=log)
+def handler(event: dict, context: LambdaContext, *, env: Environment):
+    expiresAt = datetime.now() + env.batchParsing.ttl
+
+    try:
+        recipes = [
+            prepare_recipe(message, env, expiresAt) for message in receive_messages(env)
+        ]
+
+        if len(recipes) == 0:
+            log.info("No recipes waiting for the batch parsing")
+            return
+
+        # recipes served entirely from the parse cache do not wait for the batch
+        complete_parse_requests(
+            [
+                request
+                for recipe in recipes
+                if len(recipe.requestLines) == 0
+                for request in recipe.requests
+            ],
+            {},
+            parseCache=env.parseCache,
+            assembleRecipeFunctionName=env.assembleRecipeFunctionName,
+            processIngredientStepFnArn=env.processIngredientStepFnArn,
+            log=log,
+        )
+
+        batchedRecipes = [recipe for recipe in recipes if len(recipe.requestLines) > 0]
+
+        if len(batchedRecipes) > 0:
+            submittedIds = submitted_request_ids(env)
+            newRecipes = [
+                recipe
+                for recipe in batchedRecipes
+                if recipe.requests[0].ResponseId not in submittedIds
+            ]
+
+            if len(newRecipes) < len(batchedRecipes):
+                log.warning(
+                    "Skipping the recipes already submitted in a batch",
+                    extra={"recipes": len(batchedRecipes) - len(newRecipes)},
+                )
+
+            if len(newRecipes) > 0:
+                submit_batch(env, newRecipes, expiresAt)
+
+        delete_messages(env, recipes)
+    except ClientError:
+        log.exception("Boto3 client exception occurred")
+        raise
+    except OpenAIError:
+        log.exception("OpenAI exception occurred")
+        raise
@@ -1,11 +1,14 @@
 from pydantic import BaseModel, computed_field
-from shared.models.DTO.ProcessIngredientsInput import IngredientToProcessWithLangInfoDTO
+from shared.models.DTO.ProcessIngredientsInput import IngredientBatchToProcessDTO
 from shared.models.DTO.WebhokOutput import AWSError
 
 
 class ParseIngredientInput(BaseModel):
     taskToken: str
-    ingredient: IngredientToProcessWithLangInfoDTO
+    batch: IngredientBatchToProcessDTO
+    # set when the parse scheduler resumes a queued batch, its slot is already taken
+    admitted: bool = False
+    schedulerSlotId: str | None = None
 
 
 class AWSErrorWithResponseId(AWSError):
@@ -15,5 +18,5 @@ class AWSErrorWithResponseId(AWSError):
         return self.cause
 
 
-class ParseIngredientInputWithError(IngredientToProcessWithLangInfoDTO):
+class ParseIngredientInputWithError(IngredientBatchToProcessDTO):
     error: AWSErrorWithResponseId
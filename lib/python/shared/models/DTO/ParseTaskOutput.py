@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from shared.models.DTO.ProcessIngredientsInput import IngredientBatchToProcessDTO
+from shared.models.DTO.ProcessedIngredient import ProcessedIngredientCollectionList
+
+
+class ParseTaskResults(BaseModel):
+    results: ProcessedIngredientCollectionList
+
+
+class ParseTaskRetry(BaseModel):
+    # parsed again from the start, the lines parsed so far come from the parse cache
+    retryBatch: IngredientBatchToProcessDTO
@@ -7,17 +7,25 @@ class IngredientToProcessDTO(BaseModel):
     recipeId: str
     ingredientId: str
     content: str
+    duplicateIngredientIds: list[str] = []
 
+    @property
+    def targetIngredientIds(self) -> list[str]:
+        return [self.ingredientId, *self.duplicateIngredientIds]
 
-class IngredientToProcessWithLangInfoDTO(IngredientToProcessDTO):
+
+class IngredientBatchToProcessDTO(BaseModel):
+    recipeId: str
+    ingredients: list[IngredientToProcessDTO]
     lang: str | None
     defaultLang: SupportedLanguage
     recipeExpiresAt: SerializableDatetime
     retryCount: int = 0
+    ownerId: str | None = None
+    # lines that do not fit in a request input, they are left unparsed instead of sent to the AI
+    tooLongIngredientIds: list[str] = []
 
 
-ProcessIngredientsInput = list[IngredientToProcessWithLangInfoDTO]
+ProcessIngredientsInput = list[IngredientBatchToProcessDTO]
 
-ProcessIngredientsInputTypeAdapter = TypeAdapter(
-    list[IngredientToProcessWithLangInfoDTO]
-)
+ProcessIngredientsInputTypeAdapter = TypeAdapter(list[IngredientBatchToProcessDTO])
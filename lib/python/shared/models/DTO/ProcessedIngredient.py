@@ -14,4 +14,5 @@ ProcessedIngredientCollectionList = list[ProcessedIngredientCollection]
 
 
 class ProcessIngredientsMapResult(BaseModel):
-    results: ProcessedIngredientCollectionList
+    # one list per parsed batch of lines
+    results: list[ProcessedIngredientCollectionList]
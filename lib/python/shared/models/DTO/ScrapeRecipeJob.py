@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from shared.models.database.QuotaItem import QuotaItem
+from shared.models.SupportedLanguage import SupportedLanguage
+
+
+class ScrapeRecipeJob(BaseModel):
+    url: str
+    parseIngredients: bool
+    defaultToLang: SupportedLanguage
+    ownerId: str
+    notificationToken: str | None = None
+    recipeId: str | None = None
+    # charged by the api, so the worker can refund them
+    quotaItems: list[QuotaItem] = []
@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class ExtractionStrategy(str, Enum):
+    jsonLd = "jsonLd"
+    native = "native"
+    wildMode = "wildMode"
@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class IdempotencyStatus(str, Enum):
+    inProgress = "inProgress"
+    completed = "completed"
@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class RecipeScrapeStatus(str, Enum):
+    pending = "pending"
+    failed = "failed"
@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class ScrapeFailureClass(str, Enum):
+    unableToParse = "unableToParse"
+    httpError = "httpError"
+    pageTooLarge = "pageTooLarge"
@@ -1,8 +1,15 @@
+from functools import cache
+from typing import Any
 from pydantic import BaseModel, Field
 from shared.models.SupportedLanguage import SupportedLanguage
 
 schema_name: dict[SupportedLanguage, str] = {"pl": "Skladniki", "en": "Ingredients"}
 
+batch_schema_name: dict[SupportedLanguage, str] = {
+    "pl": "SkladnikiPrzepisu",
+    "en": "RecipeIngredients",
+}
+
 field_descriptions: dict[SupportedLanguage, dict[str, str]] = {
     "en": {
         "name": "Name of the ingredient being processed",
@@ -10,6 +17,8 @@ field_descriptions: dict[SupportedLanguage, dict[str, str]] = {
         "unit": "The unit that the ingredient quantity is specified in, if present, otherwise null.",
         "preparationNotes": "Additional info about the ingredient if given; null if none given.",
         "ingredients": "List of all the ingredients present in the parsed text. If there is only one ingredient, the list will include only one element.",
+        "lineId": "The id of the input line that these ingredients were parsed from, copied exactly",
+        "lines": "The parsed ingredients of every input line. The input is a JSON object mapping line ids to ingredient texts, each line is parsed on its own and has exactly one entry here.",
     },
     "pl": {
         "name": "Nazwa przetwarzanego składnika kulinarnego w mianowniku i niezmienionej liczbie gramatycznej.",
@@ -17,6 +26,8 @@ field_descriptions: dict[SupportedLanguage, dict[str, str]] = {
         "unit": "Jednostka ilościowa, jeśli wyrażona. Null, jeżeli nie podano.",
         "preparationNotes": "Dodatkowe informacje o składniku, jeżeli podane. Null jeżeli brak dodatkowych informacji.",
         "ingredients": "Lista wszystkich składników obecnych w przetwarzanym tekście. Jeżeli obecny jest tylko jeden składnik, lista będzie miała jeden element",
+        "lineId": "Identyfikator linii wejściowej, z której pochodzą te składniki, przepisany dokładnie",
+        "lines": "Przetworzone składniki każdej linii wejściowej. Wejście to obiekt JSON mapujący identyfikatory linii na teksty składników, każda linia jest przetwarzana osobno i ma tutaj dokładnie jeden wpis.",
     },
 }
 
@@ -36,7 +47,9 @@ ingredient_field_examples: dict[SupportedLanguage, dict[str, list[str]]] = {
 }
 
 
-def create_chat_models(lang: SupportedLanguage):
+# the models are built once per process, pydantic class creation and schema generation are slow
+@cache
+def _chat_models(lang: SupportedLanguage):
     class Ingredient(BaseModel):
         name: str = Field(
             description=field_descriptions[lang]["name"],
@@ -60,4 +73,34 @@ def create_chat_models(lang: SupportedLanguage):
             description=field_descriptions[lang]["ingredients"]
         )
 
+    class IngredientLine(BaseModel):
+        lineId: str = Field(description=field_descriptions[lang]["lineId"])
+        ingredients: list[Ingredient] = Field(
+            description=field_descriptions[lang]["ingredients"]
+        )
+
+    class IngredientLines(BaseModel):
+        lines: list[IngredientLine] = Field(
+            description=field_descriptions[lang]["lines"]
+        )
+
+    return Ingredient, Ingredients, IngredientLine, IngredientLines
+
+
+def create_chat_models(lang: SupportedLanguage):
+    Ingredient, Ingredients, _, _ = _chat_models(lang)
+
     return Ingredient, Ingredients
+
+
+def create_batch_chat_models(lang: SupportedLanguage):
+    _, _, IngredientLine, IngredientLines = _chat_models(lang)
+
+    return IngredientLine, IngredientLines
+
+
+@cache
+def batch_response_schema(lang: SupportedLanguage) -> dict[str, Any]:
+    _, IngredientLines = create_batch_chat_models(lang)
+
+    return IngredientLines.model_json_schema()
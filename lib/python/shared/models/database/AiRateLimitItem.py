@@ -0,0 +1,13 @@
+from typing import Annotated
+from shared.utils.dynamodb import DynamodbModel, PrimaryKey
+
+
+class AiRateLimitItem(DynamodbModel):
+    LimiterKey: Annotated[str, PrimaryKey(key_type="hash")]
+    Rate: float
+    Tokens: float
+    RefilledAt: float
+    Version: int
+    LastDecreaseAt: float = 0
+    Throttles: int = 0
+    Rejections: int = 0
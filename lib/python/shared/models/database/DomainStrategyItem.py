@@ -0,0 +1,14 @@
+from typing import Annotated
+from shared.models.ExtractionStrategy import ExtractionStrategy
+from shared.models.database.SerializableDatetime import SerializableDatetime
+from shared.utils.dynamodb import DynamodbModel, PrimaryKey, TTLField
+
+
+class DomainStrategyItem(DynamodbModel):
+    Host: Annotated[str, PrimaryKey(key_type="hash")]
+    Strategy: ExtractionStrategy
+    SuccessCount: int = 0
+    FailureCount: int = 0
+    AverageLatencyMs: int = 0
+    LearnedAt: SerializableDatetime
+    ExpiresAt: TTLField
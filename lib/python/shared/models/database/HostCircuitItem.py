@@ -0,0 +1,10 @@
+from typing import Annotated
+from shared.utils.dynamodb import DynamodbModel, EpochDatetime, PrimaryKey, TTLField
+
+
+class HostCircuitItem(DynamodbModel):
+    FailureKey: Annotated[str, PrimaryKey(key_type="hash")]
+    ConsecutiveFailures: int = 0
+    OpenedUntil: EpochDatetime | None = None
+    ProbeUntil: EpochDatetime | None = None
+    ExpiresAt: TTLField
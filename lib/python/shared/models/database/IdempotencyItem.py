@@ -0,0 +1,12 @@
+from typing import Annotated
+from shared.models.IdempotencyStatus import IdempotencyStatus
+from shared.utils.dynamodb import DynamodbModel, EpochDatetime, PrimaryKey, TTLField
+
+
+class IdempotencyItem(DynamodbModel):
+    IdempotencyKey: Annotated[str, PrimaryKey(key_type="hash")]
+    RequestHash: str
+    Status: IdempotencyStatus
+    InProgressUntil: EpochDatetime
+    Response: str | None = None
+    ExpiresAt: TTLField
@@ -0,0 +1,8 @@
+from typing import Annotated
+from shared.utils.dynamodb import DynamodbModel, PrimaryKey, TTLField
+
+
+class ParseBatchJobItem(DynamodbModel):
+    BatchId: Annotated[str, PrimaryKey(key_type="hash")]
+    RequestIds: list[str]
+    ExpiresAt: TTLField
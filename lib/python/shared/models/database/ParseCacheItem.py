@@ -0,0 +1,9 @@
+from typing import Annotated
+from shared.utils.dynamodb import DynamodbModel, PrimaryKey, TTLField
+
+
+class ParseCacheItem(DynamodbModel):
+    CacheKey: Annotated[str, PrimaryKey(key_type="hash")]
+    Output: str
+    Tokens: int
+    ExpiresAt: TTLField
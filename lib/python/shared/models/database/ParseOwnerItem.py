@@ -0,0 +1,11 @@
+from typing import Annotated
+from shared.utils.dynamodb import DynamodbModel, PrimaryKey
+
+
+class ParseOwnerItem(DynamodbModel):
+    OwnerId: Annotated[str, PrimaryKey(key_type="hash")]
+    InFlight: int = 0
+    Queued: int = 0
+    # virtual time of the owner in the weighted round robin, advanced by every dispatch
+    Pass: int = 0
+    Weight: float | None = None
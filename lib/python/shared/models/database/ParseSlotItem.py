@@ -0,0 +1,10 @@
+from typing import Annotated
+from shared.utils.dynamodb import DynamodbModel, PrimaryKey
+
+
+class ParseSlotItem(DynamodbModel):
+    SlotId: Annotated[str, PrimaryKey(key_type="hash")]
+    OwnerId: str
+    LeaseIndexKey: str
+    # the slot is reclaimed once this passes without a release
+    LeaseUntilMs: int
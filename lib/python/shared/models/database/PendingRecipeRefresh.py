@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from shared.models.database.ScrapedRecipe import ScrapedRecipe
+from shared.utils.dynamodb import EpochDatetime
+
+
+class PendingRecipeRefresh(BaseModel):
+    Content: ScrapedRecipe
+    StartedAt: EpochDatetime
+    ArchiveKey: str | None = None
+    SourceUrl: str | None = None
+    SourceETag: str | None = None
+    SourceLastModified: str | None = None
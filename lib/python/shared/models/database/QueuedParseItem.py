@@ -0,0 +1,13 @@
+from typing import Annotated
+from shared.models.DTO.ProcessIngredientsInput import IngredientBatchToProcessDTO
+from shared.utils.dynamodb import DynamodbModel, PrimaryKey, TTLField
+
+
+class QueuedParseItem(DynamodbModel):
+    OwnerId: Annotated[str, PrimaryKey(key_type="hash")]
+    # ordered by the enqueue time
+    EntryId: Annotated[str, PrimaryKey(key_type="sort")]
+    TaskToken: str
+    Batch: IngredientBatchToProcessDTO
+    EnqueuedAtMs: int
+    ExpiresAt: TTLField
@@ -0,0 +1,9 @@
+from typing import Annotated
+from shared.models.database.ScrapedRecipe import ScrapedRecipe
+from shared.utils.dynamodb import DynamodbModel, PrimaryKey, TTLField
+
+
+class RecipeCacheItem(DynamodbModel):
+    CacheKey: Annotated[str, PrimaryKey(key_type="hash")]
+    Content: ScrapedRecipe
+    ExpiresAt: TTLField
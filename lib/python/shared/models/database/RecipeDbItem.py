@@ -1,4 +1,6 @@
 from typing import Annotated
+from shared.models.RecipeScrapeStatus import RecipeScrapeStatus
+from shared.models.database.PendingRecipeRefresh import PendingRecipeRefresh
 from shared.models.database.ScrapedRecipe import ScrapedRecipe
 from shared.utils.dynamodb import DynamodbModel, PrimaryKey, TTLField
 
@@ -14,3 +16,18 @@ class RecipeDbItem(RecipeDbItemProjection):
     HasParsingSucceeded: bool | None
     OwnerId: str
     ExpiresAt: TTLField
+    CacheKeys: list[str] = []
+    ArchiveKey: str | None = None
+    SourceUrl: str | None = None
+    SourceETag: str | None = None
+    SourceLastModified: str | None = None
+    LeaseKey: str | None = None
+    # refreshed content waiting for its ingredients to be parsed, Content is served until then
+    PendingRefresh: PendingRecipeRefresh | None = None
+
+
+class PendingRecipeDbItem(RecipeDbItemProjection):
+    OwnerId: str
+    ExpiresAt: TTLField
+    ScrapeStatus: RecipeScrapeStatus
+    FailureReason: str | None = None
@@ -0,0 +1,17 @@
+from typing import Annotated
+from pydantic import BaseModel
+from shared.utils.dynamodb import DynamodbModel, PrimaryKey, TTLField
+
+
+class ScrapeWaiter(BaseModel):
+    RecipeId: str
+    OwnerId: str
+    NotificationEndpointARN: str | None
+    ExpiresAt: TTLField
+
+
+class ScrapeLeaseItem(DynamodbModel):
+    LeaseKey: Annotated[str, PrimaryKey(key_type="hash")]
+    LeaderRecipeId: str
+    Waiters: list[ScrapeWaiter] = []
+    ExpiresAt: TTLField
@@ -1,5 +1,7 @@
 from typing import Dict
 from pydantic import BaseModel
+from shared.models.Ingredient import Ingredient
+from shared.models.IngredientGroup import IngredientGroup
 from shared.models.IngredientParseStatus import IngredientParseStatus
 from shared.models.Recipe import Recipe
 
@@ -11,3 +13,32 @@ class ScrapedRecipeBase(BaseModel):
 
 class ScrapedRecipe(ScrapedRecipeBase):
     ingredientStatuses: Dict[str, IngredientParseStatus]
+
+    def with_fresh_ids(self) -> "ScrapedRecipe":
+        newIngredientIds: dict[str, str] = {}
+        ingredientGroups: list[IngredientGroup] = []
+
+        for group in self.recipe.ingredientGroups:
+            ingredients: list[Ingredient] = []
+
+            for ingredient in group.ingredients:
+                ingredientCopy = Ingredient(**ingredient.model_dump(exclude={"id"}))
+                newIngredientIds[ingredient.id] = ingredientCopy.id
+                ingredients.append(ingredientCopy)
+
+            ingredientGroups.append(
+                IngredientGroup(name=group.name, ingredients=ingredients)
+            )
+
+        return ScrapedRecipe(
+            wildModeUsed=self.wildModeUsed,
+            recipe=Recipe(
+                **self.recipe.model_dump(exclude={"id", "ingredientGroups"}),
+                ingredientGroups=ingredientGroups,
+            ),
+            ingredientStatuses={
+                newIngredientIds[ingredientId]: status
+                for ingredientId, status in self.ingredientStatuses.items()
+                if ingredientId in newIngredientIds
+            },
+        )
@@ -1,16 +1,21 @@
 from typing import Annotated
-from shared.models.DTO.ProcessIngredientsInput import (
-    IngredientToProcessWithLangInfoDTO,
-)
+from shared.models.DTO.ProcessIngredientsInput import IngredientBatchToProcessDTO
+from shared.models.DTO.ProcessedIngredient import ProcessedIngredientCollectionList
 from shared.utils.dynamodb import DynamodbModel, PrimaryKey, TTLField
 
 
-class StoredResponseProjection(DynamodbModel):
+class StoredParseRequest(DynamodbModel):
     ResponseId: Annotated[str, PrimaryKey(key_type="hash")]
-    TaskToken: str
-
-
-class StoredResponse(StoredResponseProjection):
     ExpiresAt: TTLField
-    OriginalIngredientInput: IngredientToProcessWithLangInfoDTO
+    OriginalBatchInput: IngredientBatchToProcessDTO
     RetryCount: int
+    # ingredient id to parse cache key, for the lines sent to the AI
+    ParseCacheKeys: dict[str, str] = {}
+    CachedResults: ProcessedIngredientCollectionList = []
+
+
+class StoredResponse(StoredParseRequest):
+    TaskToken: str
+    # set when the response holds a slot of the owner in the parse scheduler
+    SchedulerOwnerId: str | None = None
+    SchedulerSlotId: str | None = None
@@ -0,0 +1,10 @@
+from typing import Annotated
+from shared.models.ScrapeFailureClass import ScrapeFailureClass
+from shared.utils.dynamodb import DynamodbModel, PrimaryKey, TTLField
+
+
+class UrlFailureItem(DynamodbModel):
+    FailureKey: Annotated[str, PrimaryKey(key_type="hash")]
+    FailureClass: ScrapeFailureClass
+    StatusCode: int | None = None
+    ExpiresAt: TTLField
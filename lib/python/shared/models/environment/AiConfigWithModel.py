@@ -0,0 +1,6 @@
+from pydantic import Field
+from shared.models.environment.AiConfig import AiConfig
+
+
+class AiConfigWithModel(AiConfig):
+    model: str = Field(validation_alias="MODEL_NAME")
@@ -0,0 +1,24 @@
+from datetime import timedelta
+from pydantic import BaseModel, Field
+from shared.utils.str_to_timedelta import SerializableTimedelta
+
+
+class AiRateLimitConfig(BaseModel):
+    tableName: str = Field(validation_alias="TABLE_NAME")
+    # requests per second, shared by every invocation calling the AI
+    initialRate: float = Field(5, validation_alias="INITIAL_RATE", gt=0)
+    minRate: float = Field(0.5, validation_alias="MIN_RATE", gt=0)
+    maxRate: float = Field(50, validation_alias="MAX_RATE", gt=0)
+    # the bucket holds at most this many seconds worth of requests
+    burst: SerializableTimedelta = Field(
+        timedelta(seconds=2), validation_alias="BURST"
+    )
+    increase: float = Field(0.1, validation_alias="INCREASE", gt=0)
+    decreaseFactor: float = Field(0.5, validation_alias="DECREASE_FACTOR", gt=0, lt=1)
+    # the 429s of requests sent before a decrease do not shrink the rate again
+    decreaseCooldown: SerializableTimedelta = Field(
+        timedelta(seconds=5), validation_alias="DECREASE_COOLDOWN"
+    )
+    maxWait: SerializableTimedelta = Field(
+        timedelta(seconds=10), validation_alias="MAX_WAIT"
+    )
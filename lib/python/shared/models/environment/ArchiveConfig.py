@@ -0,0 +1,9 @@
+from typing import Literal
+from pydantic import BaseModel, Field
+
+ArchiveCompression = Literal["gzip", "zstd"]
+
+
+class ArchiveConfig(BaseModel):
+    bucket: str = Field(validation_alias="BUCKET")
+    compression: ArchiveCompression = Field("gzip", validation_alias="COMPRESSION")
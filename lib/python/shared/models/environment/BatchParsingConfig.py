@@ -0,0 +1,12 @@
+from datetime import timedelta
+from pydantic import BaseModel, Field
+from shared.utils.str_to_timedelta import SerializableTimedelta
+
+
+class BatchParsingConfig(BaseModel):
+    queueUrl: str = Field(validation_alias="QUEUE_URL")
+    jobsTableName: str = Field(validation_alias="JOBS_TABLE_NAME")
+    # openai accepts up to 50 000 requests in a single batch
+    maxRequests: int = Field(1000, validation_alias="MAX_REQUESTS", ge=1, le=50000)
+    # the batch completion window is 24 hours, the rest is a margin for polling
+    ttl: SerializableTimedelta = Field(timedelta(days=2), validation_alias="TTL")
@@ -0,0 +1,23 @@
+from datetime import timedelta
+from pydantic import BaseModel, Field
+from shared.utils.str_to_timedelta import SerializableTimedelta
+
+
+class FetchConfig(BaseModel):
+    maxBytes: int = Field(5 * 1024 * 1024, validation_alias="MAX_BYTES", gt=0)
+    connectTimeout: SerializableTimedelta = Field(
+        timedelta(seconds=3), validation_alias="CONNECT_TIMEOUT"
+    )
+    readTimeout: SerializableTimedelta = Field(
+        timedelta(seconds=5), validation_alias="READ_TIMEOUT"
+    )
+    totalTimeout: SerializableTimedelta = Field(
+        timedelta(seconds=15), validation_alias="TOTAL_TIMEOUT"
+    )
+    maxRedirects: int = Field(5, validation_alias="MAX_REDIRECTS", ge=0)
+    maxConnectionsPerHost: int = Field(
+        4, validation_alias="MAX_CONNECTIONS_PER_HOST", gt=0
+    )
+    poolIdleTimeout: SerializableTimedelta = Field(
+        timedelta(seconds=30), validation_alias="POOL_IDLE_TIMEOUT"
+    )
@@ -0,0 +1,7 @@
+from pydantic import Field
+from shared.models.environment.IdempotencyConfig import IdempotencyConfig
+from shared.models.environment.settings import BaseEnvironment
+
+
+class IdempotencyBaseEnv(BaseEnvironment):
+    idempotency: IdempotencyConfig = Field(default=..., validation_alias="IDEMPOTENCY")
@@ -0,0 +1,17 @@
+from datetime import timedelta
+from pydantic import BaseModel, Field
+from shared.utils.str_to_timedelta import SerializableTimedelta
+
+
+class IdempotencyConfig(BaseModel):
+    tableName: str = Field(validation_alias="TABLE_NAME")
+    ttl: SerializableTimedelta = Field(timedelta(hours=24), validation_alias="TTL")
+    inProgressTimeout: SerializableTimedelta = Field(
+        timedelta(seconds=30), validation_alias="IN_PROGRESS_TIMEOUT"
+    )
+    waitTimeout: SerializableTimedelta = Field(
+        timedelta(seconds=10), validation_alias="WAIT_TIMEOUT"
+    )
+    pollInterval: SerializableTimedelta = Field(
+        timedelta(milliseconds=250), validation_alias="POLL_INTERVAL"
+    )
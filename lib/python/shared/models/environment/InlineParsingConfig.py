@@ -0,0 +1,32 @@
+from datetime import timedelta
+from pydantic import BaseModel, Field
+from shared.models.environment.AiConfigWithModel import AiConfigWithModel
+from shared.models.environment.AiRateLimitConfig import AiRateLimitConfig
+from shared.models.environment.MessagesConfig import MessagesConfig
+from shared.models.environment.ParseCacheConfig import ParseCacheConfig
+from shared.models.environment.PromptIdByLanguage import PromptIdByLanguage
+from shared.utils.str_to_timedelta import SerializableTimedelta
+
+
+class InlineParsingConfig(BaseModel):
+    ai: AiConfigWithModel = Field(validation_alias="AI")
+    promptId: PromptIdByLanguage = Field(validation_alias="PROMPT_ID")
+    parseCache: ParseCacheConfig = Field(validation_alias="PARSE_CACHE")
+    aiRateLimit: AiRateLimitConfig | None = Field(
+        None, validation_alias="AI_RATE_LIMIT"
+    )
+    # sent to the scrapes that joined the lease of a recipe completed inline
+    notification: MessagesConfig = Field(validation_alias="NOTIFICATION")
+    localParseMinConfidence: float = Field(
+        0.9, ge=0, validation_alias="LOCAL_PARSE_MIN_CONFIDENCE"
+    )
+    # recipes with more lines left for the AI go through the step function
+    maxLines: int = Field(12, validation_alias="MAX_LINES", ge=1)
+    concurrency: int = Field(6, validation_alias="CONCURRENCY", ge=1)
+    lineTimeout: SerializableTimedelta = Field(
+        timedelta(seconds=8), validation_alias="LINE_TIMEOUT"
+    )
+    # left for storing the recipe or starting the step function after the inline parsing
+    timeMargin: SerializableTimedelta = Field(
+        timedelta(seconds=5), validation_alias="TIME_MARGIN"
+    )
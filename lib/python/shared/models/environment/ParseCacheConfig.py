@@ -0,0 +1,8 @@
+from datetime import timedelta
+from pydantic import BaseModel, Field
+from shared.utils.str_to_timedelta import SerializableTimedelta
+
+
+class ParseCacheConfig(BaseModel):
+    tableName: str = Field(validation_alias="TABLE_NAME")
+    ttl: SerializableTimedelta = Field(timedelta(days=90), validation_alias="TTL")
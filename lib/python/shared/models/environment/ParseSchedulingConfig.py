@@ -0,0 +1,22 @@
+from datetime import timedelta
+from pydantic import BaseModel, Field
+from shared.utils.str_to_timedelta import SerializableTimedelta
+
+
+class ParseSchedulingConfig(BaseModel):
+    ownersTableName: str = Field(validation_alias="OWNERS_TABLE_NAME")
+    queueTableName: str = Field(validation_alias="QUEUE_TABLE_NAME")
+    slotsTableName: str = Field(validation_alias="SLOTS_TABLE_NAME")
+    # the queued batches are resumed by invoking this function asynchronously
+    startFunctionName: str = Field(validation_alias="START_FUNCTION_NAME")
+    maxInFlight: int = Field(30, validation_alias="MAX_IN_FLIGHT", ge=1)
+    ownerMaxInFlight: int = Field(4, validation_alias="OWNER_MAX_IN_FLIGHT", ge=1)
+    # owners without a weight of their own get this share of the dispatches
+    defaultWeight: float = Field(1, validation_alias="DEFAULT_WEIGHT", gt=0)
+    queueTtl: SerializableTimedelta = Field(
+        timedelta(days=1), validation_alias="QUEUE_TTL"
+    )
+    # a slot not released in time, when the webhook never comes or the start invocation dies, is reclaimed
+    slotLease: SerializableTimedelta = Field(
+        timedelta(hours=1), validation_alias="SLOT_LEASE"
+    )
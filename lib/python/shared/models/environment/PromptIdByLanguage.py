@@ -0,0 +1,10 @@
+from pydantic import BaseModel, Field
+from shared.models.SupportedLanguage import SupportedLanguage
+
+
+class PromptIdByLanguage(BaseModel):
+    pl: str = Field(validation_alias="PL")
+    en: str = Field(validation_alias="EN")
+
+    def for_lang(self, lang: SupportedLanguage) -> str:
+        return self.pl if lang == "pl" else self.en
@@ -0,0 +1,47 @@
+from datetime import timedelta
+from pydantic import Field
+from shared.models.environment.ArchiveConfig import ArchiveConfig
+from shared.models.environment.FetchConfig import FetchConfig
+from shared.models.environment.InlineParsingConfig import InlineParsingConfig
+from shared.models.environment.NotificationsConfig import NotificationsConfig
+from shared.models.environment.ScrapeFailuresConfig import ScrapeFailuresConfig
+from shared.models.environment.ScrapeLeaseConfig import ScrapeLeaseConfig
+from shared.models.environment.settings import BaseEnvironment
+from shared.utils.str_to_timedelta import SerializableTimedelta
+
+
+class ScrapeEnvironment(BaseEnvironment):
+    processIngredientStepFnArn: str = Field(
+        validation_alias="PROCESS_INGREDIENTS_STEP_FN_ARN"
+    )
+    recipesTableName: str = Field(validation_alias="RECIPES_TABLE_NAME")
+    recipeTTL: SerializableTimedelta = Field(validation_alias="RECIPE_TTL")
+    recipeCacheTableName: str = Field(validation_alias="RECIPE_CACHE_TABLE_NAME")
+    recipeCacheTTL: SerializableTimedelta = Field(validation_alias="RECIPE_CACHE_TTL")
+    platformApplicationARN: NotificationsConfig = Field(
+        validation_alias="SNS_PLARFORM_APPLICATION_ARN"
+    )
+    fetch: FetchConfig = Field(
+        default_factory=lambda: FetchConfig.model_validate({}),
+        validation_alias="FETCH",
+    )
+    domainStrategiesTableName: str = Field(
+        validation_alias="DOMAIN_STRATEGIES_TABLE_NAME"
+    )
+    domainStrategyTTL: SerializableTimedelta = Field(
+        timedelta(days=14), validation_alias="DOMAIN_STRATEGY_TTL"
+    )
+    scrapeFailures: ScrapeFailuresConfig = Field(validation_alias="SCRAPE_FAILURES")
+    archive: ArchiveConfig = Field(validation_alias="ARCHIVE")
+    # ingredient lines sent to the AI in a single request
+    parseBatchSize: int = Field(20, validation_alias="PARSE_BATCH_SIZE", ge=1)
+    # recipes nobody waits a notification for are parsed through the batch api when configured
+    batchParsingQueueUrl: str | None = Field(
+        None, validation_alias="BATCH_PARSING_QUEUE_URL"
+    )
+    # small recipes are parsed inside the scrape invocation when configured
+    inlineParsing: InlineParsingConfig | None = Field(
+        None, validation_alias="INLINE_PARSING"
+    )
+    # concurrent scrapes of the same url are only coalesced when configured
+    scrapeLease: ScrapeLeaseConfig | None = Field(None, validation_alias="SCRAPE_LEASE")
@@ -0,0 +1,20 @@
+from datetime import timedelta
+from pydantic import BaseModel, Field
+from shared.utils.str_to_timedelta import SerializableTimedelta
+
+
+class ScrapeFailuresConfig(BaseModel):
+    tableName: str = Field(validation_alias="TABLE_NAME")
+    negativeCacheTTL: SerializableTimedelta = Field(
+        timedelta(minutes=10), validation_alias="NEGATIVE_CACHE_TTL"
+    )
+    failureThreshold: int = Field(5, validation_alias="FAILURE_THRESHOLD", gt=0)
+    failureWindow: SerializableTimedelta = Field(
+        timedelta(minutes=5), validation_alias="FAILURE_WINDOW"
+    )
+    cooldown: SerializableTimedelta = Field(
+        timedelta(minutes=1), validation_alias="COOLDOWN"
+    )
+    probeTimeout: SerializableTimedelta = Field(
+        timedelta(seconds=30), validation_alias="PROBE_TIMEOUT"
+    )
@@ -16,3 +16,7 @@ class UnableToParseAIResponseException(IngredientParsingException):
 
 class UnexpectedAIBehaviorException(IngredientParsingException):
     pass
+
+
+class AiRateLimitedException(IngredientParsingException):
+    pass
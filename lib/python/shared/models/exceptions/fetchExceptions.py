@@ -0,0 +1,10 @@
+class PageFetchException(Exception):
+    pass
+
+
+class PageTooLargeException(PageFetchException):
+    pass
+
+
+class PageFetchTimeoutException(PageFetchException):
+    pass
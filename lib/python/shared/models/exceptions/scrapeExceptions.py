@@ -0,0 +1,15 @@
+from shared.models.ScrapeFailureClass import ScrapeFailureClass
+
+
+class RecentScrapeFailureException(Exception):
+    def __init__(self, failureClass: ScrapeFailureClass, statusCode: int | None):
+        super().__init__(failureClass, statusCode)
+        self.failureClass = failureClass
+        self.statusCode = statusCode
+
+
+class HostUnavailableException(Exception):
+    def __init__(self, host: str, retryAfter: int):
+        super().__init__(host, retryAfter)
+        self.host = host
+        self.retryAfter = retryAfter
@@ -1,2 +0,0 @@
-class FailedToParseAIOutput(Exception):
-    pass
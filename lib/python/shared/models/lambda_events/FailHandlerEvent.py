@@ -5,6 +5,6 @@ from shared.models.DTO.ProcessIngredientsInput import (
 from shared.models.DTO.ProcessedIngredient import ProcessedIngredientCollectionList
 
 
-FailHandlerEvent = ProcessedIngredientCollectionList | ProcessIngredientsInput
+FailHandlerEvent = list[ProcessedIngredientCollectionList] | ProcessIngredientsInput
 
 FailHandlerEventTypeAdapter = TypeAdapter(FailHandlerEvent)
@@ -0,0 +1,10 @@
+from pydantic import BaseModel, Field
+from shared.models.SupportedLanguage import SupportedLanguage
+
+MAX_BATCH_SIZE = 20
+
+
+class ScrapeRecipeBatchRequestBody(BaseModel):
+    urls: list[str] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+    parseIngredients: bool = False
+    defaultToLang: SupportedLanguage = "pl"
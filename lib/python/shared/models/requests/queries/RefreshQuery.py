@@ -0,0 +1,6 @@
+from pydantic import BaseModel
+from shared.models.SupportedLanguage import SupportedLanguage
+
+
+class RefreshQuery(BaseModel):
+    defaultToLang: SupportedLanguage = "pl"
@@ -6,3 +6,4 @@ class ScrapeQuery(BaseModel):
     url: str
     parseIngredients: bool = False
     defaultToLang: SupportedLanguage = "pl"
+    runAsync: bool = False
@@ -23,6 +23,11 @@ class UnprocessableEntityResponse(HttpResponse):
     body: str = "Unprocessable entity"
 
 
+class ConflictResponse(HttpResponse):
+    statusCode: Literal[409] = Field(409, init=False, frozen=True)
+    body: str = "Conflict"
+
+
 class InternalServerErrorResponse(HttpResponse):
     statusCode: Literal[500] = Field(500, init=False, frozen=True)
     body: str = "Internal server error"
@@ -45,6 +50,12 @@ class TooManyRequestsResponse(HttpResponse):
     headers: TooManyRequestsHeaders
 
 
+class ServiceUnavailableResponse(HttpResponse):
+    statusCode: Literal[503] = Field(503, init=False, frozen=True)
+    body: str = "Service unavailable"
+    headers: TooManyRequestsHeaders
+
+
 class OkResponse[T: BaseModel | str](HttpResponse):
     statusCode: Literal[200] = Field(200, init=False, frozen=True)
     body: Annotated[T, JsonSerializer]
@@ -66,6 +77,10 @@ class OkResponse[T: BaseModel | str](HttpResponse):
         self._headers = value
 
 
+class AcceptedResponse[T: BaseModel | str](OkResponse[T]):
+    statusCode: Literal[202] = Field(202, init=False, frozen=True)
+
+
 class MultiStatusResponse[T: BaseModel | str](OkResponse[T]):
     statusCode: Literal[207] = Field(207, init=False, frozen=True)
 
@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+
+
+class RefreshRecipeResult(BaseModel):
+    recipeId: str
+    changed: bool
+    reparsedIngredients: int
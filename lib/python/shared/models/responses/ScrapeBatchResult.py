@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+
+
+class ScrapeBatchItemResult(BaseModel):
+    url: str
+    recipeId: str | None = None
+    error: str | None = None
+
+
+class ScrapeBatchResult(BaseModel):
+    results: list[ScrapeBatchItemResult]
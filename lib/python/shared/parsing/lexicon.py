@@ -0,0 +1,364 @@
+from dataclasses import dataclass, field
+from shared.models.SupportedLanguage import SupportedLanguage
+
+
+@dataclass(frozen=True)
+class Lexicon:
+    units: frozenset[str]
+    numberWords: dict[str, str]
+    approximations: frozenset[str]
+    notePhrases: tuple[str, ...]
+    connectors: frozenset[str]
+    modifiers: frozenset[str]
+    fillers: frozenset[str] = frozenset()
+    # inflected name forms mapped to the nominative, in the same grammatical number
+    nominativeForms: dict[str, str] = field(default_factory=dict)
+    uninflectedWords: frozenset[str] = frozenset()
+    # words after a preposition keep the case the preposition gives them
+    prepositions: frozenset[str] = frozenset()
+    # the name after a unit or a fraction is in the genitive case
+    inflectsAfterQuantity: bool = False
+
+
+VULGAR_FRACTIONS = {
+    "½": "1/2",
+    "⅓": "1/3",
+    "⅔": "2/3",
+    "¼": "1/4",
+    "¾": "3/4",
+    "⅛": "1/8",
+}
+
+LEXICONS: dict[SupportedLanguage, Lexicon] = {
+    "pl": Lexicon(
+        units=frozenset(
+            {
+                "g",
+                "gr",
+                "gram",
+                "gramy",
+                "gramów",
+                "dag",
+                "dkg",
+                "kg",
+                "mg",
+                "ml",
+                "l",
+                "litr",
+                "litry",
+                "litra",
+                "litrów",
+                "łyżka",
+                "łyżki",
+                "łyżek",
+                "łyżkę",
+                "łyżeczka",
+                "łyżeczki",
+                "łyżeczek",
+                "łyżeczkę",
+                "szklanka",
+                "szklanki",
+                "szklanek",
+                "szklankę",
+                "szczypta",
+                "szczypty",
+                "szczyptę",
+                "garść",
+                "garści",
+                "garście",
+                "ząbek",
+                "ząbki",
+                "ząbków",
+                "opakowanie",
+                "opakowania",
+                "opakowań",
+                "puszka",
+                "puszki",
+                "puszek",
+                "słoik",
+                "słoiki",
+                "słoików",
+                "kostka",
+                "kostki",
+                "kostek",
+                "plaster",
+                "plastry",
+                "plastrów",
+                "plasterek",
+                "plasterki",
+                "plasterków",
+                "pęczek",
+                "pęczki",
+                "pęczków",
+                "gałązka",
+                "gałązki",
+                "gałązek",
+                "listek",
+                "listki",
+                "listków",
+                "torebka",
+                "torebki",
+                "torebek",
+                "kropla",
+                "krople",
+                "kropli",
+                "sztuka",
+                "sztuki",
+                "sztuk",
+                "szt",
+                "główka",
+                "główki",
+                "główek",
+                "laska",
+                "laski",
+                "lasek",
+            }
+        ),
+        numberWords={"pół": "1/2", "półtora": "1.5", "ćwierć": "1/4"},
+        approximations=frozenset({"ok", "ok.", "około", "ca", "ca."}),
+        notePhrases=(
+            "do smaku",
+            "do dekoracji",
+            "do podania",
+            "do posypania",
+            "do smażenia",
+            "opcjonalnie",
+            "dowolnie",
+        ),
+        connectors=frozenset({"i", "lub", "albo", "oraz", "czy", "&", "+", "/"}),
+        modifiers=frozenset(
+            {
+                "płaska",
+                "płaskie",
+                "płaskiej",
+                "czubata",
+                "czubate",
+                "czubatej",
+                "duża",
+                "duże",
+                "dużej",
+                "duży",
+                "dużych",
+                "mała",
+                "małe",
+                "małej",
+                "mały",
+                "małych",
+                "średnia",
+                "średnie",
+                "średniej",
+                "średni",
+                "średnich",
+                "pełna",
+                "pełne",
+                "niepełna",
+            }
+        ),
+        nominativeForms={
+            "mąki": "mąka",
+            "cukru": "cukier",
+            "pudru": "puder",
+            "soli": "sól",
+            "pieprzu": "pieprz",
+            "masła": "masło",
+            "mleka": "mleko",
+            "wody": "woda",
+            "oleju": "olej",
+            "oliwy": "oliwa",
+            "śmietany": "śmietana",
+            "śmietanki": "śmietanka",
+            "czosnku": "czosnek",
+            "cebuli": "cebula",
+            "cebul": "cebule",
+            "jajek": "jajka",
+            "jaj": "jaja",
+            "żółtek": "żółtka",
+            "drożdży": "drożdże",
+            "proszku": "proszek",
+            "sody": "soda",
+            "cynamonu": "cynamon",
+            "miodu": "miód",
+            "octu": "ocet",
+            "ryżu": "ryż",
+            "makaronu": "makaron",
+            "sera": "ser",
+            "twarogu": "twaróg",
+            "jogurtu": "jogurt",
+            "pomidorów": "pomidory",
+            "ziemniaków": "ziemniaki",
+            "marchewek": "marchewki",
+            "marchwi": "marchew",
+            "pietruszki": "pietruszka",
+            "koperku": "koperek",
+            "natki": "natka",
+            "bazylii": "bazylia",
+            "papryki": "papryka",
+            "kaszy": "kasza",
+            "bułki": "bułka",
+            "chleba": "chleb",
+            "wanilii": "wanilia",
+            "boczku": "boczek",
+            "mięsa": "mięso",
+            "kurczaka": "kurczak",
+            "szpinaku": "szpinak",
+            "pieczarek": "pieczarki",
+            "grzybów": "grzyby",
+            "orzechów": "orzechy",
+            "rodzynek": "rodzynki",
+            "bulionu": "bulion",
+            "wina": "wino",
+            "soku": "sok",
+            "cytryny": "cytryna",
+            "limonki": "limonka",
+            "imbiru": "imbir",
+            "kminu": "kmin",
+            "majeranku": "majeranek",
+            "tymianku": "tymianek",
+            "rozmarynu": "rozmaryn",
+            "musztardy": "musztarda",
+            "majonezu": "majonez",
+            "ketchupu": "ketchup",
+            "koncentratu": "koncentrat",
+            "czekolady": "czekolada",
+            "żelatyny": "żelatyna",
+            "kukurydzy": "kukurydza",
+            "fasoli": "fasola",
+            "groszku": "groszek",
+            "oliwek": "oliwki",
+            "truskawek": "truskawki",
+            "jabłek": "jabłka",
+            "pszennej": "pszenna",
+            "żytniej": "żytnia",
+            "tartej": "tarta",
+            "ziemniaczanej": "ziemniaczana",
+            "kukurydzianej": "kukurydziana",
+            "gorzkiej": "gorzka",
+            "mlecznej": "mleczna",
+            "słodkiej": "słodka",
+            "ostrej": "ostra",
+            "kwaśnej": "kwaśna",
+            "gęstej": "gęsta",
+            "pomidorowego": "pomidorowy",
+            "brązowego": "brązowy",
+            "białego": "biały",
+            "czarnego": "czarny",
+            "mielonego": "mielony",
+            "roślinnego": "roślinny",
+            "rzepakowego": "rzepakowy",
+            "waniliowego": "waniliowy",
+            "naturalnego": "naturalny",
+            "drobnego": "drobny",
+            "świeżych": "świeże",
+            "suszonych": "suszone",
+            "świeżego": "świeży",
+            "suszonego": "suszony",
+        },
+        uninflectedWords=frozenset(
+            {"kakao", "oregano", "curry", "chili", "chilli", "tofu", "pesto", "puree"}
+        ),
+        prepositions=frozenset({"do", "z", "ze", "w", "we", "na", "bez"}),
+        inflectsAfterQuantity=True,
+    ),
+    "en": Lexicon(
+        units=frozenset(
+            {
+                "g",
+                "gram",
+                "grams",
+                "kg",
+                "kilogram",
+                "kilograms",
+                "mg",
+                "ml",
+                "milliliter",
+                "milliliters",
+                "millilitre",
+                "millilitres",
+                "l",
+                "liter",
+                "liters",
+                "litre",
+                "litres",
+                "cup",
+                "cups",
+                "tbsp",
+                "tbs",
+                "tablespoon",
+                "tablespoons",
+                "tsp",
+                "teaspoon",
+                "teaspoons",
+                "oz",
+                "ounce",
+                "ounces",
+                "lb",
+                "lbs",
+                "pound",
+                "pounds",
+                "pinch",
+                "pinches",
+                "dash",
+                "dashes",
+                "clove",
+                "cloves",
+                "can",
+                "cans",
+                "jar",
+                "jars",
+                "slice",
+                "slices",
+                "piece",
+                "pieces",
+                "pcs",
+                "stick",
+                "sticks",
+                "handful",
+                "handfuls",
+                "bunch",
+                "bunches",
+                "sprig",
+                "sprigs",
+                "pint",
+                "pints",
+                "quart",
+                "quarts",
+                "package",
+                "packages",
+                "pkg",
+            }
+        ),
+        numberWords={
+            "a": "1",
+            "an": "1",
+            "one": "1",
+            "two": "2",
+            "three": "3",
+            "four": "4",
+            "half": "1/2",
+        },
+        approximations=frozenset({"about", "approx", "approx.", "approximately"}),
+        notePhrases=(
+            "to taste",
+            "for garnish",
+            "for serving",
+            "for frying",
+            "optional",
+            "as needed",
+        ),
+        connectors=frozenset({"and", "or", "&", "+", "/"}),
+        modifiers=frozenset(
+            {
+                "large",
+                "small",
+                "medium",
+                "heaping",
+                "heaped",
+                "level",
+                "scant",
+                "generous",
+                "big",
+            }
+        ),
+        fillers=frozenset({"of"}),
+    ),
+}
@@ -0,0 +1,200 @@
+from dataclasses import dataclass
+import re
+import unicodedata
+from shared.models.SupportedLanguage import SupportedLanguage
+from shared.parsing.lexicon import LEXICONS, VULGAR_FRACTIONS, Lexicon
+
+NUMBER = r"\d+(?:[.,]\d+)?(?:/\d+)?"
+
+QUANTITY_PATTERN = re.compile(
+    rf"^(?P<quantity>(?:\d+\s+\d+/\d+)|{NUMBER}(?:\s*[-–—]\s*{NUMBER})?)(?=\s|$|[^\d\s.,/-])\s*(?P<rest>.*)$"
+)
+
+NOTES_PATTERN = re.compile(r"\((?P<notes>[^()]*)\)")
+
+
+@dataclass
+class RuleParse:
+    name: str
+    quantity: str | None
+    unit: str | None
+    preparationNotes: str | None
+    confidence: float
+
+
+def _normalize(text: str) -> str:
+    for fraction, replacement in VULGAR_FRACTIONS.items():
+        text = re.sub(rf"(?<=\d){fraction}", f" {replacement}", text)
+        text = text.replace(fraction, replacement)
+
+    return " ".join(unicodedata.normalize("NFKC", text).replace("⁄", "/").split())
+
+
+def _format_quantity(quantity: str) -> str:
+    quantity = re.sub(r"\s*[-–—]\s*", "-", quantity)
+
+    return re.sub(r"(?<=\d),(?=\d)", ".", quantity)
+
+
+def _take_quantity(text: str, lexicon: Lexicon) -> tuple[str | None, str, float]:
+    penalty = 0.0
+    firstWord, _, rest = text.partition(" ")
+
+    if firstWord.casefold() in lexicon.approximations:
+        text = rest
+        penalty += 0.2
+
+    match = QUANTITY_PATTERN.match(text)
+
+    if match is not None:
+        quantity = match.group("quantity")
+
+        # mixed numbers are written in too many ways to be sure of the expected format
+        if " " in quantity:
+            penalty += 0.15
+
+        return _format_quantity(quantity), match.group("rest"), penalty
+
+    firstWord, _, rest = text.partition(" ")
+
+    if firstWord.casefold() in lexicon.numberWords:
+        return lexicon.numberWords[firstWord.casefold()], rest, penalty + 0.15
+
+    return None, text, penalty
+
+
+def _take_unit(text: str, lexicon: Lexicon) -> tuple[str | None, str, float]:
+    firstWord, _, rest = text.partition(" ")
+    word = firstWord.casefold()
+
+    if word in lexicon.units:
+        return firstWord, rest, 0.0
+
+    # abbreviations may be expanded by the AI, e.g. łyż. to łyżka
+    if word.endswith(".") and word[:-1] in lexicon.units:
+        return firstWord[:-1], rest, 0.1
+
+    if word.endswith(".") and any(
+        unit.startswith(word[:-1]) for unit in lexicon.units if len(word) > 2
+    ):
+        return firstWord, rest, 0.3
+
+    return None, text, 0.0
+
+
+def _take_parenthesized_notes(text: str) -> tuple[list[str], str]:
+    notes = [match["notes"].strip() for match in NOTES_PATTERN.finditer(text)]
+
+    return notes, " ".join(NOTES_PATTERN.sub(" ", text).split())
+
+
+def _split_notes(
+    text: str, notes: list[str], lexicon: Lexicon
+) -> tuple[str, str | None]:
+    name, _, afterComma = text.partition(",")
+
+    if afterComma.strip() != "":
+        notes.append(afterComma.strip())
+
+    for phrase in lexicon.notePhrases:
+        if name.casefold().endswith(" " + phrase):
+            notes.insert(0, name[-len(phrase) :])
+            name = name[: -len(phrase)]
+            break
+
+    name = " ".join(name.split())
+
+    return name, ", ".join(note for note in notes if note != "") or None
+
+
+def _to_nominative(name: str, lexicon: Lexicon) -> tuple[str, float]:
+    words = name.split(" ")
+    nominative: list[str] = []
+
+    for index, word in enumerate(words):
+        lowerWord = word.casefold()
+
+        if lowerWord in lexicon.prepositions and index > 0:
+            return " ".join([*nominative, *words[index:]]), 0.0
+
+        if lowerWord in lexicon.uninflectedWords:
+            nominative.append(word)
+        elif lowerWord in lexicon.nominativeForms:
+            nominative.append(lexicon.nominativeForms[lowerWord])
+        else:
+            return name, 0.5
+
+    return " ".join(nominative), 0.0
+
+
+def _is_small_integer(quantity: str) -> bool:
+    return quantity.isdigit() and 1 <= int(quantity) <= 4
+
+
+def parse_ingredient_line(text: str, lang: SupportedLanguage) -> RuleParse:
+    lexicon = LEXICONS[lang]
+    penalty = 0.0
+
+    text = _normalize(text)
+    quantity, rest, quantityPenalty = _take_quantity(text, lexicon)
+    penalty += quantityPenalty
+
+    # notes like the can size in 1 (14 oz) can tomatoes sit between the quantity and the unit
+    notes, rest = _take_parenthesized_notes(rest)
+
+    unit, rest, unitPenalty = _take_unit(rest, lexicon)
+    penalty += unitPenalty
+
+    # a unit without a number, e.g. szczypta soli, may or may not get a quantity from the AI
+    if unit is not None and quantity is None:
+        penalty += 0.2
+
+    nameWords = rest.split(" ")
+
+    while len(nameWords) > 1 and nameWords[0].casefold() in lexicon.fillers:
+        nameWords = nameWords[1:]
+
+    name, preparationNotes = _split_notes(" ".join(nameWords), notes, lexicon)
+    words = [word.casefold() for word in name.split(" ") if word != ""]
+
+    if len(words) == 0:
+        return RuleParse(
+            name=text,
+            quantity=None,
+            unit=None,
+            preparationNotes=None,
+            confidence=0.0,
+        )
+
+    # several ingredients on one line are split by the AI
+    if any(word in lexicon.connectors for word in words) or any(
+        connector in name for connector in ("/", "+", "&")
+    ):
+        penalty += 0.6
+
+    if any(char.isdigit() for char in name):
+        penalty += 0.5
+
+    # a unit left in the name was not recognized where it stood, so the split is likely wrong
+    if unit is None and words[0].rstrip(".") in lexicon.units:
+        penalty += 0.5
+
+    if any(word in lexicon.modifiers for word in words):
+        penalty += 0.2
+
+    if len(words) > 4:
+        penalty += 0.2
+
+    if lexicon.inflectsAfterQuantity and (
+        unit is not None or (quantity is not None and not _is_small_integer(quantity))
+    ):
+        name, inflectionPenalty = _to_nominative(name, lexicon)
+        penalty += inflectionPenalty
+
+    return RuleParse(
+        name=name,
+        quantity=quantity,
+        unit=unit,
+        preparationNotes=preparationNotes,
+        confidence=max(0.0, round(1.0 - penalty, 2)),
+    )
@@ -0,0 +1,143 @@
+from dataclasses import dataclass
+from datetime import datetime
+import gzip
+import hashlib
+from typing import TYPE_CHECKING, Iterator
+from urllib.parse import quote, unquote
+from aws_lambda_powertools import Logger
+import boto3
+import botocore.exceptions
+from shared.models.environment.ArchiveConfig import ArchiveCompression
+from shared.utils.fetch import FetchResult
+from shared.utils.url import normalize_url
+
+if TYPE_CHECKING:
+    from mypy_boto3_s3.type_defs import ObjectTypeDef
+
+# optional, installed with the zstd extra
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ARCHIVE_PREFIX = "pages"
+
+extensions: dict[ArchiveCompression, str] = {
+    "gzip": ".html.gz",
+    "zstd": ".html.zst",
+}
+
+
+@dataclass
+class ArchivedPage:
+    url: str
+    content: bytes
+    charset: str
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.charset, errors="replace")
+
+
+def url_archive_prefix(url: str) -> str:
+    urlHash = hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+
+    return f"{ARCHIVE_PREFIX}/{urlHash[:32]}/"
+
+
+def compress(content: bytes, compression: ArchiveCompression) -> bytes:
+    match compression:
+        case "zstd" if zstandard is not None:
+            return zstandard.ZstdCompressor(level=10).compress(content)
+        case "zstd":
+            raise ValueError("zstd compression requires the zstandard package")
+        case "gzip":
+            return gzip.compress(content, compresslevel=6, mtime=0)
+
+
+def decompress(data: bytes, key: str) -> bytes:
+    if key.endswith(extensions["zstd"]):
+        if zstandard is None:
+            raise ValueError("zstd compression requires the zstandard package")
+
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+    return gzip.decompress(data)
+
+
+def archive_page(
+    bucket: str, page: FetchResult, compression: ArchiveCompression, log: Logger
+) -> str | None:
+    if compression == "zstd" and zstandard is None:
+        log.warning("zstandard is not installed, archiving with gzip")
+        compression = "gzip"
+
+    contentHash = hashlib.sha256(page.content).hexdigest()
+    # the same content under the same url always maps to the same key, so unchanged pages are not duplicated
+    key = f"{url_archive_prefix(page.url)}{contentHash}{extensions[compression]}"
+
+    try:
+        boto3.client("s3").put_object(
+            Bucket=bucket,
+            Key=key,
+            Body=compress(page.content, compression),
+            ContentType="text/html",
+            Metadata={
+                # s3 user metadata must be ascii
+                "source-url": quote(page.url, safe=""),
+                "charset": page.charset,
+                "fetched-at": datetime.now().isoformat(),
+            },
+        )
+    except botocore.exceptions.ClientError:
+        log.warning("Unable to archive the page", exc_info=True)
+        return None
+
+    return key
+
+
+def iter_archive_objects(
+    bucket: str, prefix: str = ARCHIVE_PREFIX
+) -> Iterator["ObjectTypeDef"]:
+    for page in (
+        boto3.client("s3")
+        .get_paginator("list_objects_v2")
+        .paginate(Bucket=bucket, Prefix=prefix)
+    ):
+        yield from page.get("Contents", [])
+
+
+def latest_archive_keys(bucket: str, prefix: str = ARCHIVE_PREFIX) -> list[str]:
+    # every url has its own folder with a page per content version, only the newest one is kept
+    latest: dict[str, tuple[datetime, str]] = {}
+
+    for item in iter_archive_objects(bucket, prefix):
+        key = item.get("Key")
+        lastModified = item.get("LastModified")
+
+        if key is None or lastModified is None:
+            continue
+
+        folder = key.rsplit("/", 1)[0]
+
+        if folder not in latest or lastModified > latest[folder][0]:
+            latest[folder] = (lastModified, key)
+
+    return [key for _, key in latest.values()]
+
+
+def latest_archive_key(bucket: str, url: str) -> str | None:
+    keys = latest_archive_keys(bucket, url_archive_prefix(url))
+
+    return keys[0] if len(keys) > 0 else None
+
+
+def load_archived_page(bucket: str, key: str) -> ArchivedPage:
+    response = boto3.client("s3").get_object(Bucket=bucket, Key=key)
+    metadata = response.get("Metadata", {})
+
+    return ArchivedPage(
+        url=unquote(metadata["source-url"]),
+        content=decompress(response["Body"].read(), key),
+        charset=metadata.get("charset", "utf-8"),
+    )
@@ -0,0 +1,140 @@
+from datetime import datetime, timedelta
+from itertools import chain
+from typing import Iterable
+from aws_lambda_powertools import Logger
+from shared.models.DTO.ProcessedIngredient import ProcessedIngredientCollection
+from shared.models.Ingredient import Ingredient
+from shared.models.database.RecipeDbItem import RecipeDbItem
+from shared.utils.find import find
+from shared.utils.recipe_cache import is_cacheable, put_cached_recipe
+
+
+def apply_parse_result(
+    recipeItem: RecipeDbItem,
+    ingredientId: str,
+    parseResult: ProcessedIngredientCollection,
+    log: Logger,
+):
+    originalIngredient = find(
+        chain.from_iterable(
+            ig.ingredients for ig in recipeItem.Content.recipe.ingredientGroups
+        ),
+        lambda ingr: ingr.id == ingredientId,
+    )
+
+    if originalIngredient is None:
+        log.warning(
+            "Original ingredient not found by id in the recipe",
+            extra={
+                "recipe": recipeItem.Content.model_dump(),
+                "originalIngredientId": ingredientId,
+            },
+        )
+        return
+
+    # duplicates keep their own line, which may differ from the parsed one in case or spacing
+    lineText = originalIngredient.name
+    resultIter = iter(parseResult.result)
+
+    firstParsedIngredient = next(resultIter)
+
+    originalIngredient.isProcessed = True
+    originalIngredient.name = firstParsedIngredient.name
+    originalIngredient.quantity = firstParsedIngredient.quantity
+    originalIngredient.unit = firstParsedIngredient.unit
+    originalIngredient.preparationNotes = firstParsedIngredient.preparationNotes
+    originalIngredient.originalText = lineText
+
+    recipeItem.Content.ingredientStatuses[ingredientId] = parseResult.status
+
+    if len(parseResult.result) > 1:
+        group = find(
+            recipeItem.Content.recipe.ingredientGroups,
+            lambda ig: ingredientId in ig.ingredients,
+        )
+
+        if group is None:
+            log.warning(
+                "Ingredient group not found for first parsed ingredient",
+                extra={"firsParsedIngredientId": firstParsedIngredient.id},
+            )
+            return
+
+        firstParsedIngredientIndex = find(
+            enumerate(group.ingredients),
+            lambda x: x[1].id == ingredientId,
+        )
+
+        assert firstParsedIngredientIndex is not None, "It can't be"
+
+        firstParsedIngredientIndex = firstParsedIngredientIndex[0]
+
+        for parsedIngredient in resultIter:
+            # every target line gets its own copy with a fresh id
+            parsedIngredient = Ingredient(
+                **parsedIngredient.model_dump(exclude={"id", "originalText"}),
+                originalText=lineText,
+            )
+
+            log.debug(
+                "Inserting additional parsed ingredients",
+                extra={
+                    "index": firstParsedIngredientIndex + 1,
+                    "parsedIngredient": parsedIngredient,
+                    "ingredients": group.ingredients,
+                },
+            )
+
+            group.ingredients.insert(firstParsedIngredientIndex + 1, parsedIngredient)
+            recipeItem.Content.ingredientStatuses[parsedIngredient.id] = (
+                parseResult.status
+            )
+            log.debug(
+                "inserted the ingredient",
+                extra={
+                    "ingredients": group.ingredients,
+                },
+            )
+
+
+def promote_pending_refresh(recipeItem: RecipeDbItem):
+    refresh = recipeItem.PendingRefresh
+
+    if refresh is None:
+        return
+
+    recipeItem.Content = refresh.Content
+    recipeItem.ArchiveKey = refresh.ArchiveKey
+    recipeItem.SourceUrl = refresh.SourceUrl
+    recipeItem.SourceETag = refresh.SourceETag
+    recipeItem.SourceLastModified = refresh.SourceLastModified
+    recipeItem.PendingRefresh = None
+
+
+def apply_parse_results(
+    recipeItem: RecipeDbItem,
+    parseResults: Iterable[ProcessedIngredientCollection],
+    log: Logger,
+):
+    # the refreshed content replaces the served one only once its ingredients are parsed
+    promote_pending_refresh(recipeItem)
+
+    for parseResult in parseResults:
+        # identical lines of a recipe are parsed once and share the result
+        for ingredientId in parseResult.originalIngredient.targetIngredientIds:
+            apply_parse_result(recipeItem, ingredientId, parseResult, log)
+
+    recipeItem.IsComplete = True
+    recipeItem.HasParsingSucceeded = True
+
+
+def cache_assembled_recipe(
+    recipeCacheTableName: str, recipeCacheTTL: timedelta, recipeItem: RecipeDbItem
+):
+    if len(recipeItem.CacheKeys) > 0 and is_cacheable(recipeItem.Content):
+        put_cached_recipe(
+            recipeCacheTableName,
+            recipeItem.CacheKeys,
+            recipeItem.Content,
+            datetime.now() + recipeCacheTTL,
+        )
@@ -0,0 +1,191 @@
+from dataclasses import dataclass, field
+import inspect
+from time import perf_counter
+from typing import Any, Mapping
+from recipe_scrapers import SCRAPERS
+from recipe_scrapers._abstract import AbstractScraper
+from recipe_scrapers._exceptions import RecipeScrapersExceptions
+from recipe_scrapers._factory import SchemaScraperFactory
+from recipe_scrapers._utils import get_host_name
+from recipe_scrapers.settings import settings
+from shared.models.ExtractionStrategy import ExtractionStrategy
+from shared.models.Ingredient import Ingredient
+from shared.models.IngredientGroup import IngredientGroup
+from shared.models.IngredientParseStatus import IngredientParseStatus
+from shared.models.Recipe import Recipe
+from shared.models.database.ScrapedRecipe import ScrapedRecipe
+from shared.models.exceptions.apiExceptions import UnableToParseRecipeException
+from shared.scraping.fields import LazyScraperFields
+from shared.scraping.jsonld import extract_jsonld_fields
+
+default_strategy_order = [
+    ExtractionStrategy.jsonLd,
+    ExtractionStrategy.native,
+    ExtractionStrategy.wildMode,
+]
+
+
+@dataclass
+class ExtractionResult:
+    strategy: ExtractionStrategy
+    recipe: Recipe
+    latencyMs: float
+    failedStrategies: list[ExtractionStrategy] = field(default_factory=list)
+    fieldTimingsMs: dict[str, float] = field(default_factory=dict)
+    fieldErrors: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def wildModeUsed(self) -> bool:
+        return self.strategy == ExtractionStrategy.wildMode
+
+    def to_scraped_recipe(self, parseIngredients: bool) -> ScrapedRecipe:
+        return ScrapedRecipe(
+            wildModeUsed=self.wildModeUsed,
+            recipe=self.recipe,
+            ingredientStatuses={
+                ingredient.id: IngredientParseStatus.off
+                for group in self.recipe.ingredientGroups
+                for ingredient in group.ingredients
+            }
+            if not parseIngredients
+            else {},
+        )
+
+
+class _StrategyNotApplicable(Exception):
+    pass
+
+
+def _attach_plugins(scraper: AbstractScraper):
+    # mirrors AbstractScraper.__init__, which is skipped for scrapers reusing a parsed document
+    if not hasattr(scraper.__class__, "plugins_initialized"):
+        for name, _ in inspect.getmembers(scraper, inspect.ismethod):
+            current_method = getattr(scraper.__class__, name)
+            for plugin in reversed(settings.PLUGINS):
+                if plugin.should_run(scraper.host(), name):
+                    current_method = plugin.run(current_method)
+            setattr(scraper.__class__, name, current_method)
+        setattr(scraper.__class__, "plugins_initialized", True)
+
+
+class _Document:
+    def __init__(self, html: str, url: str):
+        self.html = html
+        self.url = url
+        self._parsed: AbstractScraper | None = None
+
+    def scraper(self, scraperCls: type[AbstractScraper]) -> AbstractScraper:
+        # the soup and schema.org data are parsed once and shared by every scraper
+        if self._parsed is None:
+            self._parsed = scraperCls(html=self.html, url=self.url)
+            return self._parsed
+
+        if type(self._parsed) is scraperCls:
+            return self._parsed
+
+        scraper = scraperCls.__new__(scraperCls)
+        scraper.page_data = self._parsed.page_data
+        scraper.url = self._parsed.url
+        scraper.soup = self._parsed.soup
+        scraper.opengraph = self._parsed.opengraph
+        scraper.schema = self._parsed.schema
+        scraper.best_image_selection = self._parsed.best_image_selection
+        _attach_plugins(scraper)
+
+        return scraper
+
+
+def build_recipe(fields: Mapping[str, Any], parseIngredients: bool) -> Recipe:
+    try:
+        return Recipe(
+            title=fields["title"],
+            imageUrl=fields["image"],
+            lang=fields["language"],
+            url=fields["canonical_url"],
+            description=fields.get("description", None),
+            category=fields.get("category", None),
+            ingredientGroups=[
+                IngredientGroup(
+                    name=ig.get("purpose", None),
+                    ingredients=[
+                        Ingredient(
+                            name=name,
+                            originalText=name,
+                            isProcessed=not parseIngredients,
+                        )
+                        for name in ig.get("ingredients", [])
+                    ],
+                )
+                for ig in fields["ingredient_groups"]
+            ],
+            steps=fields["instructions_list"],
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        raise UnableToParseRecipeException() from e
+
+
+def _extract_fields(
+    strategy: ExtractionStrategy, document: _Document
+) -> Mapping[str, Any]:
+    match strategy:
+        case ExtractionStrategy.jsonLd:
+            fields = extract_jsonld_fields(document.html, document.url)
+
+            if fields is None:
+                raise UnableToParseRecipeException()
+
+            return fields
+        case ExtractionStrategy.native:
+            scraperCls = SCRAPERS.get(get_host_name(document.url))
+
+            if scraperCls is None:
+                raise _StrategyNotApplicable()
+
+            return LazyScraperFields(document.scraper(scraperCls))
+        case ExtractionStrategy.wildMode:
+            scraper = document.scraper(SchemaScraperFactory.SchemaScraper)
+
+            if not scraper.schema.data:
+                raise UnableToParseRecipeException()
+
+            return LazyScraperFields(scraper)
+
+
+def extract_recipe(
+    html: str,
+    url: str,
+    *,
+    parseIngredients: bool,
+    preferredStrategy: ExtractionStrategy | None = None,
+) -> ExtractionResult:
+    document = _Document(html, url)
+    failedStrategies: list[ExtractionStrategy] = []
+
+    strategies = sorted(
+        default_strategy_order, key=lambda strategy: strategy != preferredStrategy
+    )
+
+    for strategy in strategies:
+        start = perf_counter()
+
+        try:
+            fields = _extract_fields(strategy, document)
+            recipe = build_recipe(fields, parseIngredients)
+        except _StrategyNotApplicable:
+            continue
+        except (RecipeScrapersExceptions, UnableToParseRecipeException):
+            failedStrategies.append(strategy)
+            continue
+
+        return ExtractionResult(
+            strategy=strategy,
+            recipe=recipe,
+            latencyMs=(perf_counter() - start) * 1000,
+            failedStrategies=failedStrategies,
+            fieldTimingsMs=fields.timingsMs
+            if isinstance(fields, LazyScraperFields)
+            else {},
+            fieldErrors=fields.errors if isinstance(fields, LazyScraperFields) else {},
+        )
+
+    raise UnableToParseRecipeException()
@@ -0,0 +1,262 @@
+from dataclasses import dataclass
+from datetime import datetime
+import math
+from aws_lambda_powertools import Logger
+from aws_lambda_powertools.metrics import MetricUnit
+import boto3
+import botocore.exceptions
+from pydantic import ValidationError
+from shared.models.ScrapeFailureClass import ScrapeFailureClass
+from shared.models.database.HostCircuitItem import HostCircuitItem
+from shared.models.database.UrlFailureItem import UrlFailureItem
+from shared.models.environment.ScrapeFailuresConfig import ScrapeFailuresConfig
+from shared.utils.buffered_metrics import BufferedMetrics
+from shared.utils.url import normalize_url
+
+metrics = BufferedMetrics()
+
+
+def url_failure_key(url: str) -> str:
+    return f"url#{normalize_url(url)}"
+
+
+def host_circuit_key(host: str) -> str:
+    return f"host#{host}"
+
+
+@dataclass
+class RecentFailures:
+    urlFailure: UrlFailureItem | None = None
+    circuit: HostCircuitItem | None = None
+
+
+@dataclass
+class CircuitCheck:
+    allowed: bool
+    isProbe: bool = False
+    retryAfter: int = 0
+
+
+def _is_expired(expiresAt: datetime) -> bool:
+    return expiresAt.timestamp() <= datetime.now().timestamp()
+
+
+def _is_condition_failure(e: botocore.exceptions.ClientError) -> bool:
+    return e.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException"
+
+
+def get_recent_failures(
+    config: ScrapeFailuresConfig, url: str, host: str, log: Logger
+) -> RecentFailures:
+    keyName = UrlFailureItem.get_primary_key_name()
+    urlKey = url_failure_key(url)
+    hostKey = host_circuit_key(host)
+
+    try:
+        rawItems = (
+            boto3.resource("dynamodb")
+            .batch_get_item(
+                RequestItems={
+                    config.tableName: {
+                        "Keys": [{keyName: urlKey}, {keyName: hostKey}],
+                    }
+                },
+                ReturnConsumedCapacity="NONE",
+            )
+            .get("Responses", {})
+            .get(config.tableName, [])
+        )
+    except botocore.exceptions.ClientError:
+        log.warning("Unable to load recent scrape failures", exc_info=True)
+        return RecentFailures()
+
+    result = RecentFailures()
+
+    for rawItem in rawItems:
+        try:
+            if rawItem[keyName] == urlKey:
+                urlFailure = UrlFailureItem.from_dynamo(rawItem)
+
+                # dynamodb ttl deletion is lazy, so expired items can still be returned
+                if not _is_expired(urlFailure.ExpiresAt):
+                    result.urlFailure = urlFailure
+            elif rawItem[keyName] == hostKey:
+                circuit = HostCircuitItem.from_dynamo(rawItem)
+
+                if not _is_expired(circuit.ExpiresAt):
+                    result.circuit = circuit
+        except ValidationError:
+            log.warning("Invalid scrape failure item", extra={"item": rawItem})
+
+    return result
+
+
+def check_host_circuit(
+    config: ScrapeFailuresConfig,
+    host: str,
+    circuit: HostCircuitItem | None,
+    log: Logger,
+) -> CircuitCheck:
+    if circuit is None or circuit.OpenedUntil is None:
+        return CircuitCheck(allowed=True)
+
+    now = datetime.now()
+    remainingSeconds = circuit.OpenedUntil.timestamp() - now.timestamp()
+
+    if remainingSeconds > 0:
+        return CircuitCheck(allowed=False, retryAfter=math.ceil(remainingSeconds))
+
+    # the cooldown has passed, so a single request at a time is let through to probe the host
+    table = boto3.resource("dynamodb").Table(config.tableName)
+
+    try:
+        table.update_item(
+            Key={HostCircuitItem.get_primary_key_name(): host_circuit_key(host)},
+            UpdateExpression="SET ProbeUntil = :probeUntil",
+            ConditionExpression="attribute_not_exists(ProbeUntil) OR ProbeUntil < :now",
+            ExpressionAttributeValues={
+                ":probeUntil": int((now + config.probeTimeout).timestamp()),
+                ":now": int(now.timestamp()),
+            },
+            ReturnValues="NONE",
+        )
+    except botocore.exceptions.ClientError as e:
+        if _is_condition_failure(e):
+            return CircuitCheck(
+                allowed=False,
+                retryAfter=math.ceil(config.probeTimeout.total_seconds()),
+            )
+
+        log.warning("Unable to claim the circuit probe", exc_info=True)
+
+        return CircuitCheck(allowed=True)
+
+    return CircuitCheck(allowed=True, isProbe=True)
+
+
+def record_url_failure(
+    config: ScrapeFailuresConfig,
+    url: str,
+    failureClass: ScrapeFailureClass,
+    statusCode: int | None,
+    log: Logger,
+):
+    table = boto3.resource("dynamodb").Table(config.tableName)
+
+    try:
+        table.put_item(
+            Item=UrlFailureItem(
+                FailureKey=url_failure_key(url),
+                FailureClass=failureClass,
+                StatusCode=statusCode,
+                ExpiresAt=datetime.now() + config.negativeCacheTTL,
+            ).model_dump(),
+            ReturnValues="NONE",
+        )
+    except botocore.exceptions.ClientError:
+        log.warning("Unable to store the scrape failure", exc_info=True)
+
+
+def _count_host_failure(
+    table, key: dict, config: ScrapeFailuresConfig, now: datetime
+) -> int:
+    values = {
+        ":one": 1,
+        ":now": int(now.timestamp()),
+        ":expiresAt": int((now + config.failureWindow).timestamp()),
+    }
+
+    # the counter is only ever incremented in place while the window is live, so concurrent failures are all counted
+    try:
+        return HostCircuitItem.from_dynamo(
+            table.update_item(
+                Key=key,
+                UpdateExpression="ADD ConsecutiveFailures :one SET ExpiresAt = :expiresAt REMOVE ProbeUntil",
+                ConditionExpression="ExpiresAt > :now",
+                ExpressionAttributeValues=values,
+                ReturnValues="ALL_NEW",
+            )["Attributes"]
+        ).ConsecutiveFailures
+    except botocore.exceptions.ClientError as e:
+        if not _is_condition_failure(e):
+            raise
+
+    # the previous window has expired but its item may not have been deleted yet, so the count starts over
+    try:
+        table.update_item(
+            Key=key,
+            UpdateExpression="SET ConsecutiveFailures = :one, ExpiresAt = :expiresAt REMOVE OpenedUntil, ProbeUntil",
+            ConditionExpression="attribute_not_exists(ExpiresAt) OR ExpiresAt <= :now",
+            ExpressionAttributeValues=values,
+            ReturnValues="NONE",
+        )
+        return 1
+    except botocore.exceptions.ClientError as e:
+        if not _is_condition_failure(e):
+            raise
+
+    # another failure started the new window first
+    return HostCircuitItem.from_dynamo(
+        table.update_item(
+            Key=key,
+            UpdateExpression="ADD ConsecutiveFailures :one SET ExpiresAt = :expiresAt REMOVE ProbeUntil",
+            ExpressionAttributeValues={":one": 1, ":expiresAt": values[":expiresAt"]},
+            ReturnValues="ALL_NEW",
+        )["Attributes"]
+    ).ConsecutiveFailures
+
+
+def record_host_failure(
+    config: ScrapeFailuresConfig,
+    host: str,
+    log: Logger,
+):
+    table = boto3.resource("dynamodb").Table(config.tableName)
+    key = {HostCircuitItem.get_primary_key_name(): host_circuit_key(host)}
+    now = datetime.now()
+
+    try:
+        consecutiveFailures = _count_host_failure(table, key, config, now)
+
+        if consecutiveFailures < config.failureThreshold:
+            return
+
+        openedUntil = now + config.cooldown
+
+        table.update_item(
+            Key=key,
+            UpdateExpression="SET OpenedUntil = :openedUntil, ExpiresAt = :expiresAt",
+            ExpressionAttributeValues={
+                ":openedUntil": int(openedUntil.timestamp()),
+                ":expiresAt": int((openedUntil + config.failureWindow).timestamp()),
+            },
+            ReturnValues="NONE",
+        )
+
+        log.warning(
+            "Opened the circuit for host",
+            extra={"host": host, "consecutiveFailures": consecutiveFailures},
+        )
+        metrics.add_metric(name="ScrapeCircuitOpened", unit=MetricUnit.Count, value=1)
+    except botocore.exceptions.ClientError:
+        log.warning("Unable to store the host failure", exc_info=True)
+
+
+def record_host_success(
+    config: ScrapeFailuresConfig,
+    host: str,
+    circuit: HostCircuitItem | None,
+    log: Logger,
+):
+    if circuit is None:
+        return
+
+    table = boto3.resource("dynamodb").Table(config.tableName)
+
+    try:
+        table.delete_item(
+            Key={HostCircuitItem.get_primary_key_name(): host_circuit_key(host)},
+            ReturnValues="NONE",
+        )
+    except botocore.exceptions.ClientError:
+        log.warning("Unable to close the circuit for host", exc_info=True)
@@ -0,0 +1,59 @@
+from time import perf_counter
+from typing import Any, Callable, Iterator, Mapping
+from recipe_scrapers._abstract import AbstractScraper
+
+# the only scraper fields build_recipe reads, everything else to_json() would compute is skipped
+recipe_field_names = (
+    "title",
+    "image",
+    "language",
+    "canonical_url",
+    "description",
+    "category",
+    "ingredient_groups",
+    "instructions_list",
+)
+
+field_converters: dict[str, Callable[[Any], Any]] = {
+    "ingredient_groups": lambda groups: [group.__dict__ for group in groups],
+}
+
+
+class LazyScraperFields(Mapping[str, Any]):
+    def __init__(
+        self, scraper: AbstractScraper, fieldNames: tuple[str, ...] = recipe_field_names
+    ):
+        self._scraper = scraper
+        self._fieldNames = fieldNames
+        self._values: dict[str, Any] = {}
+        self.timingsMs: dict[str, float] = {}
+        self.errors: dict[str, str] = {}
+
+    def __getitem__(self, name: str) -> Any:
+        if name in self._values:
+            return self._values[name]
+
+        if name not in self._fieldNames or name in self.errors:
+            raise KeyError(name)
+
+        start = perf_counter()
+
+        # a failing field is reported as missing, so that only required fields fail the extraction
+        try:
+            value = getattr(self._scraper, name)()
+            value = field_converters.get(name, lambda x: x)(value)
+        except Exception as e:
+            self.errors[name] = type(e).__name__
+            raise KeyError(name) from e
+        finally:
+            self.timingsMs[name] = (perf_counter() - start) * 1000
+
+        self._values[name] = value
+
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return (name for name in self._fieldNames if name in self)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
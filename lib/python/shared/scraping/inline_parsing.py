@@ -0,0 +1,305 @@
+import asyncio
+from dataclasses import dataclass
+from datetime import timedelta
+from time import monotonic, perf_counter
+from aws_lambda_powertools import Logger, Metrics
+from aws_lambda_powertools.metrics import MetricUnit
+from openai import AsyncOpenAI, OpenAIError, RateLimitError
+from pydantic import BaseModel
+from shared.models.DTO.ProcessIngredientsInput import (
+    IngredientToProcessDTO,
+    ProcessIngredientsInput,
+)
+from shared.models.DTO.ProcessedIngredient import (
+    ProcessedIngredientCollection,
+    ProcessedIngredientCollectionList,
+)
+from shared.models.IngredientParseStatus import IngredientParseStatus
+from shared.models.SupportedLanguage import SupportedLanguage
+from shared.models.environment.AiRateLimitConfig import AiRateLimitConfig
+from shared.models.environment.InlineParsingConfig import InlineParsingConfig
+from shared.models.exceptions.chatExceptions import AiRateLimitedException
+from shared.utils.ai_rate_limit import (
+    acquire_ai_request,
+    record_ai_success,
+    record_ai_throttle,
+)
+from shared.utils.buffered_metrics import BufferedMetric, buffer_metrics, emit_metrics
+from shared.utils.ingredient_parsing import (
+    CachedLines,
+    batch_lang,
+    parse_request_body,
+    read_parsed_lines,
+    resolve_cached_lines,
+)
+from shared.utils.parse_cache import put_cached_parses, to_recipe_ingredients
+
+metrics = Metrics()
+
+
+@dataclass
+class InlineLine:
+    ingredient: IngredientToProcessDTO
+    lang: SupportedLanguage
+    promptId: str
+    cacheKey: str
+
+
+@dataclass
+class InlineLineResult:
+    parsed: BaseModel | None
+    totalTokens: int
+
+
+# the limiter calls block, so they run in worker threads that buffer their metrics, the metric set is not thread safe
+def _acquire_in_worker(
+    config: AiRateLimitConfig, log: Logger
+) -> tuple[bool, list[BufferedMetric]]:
+    with buffer_metrics() as buffer:
+        try:
+            acquire_ai_request(config, log)
+        except AiRateLimitedException:
+            return False, buffer
+
+        return True, buffer
+
+
+def _record_in_worker(
+    config: AiRateLimitConfig, throttled: bool, log: Logger
+) -> list[BufferedMetric]:
+    with buffer_metrics() as buffer:
+        if throttled:
+            record_ai_throttle(config, log)
+        else:
+            record_ai_success(config, log)
+
+        return buffer
+
+
+async def acquire_line_request(
+    config: InlineParsingConfig, deadline: float | None, log: Logger
+) -> bool:
+    assert config.aiRateLimit is not None
+
+    # the wait for a token counts against the line timeout and the time left in the invocation
+    maxWait = min(config.aiRateLimit.maxWait, config.lineTimeout)
+
+    if deadline is not None:
+        maxWait = min(maxWait, timedelta(seconds=max(0.0, deadline - monotonic())))
+
+    acquired, buffer = await asyncio.to_thread(
+        _acquire_in_worker,
+        config.aiRateLimit.model_copy(update={"maxWait": maxWait}),
+        log,
+    )
+    emit_metrics(buffer)
+
+    return acquired
+
+
+async def record_line_request(
+    config: InlineParsingConfig, throttled: bool, log: Logger
+):
+    assert config.aiRateLimit is not None
+
+    emit_metrics(
+        await asyncio.to_thread(_record_in_worker, config.aiRateLimit, throttled, log)
+    )
+
+
+async def parse_line(
+    client: AsyncOpenAI,
+    semaphore: asyncio.Semaphore,
+    config: InlineParsingConfig,
+    line: InlineLine,
+    deadline: float | None,
+    log: Logger,
+) -> InlineLineResult:
+    async with semaphore:
+        # the step function fallback waits for the shared limiter longer
+        if config.aiRateLimit is not None and not await acquire_line_request(
+            config, deadline, log
+        ):
+            log.info(
+                "The AI rate limiter had no room for the inline parse",
+                extra={"ingredientId": line.ingredient.ingredientId},
+            )
+            return InlineLineResult(parsed=None, totalTokens=0)
+
+        try:
+            response = await asyncio.wait_for(
+                client.responses.create(
+                    **parse_request_body(
+                        [line.ingredient], line.lang, line.promptId, config.ai.model
+                    ),
+                    store=False,
+                ),
+                timeout=config.lineTimeout.total_seconds(),
+            )
+        except TimeoutError:
+            log.warning(
+                "Timed out parsing the ingredient line inline",
+                extra={"ingredientId": line.ingredient.ingredientId},
+            )
+            return InlineLineResult(parsed=None, totalTokens=0)
+        except RateLimitError as e:
+            log.warning(
+                "Rate limited parsing the ingredient line inline",
+                extra={"ingredientId": line.ingredient.ingredientId},
+            )
+
+            if config.aiRateLimit is not None and e.code != "insufficient_quota":
+                await record_line_request(config, True, log)
+
+            return InlineLineResult(parsed=None, totalTokens=0)
+        except OpenAIError:
+            log.warning(
+                "Unable to parse the ingredient line inline",
+                extra={"ingredientId": line.ingredient.ingredientId},
+                exc_info=True,
+            )
+            return InlineLineResult(parsed=None, totalTokens=0)
+
+        if config.aiRateLimit is not None:
+            await record_line_request(config, False, log)
+
+    parsedLines = read_parsed_lines([line.ingredient], response.output_text, log)
+
+    return InlineLineResult(
+        parsed=parsedLines.get(line.ingredient.ingredientId),
+        totalTokens=response.usage.total_tokens if response.usage is not None else 0,
+    )
+
+
+async def parse_lines(
+    config: InlineParsingConfig,
+    lines: list[InlineLine],
+    timeout: float | None,
+    log: Logger,
+) -> list[InlineLineResult]:
+    semaphore = asyncio.Semaphore(config.concurrency)
+    deadline = monotonic() + timeout if timeout is not None else None
+
+    # the line timeout bounds every attempt, retries are left to the step function fallback
+    async with AsyncOpenAI(
+        api_key=config.ai.api_key, base_url=config.ai.base_url, max_retries=0
+    ) as client:
+        tasks = [
+            asyncio.create_task(
+                parse_line(client, semaphore, config, line, deadline, log)
+            )
+            for line in lines
+        ]
+
+        # the lines still parsing when the invocation runs out of time are left to the step function
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+
+        if len(pending) > 0:
+            log.warning(
+                "Ran out of time parsing the ingredient lines inline",
+                extra={"pendingLines": len(pending)},
+            )
+
+            for task in pending:
+                task.cancel()
+
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        return [
+            InlineLineResult(parsed=None, totalTokens=0)
+            if task in pending
+            else task.result()
+            for task in tasks
+        ]
+
+
+def parse_batches_inline(
+    config: InlineParsingConfig,
+    batches: ProcessIngredientsInput,
+    timeout: float | None,
+    log: Logger,
+) -> list[ProcessedIngredientCollectionList] | None:
+    resolved: list[CachedLines] = []
+    lines: list[InlineLine] = []
+
+    for batch in batches:
+        lang = batch_lang(batch)
+        promptId = config.promptId.for_lang(lang)
+
+        cachedLines = resolve_cached_lines(
+            batch,
+            lang,
+            promptId,
+            config.ai.model,
+            config.parseCache,
+            config.localParseMinConfidence,
+            log,
+        )
+        resolved.append(cachedLines)
+
+        lines += [
+            InlineLine(
+                ingredient=ingredient,
+                lang=lang,
+                promptId=promptId,
+                cacheKey=cachedLines.cacheKeys[ingredient.ingredientId],
+            )
+            for ingredient in cachedLines.pendingIngredients
+        ]
+
+    if len(lines) > config.maxLines:
+        return None
+
+    start = perf_counter()
+    results = asyncio.run(parse_lines(config, lines, timeout, log)) if len(lines) > 0 else []
+    latencyMs = (perf_counter() - start) * 1000
+
+    parsed = {
+        line.ingredient.ingredientId: result.parsed
+        for line, result in zip(lines, results)
+        if result.parsed is not None
+    }
+
+    if len(parsed) > 0:
+        put_cached_parses(
+            config.parseCache,
+            {
+                line.cacheKey: parsed[line.ingredient.ingredientId].model_dump_json(
+                    include={"ingredients"}
+                )
+                for line in lines
+                if line.ingredient.ingredientId in parsed
+            },
+            sum(result.totalTokens for result in results) // len(parsed),
+            log,
+        )
+
+    log.info(
+        "Parsed the ingredient lines inline",
+        extra={"lines": len(lines), "parsed": len(parsed), "latencyMs": latencyMs},
+    )
+    metrics.add_metric(
+        name="InlineParseLatency", unit=MetricUnit.Milliseconds, value=latencyMs
+    )
+
+    # the parsed lines are cached, so the fallback only asks the AI for the rest
+    if len(parsed) < len(lines):
+        metrics.add_metric(name="InlineParseFallbacks", unit=MetricUnit.Count, value=1)
+        return None
+
+    metrics.add_metric(name="InlineParsedRecipes", unit=MetricUnit.Count, value=1)
+
+    return [
+        [
+            *cachedLines.cachedResults,
+            *(
+                ProcessedIngredientCollection(
+                    originalIngredient=ingredient,
+                    result=to_recipe_ingredients(parsed[ingredient.ingredientId]),
+                    status=IngredientParseStatus.ok,
+                )
+                for ingredient in cachedLines.pendingIngredients
+            ),
+        ]
+        for cachedLines in resolved
+    ]
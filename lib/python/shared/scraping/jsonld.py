@@ -0,0 +1,187 @@
+import json
+import re
+from typing import Any, Iterator
+from urllib.parse import urljoin
+from recipe_scrapers import SCRAPERS
+from recipe_scrapers._abstract import AbstractScraper
+from recipe_scrapers._utils import get_host_name, normalize_string
+
+jsonld_script_regex = re.compile(
+    r"""<script[^>]+type\s*=\s*["']?application/ld\+json["']?[^>]*>(.*?)</script\s*>""",
+    re.IGNORECASE | re.DOTALL,
+)
+
+html_lang_regex = re.compile(r"""<html[^>]+lang\s*=\s*["']?([\w\-]+)""", re.IGNORECASE)
+
+canonical_link_regex = re.compile(
+    r"""<link[^>]+rel\s*=\s*["']?canonical["']?[^>]*>""", re.IGNORECASE
+)
+
+href_regex = re.compile(r"""href\s*=\s*["']?([^"'\s>]+)""", re.IGNORECASE)
+
+# markup that recipe_scrapers uses to split ingredients into groups, which json-ld does not carry
+ingredient_group_markers = (
+    "wprm-recipe-group-name",
+    "wprm-recipe-ingredient-group",
+    "tasty-recipes-ingredients",
+)
+
+
+def _is_recipe_type(value: Any) -> bool:
+    types = value if isinstance(value, list) else [value]
+
+    return any(
+        isinstance(t, str) and t.rsplit("/", 1)[-1].rsplit(":", 1)[-1] == "Recipe"
+        for t in types
+    )
+
+
+def _walk(node: Any) -> Iterator[dict]:
+    if isinstance(node, list):
+        for item in node:
+            yield from _walk(item)
+    elif isinstance(node, dict):
+        if _is_recipe_type(node.get("@type")):
+            yield node
+
+        yield from _walk(node.get("@graph"))
+        yield from _walk(node.get("mainEntity"))
+
+
+def find_jsonld_recipes(html: str) -> Iterator[dict]:
+    for match in jsonld_script_regex.finditer(html):
+        try:
+            yield from _walk(json.loads(match.group(1), strict=False))
+        except ValueError:
+            continue
+
+
+def _text(value: Any) -> str | None:
+    if isinstance(value, list):
+        value = next((v for v in value if v), None)
+
+    if isinstance(value, dict):
+        value = value.get("text") or value.get("name")
+
+    if value is None or isinstance(value, (dict, list)):
+        return None
+
+    text = normalize_string(str(value))
+
+    return text or None
+
+
+def _image(value: Any) -> str | None:
+    if isinstance(value, list):
+        return next((img for img in map(_image, value) if img), None)
+
+    if isinstance(value, dict):
+        return _image(value.get("url") or value.get("contentUrl"))
+
+    if isinstance(value, str) and value.strip():
+        return value.strip()
+
+    return None
+
+
+def _category(value: Any) -> str | None:
+    if isinstance(value, list):
+        categories = [c for c in map(_text, value) if c]
+        return ",".join(categories) if categories else None
+
+    return _text(value)
+
+
+def _instructions(value: Any) -> list[str]:
+    match value:
+        case str():
+            return [
+                line
+                for line in (normalize_string(v) for v in value.split("\n"))
+                if line
+            ]
+        case list():
+            return [step for item in value for step in _instructions(item)]
+        case {"itemListElement": elements}:
+            return _instructions(elements)
+        case dict():
+            text = _text(value)
+            return [text] if text else []
+        case _:
+            return []
+
+
+def _language(recipe: dict, html: str) -> str | None:
+    language = _text(recipe.get("inLanguage"))
+
+    if language:
+        return language
+
+    match = html_lang_regex.search(html)
+
+    return match.group(1) if match else None
+
+
+def _canonical_url(recipe: dict, html: str, url: str) -> str:
+    linkTag = canonical_link_regex.search(html)
+
+    if linkTag is not None:
+        href = href_regex.search(linkTag.group(0))
+
+        if href is not None:
+            return urljoin(url, href.group(1))
+
+    recipeUrl = recipe.get("url")
+
+    if isinstance(recipeUrl, str) and recipeUrl.strip():
+        return urljoin(url, recipeUrl.strip())
+
+    return url
+
+
+def _host_has_custom_grouping(url: str) -> bool:
+    scraper = SCRAPERS.get(get_host_name(url))
+
+    return (
+        scraper is not None
+        and scraper.ingredient_groups is not AbstractScraper.ingredient_groups
+    )
+
+
+def extract_jsonld_fields(html: str, url: str) -> dict[str, Any] | None:
+    if any(marker in html for marker in ingredient_group_markers):
+        return None
+
+    if _host_has_custom_grouping(url):
+        return None
+
+    for recipe in find_jsonld_recipes(html):
+        title = _text(recipe.get("name"))
+        image = _image(recipe.get("image"))
+        language = _language(recipe, html)
+        instructions = _instructions(recipe.get("recipeInstructions"))
+        rawIngredients = recipe.get("recipeIngredient") or []
+        ingredients = [
+            ingredient
+            for ingredient in map(
+                _text,
+                rawIngredients if isinstance(rawIngredients, list) else [rawIngredients],
+            )
+            if ingredient
+        ]
+
+        if not (title and image and language and instructions and ingredients):
+            continue
+
+        return {
+            "title": title,
+            "image": image,
+            "language": language,
+            "canonical_url": _canonical_url(recipe, html, url),
+            "description": _text(recipe.get("description")),
+            "category": _category(recipe.get("recipeCategory")),
+            "ingredient_groups": [{"purpose": None, "ingredients": ingredients}],
+            "instructions_list": instructions,
+        }
+
+    return None
@@ -0,0 +1,626 @@
+from datetime import datetime
+import itertools
+from time import monotonic
+from typing import Iterable
+from urllib.error import HTTPError
+from uuid import uuid4
+from aws_lambda_powertools import Logger
+from aws_lambda_powertools.metrics import MetricUnit, single_metric
+import boto3
+from shared.models.DTO.ProcessIngredientsInput import (
+    IngredientBatchToProcessDTO,
+    IngredientToProcessDTO,
+    ProcessIngredientsInput,
+    ProcessIngredientsInputTypeAdapter,
+)
+from shared.models.DTO.ScrapeRecipeJob import ScrapeRecipeJob
+from shared.models.Ingredient import Ingredient
+from shared.models.RecipeScrapeStatus import RecipeScrapeStatus
+from shared.models.ScrapeFailureClass import ScrapeFailureClass
+from shared.models.SupportedLanguage import SupportedLanguage
+from shared.models.database.RecipeDbItem import PendingRecipeDbItem, RecipeDbItem
+from shared.models.database.ScrapeLeaseItem import ScrapeWaiter
+from shared.models.database.ScrapedRecipe import ScrapedRecipe
+from shared.models.environment.ScrapeEnvironment import ScrapeEnvironment
+from shared.models.exceptions.apiExceptions import UnableToParseRecipeException
+from shared.models.exceptions.fetchExceptions import (
+    PageFetchTimeoutException,
+    PageTooLargeException,
+)
+from shared.models.exceptions.scrapeExceptions import (
+    HostUnavailableException,
+    RecentScrapeFailureException,
+)
+from shared.scraping.archive import archive_page
+from shared.scraping.assemble import apply_parse_results, cache_assembled_recipe
+from shared.scraping.extract import ExtractionResult, extract_recipe
+from shared.scraping.failures import (
+    check_host_circuit,
+    get_recent_failures,
+    record_host_failure,
+    record_host_success,
+    record_url_failure,
+)
+from shared.scraping.inline_parsing import parse_batches_inline
+from shared.scraping.single_flight import (
+    claim_scrape_lease,
+    complete_scrape_waiters,
+    fail_scrape_waiters,
+    join_scrape_lease,
+    scrape_lease_key,
+)
+from shared.scraping.strategies import (
+    get_domain_strategy,
+    record_extraction_failure,
+    record_extraction_success,
+)
+from shared.utils.batch_parsing import enqueue_batch_parsing
+from shared.utils.buffered_metrics import BufferedMetrics
+from shared.utils.fetch import FetchResult, fetch_page
+from shared.utils.http_pool import HttpConnectionPool
+from shared.utils.messages import PushNotificationContent, get_messages
+from shared.utils.parse_cache import normalize_ingredient_text
+from shared.utils.recipe_cache import (
+    get_cached_recipe,
+    put_cached_recipe,
+    recipe_cache_key,
+    recipe_cache_keys,
+)
+from shared.utils.url import url_host
+
+metrics = BufferedMetrics()
+
+# claiming fails again when a running scrape completes between the claim and the join
+LEASE_ATTEMPTS = 3
+
+
+def failure_message(
+    failureClass: ScrapeFailureClass, statusCode: int | None = None
+) -> str:
+    match failureClass:
+        case ScrapeFailureClass.unableToParse:
+            return "Unable to parse the recipe"
+        case ScrapeFailureClass.httpError:
+            return f"Unable to load content from the provided url (received status code {statusCode})"
+        case ScrapeFailureClass.pageTooLarge:
+            return "The recipe page is too large"
+
+
+def describe_scrape_failure(e: Exception) -> str:
+    match e:
+        case RecentScrapeFailureException():
+            return failure_message(e.failureClass, e.statusCode)
+        case HostUnavailableException():
+            return "The recipe website is not responding, try again later"
+        case UnableToParseRecipeException():
+            return failure_message(ScrapeFailureClass.unableToParse)
+        case HTTPError():
+            return failure_message(ScrapeFailureClass.httpError, e.status)
+        case PageTooLargeException():
+            return failure_message(ScrapeFailureClass.pageTooLarge)
+        case PageFetchTimeoutException():
+            return "Timed out while loading content from the provided url"
+        case _:
+            return "Unable to load content from the provided url"
+
+
+def _assign_recipe_id(content: ScrapedRecipe, recipeId: str | None) -> ScrapedRecipe:
+    # async scrapes hand out the recipe id before the recipe is scraped
+    if recipeId is None:
+        return content
+
+    return content.model_copy(
+        update={"recipe": content.recipe.model_copy(update={"id": recipeId})}
+    )
+
+
+def create_notification_endpoint(
+    env: ScrapeEnvironment, notificationToken: str
+) -> str:
+    snsClient = boto3.client("sns")
+    # TODO: handle IOS - from useragent header or smth
+    result = snsClient.create_platform_endpoint(
+        PlatformApplicationArn=env.platformApplicationARN.android,
+        Token=notificationToken,
+    )
+
+    return result["EndpointArn"]
+
+
+def attach_notification_endpoint(
+    env: ScrapeEnvironment, item: RecipeDbItem, notificationToken: str
+):
+    item.NotificationEndpointARN = create_notification_endpoint(env, notificationToken)
+
+
+def ingredient_batches(
+    env: ScrapeEnvironment,
+    item: RecipeDbItem,
+    defaultToLang: SupportedLanguage,
+    ingredients: Iterable[Ingredient] | None = None,
+) -> ProcessIngredientsInput:
+    recipe = item.Content.recipe
+
+    if ingredients is None:
+        ingredients = itertools.chain.from_iterable(
+            group.ingredients for group in recipe.ingredientGroups
+        )
+
+    parseUnits: dict[str, IngredientToProcessDTO] = {}
+    duplicates = 0
+
+    for ingredient in ingredients:
+        lineKey = normalize_ingredient_text(ingredient.name)
+        parseUnit = parseUnits.get(lineKey)
+
+        # repeated lines, e.g. in the dough and the filling sections, are parsed once
+        if parseUnit is not None:
+            parseUnit.duplicateIngredientIds.append(ingredient.id)
+            duplicates += 1
+            continue
+
+        parseUnits[lineKey] = IngredientToProcessDTO(
+            content=ingredient.name,
+            recipeId=recipe.id,
+            ingredientId=ingredient.id,
+        )
+
+    if duplicates > 0:
+        metrics.add_metric(
+            name="DeduplicatedIngredientLines", unit=MetricUnit.Count, value=duplicates
+        )
+
+    return [
+        IngredientBatchToProcessDTO(
+            recipeId=recipe.id,
+            ingredients=list(batch),
+            defaultLang=defaultToLang,
+            lang=recipe.lang,
+            recipeExpiresAt=item.ExpiresAt,
+            ownerId=item.OwnerId,
+        )
+        for batch in itertools.batched(parseUnits.values(), env.parseBatchSize)
+    ]
+
+
+def start_ingredient_processing(
+    env: ScrapeEnvironment,
+    item: RecipeDbItem,
+    defaultToLang: SupportedLanguage,
+    ingredients: Iterable[Ingredient] | None = None,
+):
+    batches = ingredient_batches(env, item, defaultToLang, ingredients)
+
+    # coalesced scrapes may have waiters expecting a notification, so they are never deferred
+    if (
+        env.batchParsingQueueUrl is not None
+        and item.NotificationEndpointARN is None
+        and item.LeaseKey is None
+    ):
+        enqueue_batch_parsing(env.batchParsingQueueUrl, batches)
+        return
+
+    stepFnClient = boto3.client("stepfunctions")
+
+    stepFnClient.start_execution(
+        stateMachineArn=env.processIngredientStepFnArn,
+        input=ProcessIngredientsInputTypeAdapter.dump_json(
+            batches,
+            ensure_ascii=True,
+        ).decode("utf-8"),
+    )
+
+
+def record_field_metrics(extraction: ExtractionResult):
+    for fieldName, timeMs in extraction.fieldTimingsMs.items():
+        with single_metric(
+            name="ExtractionFieldTime", unit=MetricUnit.Milliseconds, value=timeMs
+        ) as metric:
+            metric.add_dimension(name="Field", value=fieldName)
+
+    for fieldName in extraction.fieldErrors:
+        with single_metric(
+            name="ExtractionFieldError", unit=MetricUnit.Count, value=1
+        ) as metric:
+            metric.add_dimension(name="Field", value=fieldName)
+
+
+def cached_recipe_item(
+    job: ScrapeRecipeJob, env: ScrapeEnvironment, log: Logger
+) -> RecipeDbItem | None:
+    cachedContent = get_cached_recipe(
+        env.recipeCacheTableName,
+        recipe_cache_key(job.url, job.parseIngredients, job.defaultToLang),
+    )
+
+    if cachedContent is None:
+        return None
+
+    log.info("Recipe cache hit", extra={"url": job.url})
+
+    recipeContent = _assign_recipe_id(cachedContent.with_fresh_ids(), job.recipeId)
+
+    return RecipeDbItem(
+        RecipeId=recipeContent.recipe.id,
+        Content=recipeContent,
+        IsComplete=True,
+        HasParsingSucceeded=True,
+        ExpiresAt=datetime.now() + env.recipeTTL,
+        NotificationEndpointARN=None,
+        OwnerId=job.ownerId,
+    )
+
+
+def fetch_recipe_page(
+    url: str,
+    env: ScrapeEnvironment,
+    *,
+    pool: HttpConnectionPool,
+    log: Logger,
+    headers: dict[str, str] | None = None,
+) -> FetchResult:
+    requestHost = url_host(url)
+
+    recentFailures = get_recent_failures(env.scrapeFailures, url, requestHost, log)
+    circuit = recentFailures.circuit
+
+    if recentFailures.urlFailure is not None:
+        log.info(
+            "Negative cache hit",
+            extra={
+                "url": url,
+                "failureClass": recentFailures.urlFailure.FailureClass.value,
+            },
+        )
+        metrics.add_metric(name="ScrapeNegativeCacheHit", unit=MetricUnit.Count, value=1)
+
+        raise RecentScrapeFailureException(
+            recentFailures.urlFailure.FailureClass,
+            recentFailures.urlFailure.StatusCode,
+        )
+
+    circuitCheck = check_host_circuit(env.scrapeFailures, requestHost, circuit, log)
+
+    if not circuitCheck.allowed:
+        log.info(
+            "Circuit open for host",
+            extra={"host": requestHost, "retryAfter": circuitCheck.retryAfter},
+        )
+        metrics.add_metric(name="ScrapeCircuitRejected", unit=MetricUnit.Count, value=1)
+
+        raise HostUnavailableException(requestHost, circuitCheck.retryAfter)
+
+    if circuitCheck.isProbe:
+        log.info("Probing host with an open circuit", extra={"host": requestHost})
+
+    try:
+        page = fetch_page(url, env.fetch, pool=pool, headers=headers)
+    except HTTPError as e:
+        record_url_failure(
+            env.scrapeFailures, url, ScrapeFailureClass.httpError, e.status, log
+        )
+
+        if e.status is not None and e.status >= 500:
+            record_host_failure(env.scrapeFailures, requestHost, log)
+        else:
+            record_host_success(env.scrapeFailures, requestHost, circuit, log)
+
+        raise
+    except PageTooLargeException:
+        record_url_failure(
+            env.scrapeFailures, url, ScrapeFailureClass.pageTooLarge, None, log
+        )
+        raise
+    except PageFetchTimeoutException:
+        record_host_failure(env.scrapeFailures, requestHost, log)
+        raise
+
+    record_host_success(env.scrapeFailures, requestHost, circuit, log)
+
+    log.info(
+        "Fetched the recipe page",
+        extra={
+            "url": page.url,
+            "statusCode": page.statusCode,
+            "charset": page.charset,
+            "bytesTransferred": page.bytesTransferred,
+            "connectionReused": page.connectionReused,
+            "timings": page.timings,
+            "connectionPool": pool.stats(),
+        },
+    )
+
+    return page
+
+
+def scrape_recipe_page(
+    job: ScrapeRecipeJob,
+    env: ScrapeEnvironment,
+    *,
+    pool: HttpConnectionPool,
+    log: Logger,
+) -> RecipeDbItem:
+    recipeExpiresAt = datetime.now() + env.recipeTTL
+
+    page = fetch_recipe_page(job.url, env, pool=pool, log=log)
+
+    archiveKey = archive_page(env.archive.bucket, page, env.archive.compression, log)
+
+    host = url_host(page.url)
+    domainStrategy = get_domain_strategy(env.domainStrategiesTableName, host, log)
+
+    try:
+        extraction = extract_recipe(
+            page.text,
+            page.url,
+            parseIngredients=job.parseIngredients,
+            preferredStrategy=domainStrategy.Strategy
+            if domainStrategy is not None
+            else None,
+        )
+    except UnableToParseRecipeException:
+        record_extraction_failure(
+            env.domainStrategiesTableName, host, domainStrategy, log
+        )
+        record_url_failure(
+            env.scrapeFailures, job.url, ScrapeFailureClass.unableToParse, None, log
+        )
+        raise
+
+    log.info(
+        "Extracted the recipe",
+        extra={
+            "strategy": extraction.strategy.value,
+            "failedStrategies": extraction.failedStrategies,
+            "extractionLatencyMs": extraction.latencyMs,
+            "fieldTimingsMs": extraction.fieldTimingsMs,
+            "fieldErrors": extraction.fieldErrors,
+        },
+    )
+    record_field_metrics(extraction)
+
+    record_extraction_success(
+        env.domainStrategiesTableName,
+        host,
+        extraction.strategy,
+        extraction.latencyMs,
+        env.domainStrategyTTL,
+        domainStrategy,
+        log,
+    )
+
+    recipe = extraction.recipe
+    recipeContent = extraction.to_scraped_recipe(job.parseIngredients)
+
+    cacheKeys = recipe_cache_keys(
+        job.url, page.url, recipe.url, job.parseIngredients, job.defaultToLang
+    )
+
+    if not job.parseIngredients:
+        put_cached_recipe(
+            env.recipeCacheTableName,
+            cacheKeys,
+            recipeContent,
+            datetime.now() + env.recipeCacheTTL,
+        )
+
+    recipeContent = _assign_recipe_id(recipeContent, job.recipeId)
+
+    return RecipeDbItem(
+        RecipeId=recipeContent.recipe.id,
+        Content=recipeContent,
+        IsComplete=not job.parseIngredients,
+        HasParsingSucceeded=None if job.parseIngredients else True,
+        ExpiresAt=recipeExpiresAt,
+        NotificationEndpointARN=None,
+        OwnerId=job.ownerId,
+        CacheKeys=cacheKeys if job.parseIngredients else [],
+        ArchiveKey=archiveKey,
+        SourceUrl=page.url,
+        SourceETag=page.headers.get("ETag"),
+        SourceLastModified=page.headers.get("Last-Modified"),
+    )
+
+
+def prepare_recipe(
+    job: ScrapeRecipeJob,
+    env: ScrapeEnvironment,
+    *,
+    pool: HttpConnectionPool,
+    log: Logger,
+) -> RecipeDbItem:
+    item = cached_recipe_item(job, env, log)
+
+    if item is not None:
+        return item
+
+    return scrape_recipe_page(job, env, pool=pool, log=log)
+
+
+def join_running_scrape(
+    env: ScrapeEnvironment, job: ScrapeRecipeJob, leaseKey: str, log: Logger
+) -> bool | None:
+    # True when joined as a waiter, False when the lease was claimed and None when scraping without it
+    assert env.scrapeLease is not None and job.recipeId is not None
+
+    waiter: ScrapeWaiter | None = None
+
+    for _ in range(LEASE_ATTEMPTS):
+        claimed = claim_scrape_lease(env.scrapeLease, leaseKey, job.recipeId, log)
+
+        if claimed is None:
+            return None
+
+        if claimed:
+            return False
+
+        if waiter is None:
+            waiter = ScrapeWaiter(
+                RecipeId=job.recipeId,
+                OwnerId=job.ownerId,
+                NotificationEndpointARN=create_notification_endpoint(
+                    env, job.notificationToken
+                )
+                if job.notificationToken is not None
+                else None,
+                ExpiresAt=datetime.now() + env.recipeTTL,
+            )
+
+            # stored before joining, so that it can not overwrite the copy made when the run completes
+            boto3.resource("dynamodb").Table(env.recipesTableName).put_item(
+                Item=PendingRecipeDbItem(
+                    RecipeId=job.recipeId,
+                    NotificationEndpointARN=None,
+                    OwnerId=job.ownerId,
+                    ExpiresAt=waiter.ExpiresAt,
+                    ScrapeStatus=RecipeScrapeStatus.pending,
+                ).model_dump(),
+                ReturnValues="NONE",
+            )
+
+        # the lease is gone when the running scrape completed in the meantime
+        if join_scrape_lease(env.scrapeLease, leaseKey, waiter, log):
+            log.info(
+                "Joined a running scrape of the same url",
+                extra={"url": job.url, "recipeId": job.recipeId},
+            )
+            metrics.add_metric(name="ScrapeCoalesced", unit=MetricUnit.Count, value=1)
+
+            return True
+
+    log.warning("Unable to claim or join the scrape lease", extra={"url": job.url})
+
+    return None
+
+
+def parse_recipe_inline(
+    env: ScrapeEnvironment,
+    item: RecipeDbItem,
+    defaultToLang: SupportedLanguage,
+    deadline: float | None,
+    log: Logger,
+) -> bool:
+    assert env.inlineParsing is not None
+
+    timeout = None
+
+    # the time left in the invocation, the recipe still has to be stored or handed to the step function after
+    if deadline is not None:
+        timeout = deadline - monotonic() - env.inlineParsing.timeMargin.total_seconds()
+
+        if timeout <= 0:
+            log.info("No time left to parse the ingredient lines inline")
+            return False
+
+    results = parse_batches_inline(
+        env.inlineParsing, ingredient_batches(env, item, defaultToLang), timeout, log
+    )
+
+    if results is None:
+        return False
+
+    apply_parse_results(item, itertools.chain.from_iterable(results), log)
+    cache_assembled_recipe(env.recipeCacheTableName, env.recipeCacheTTL, item)
+
+    return True
+
+
+def store_recipe(
+    job: ScrapeRecipeJob,
+    env: ScrapeEnvironment,
+    item: RecipeDbItem,
+    log: Logger,
+    *,
+    deadline: float | None = None,
+) -> str:
+    # small recipes skip the step function, the recipe is written once already parsed
+    parsedInline = (
+        not item.IsComplete
+        and env.inlineParsing is not None
+        and parse_recipe_inline(env, item, job.defaultToLang, deadline, log)
+    )
+
+    if not item.IsComplete and job.notificationToken is not None:
+        attach_notification_endpoint(env, item, job.notificationToken)
+
+    boto3.resource("dynamodb").Table(env.recipesTableName).put_item(
+        Item=item.model_dump(), ReturnValues="NONE"
+    )
+
+    if not item.IsComplete:
+        start_ingredient_processing(env, item, job.defaultToLang)
+    elif (
+        parsedInline
+        and env.inlineParsing is not None
+        and env.scrapeLease is not None
+        and item.LeaseKey is not None
+    ):
+        complete_scrape_waiters(
+            env.scrapeLease,
+            env.recipesTableName,
+            item,
+            get_messages(env.inlineParsing.notification, PushNotificationContent, log),
+            log,
+        )
+
+    log.info("Stored the scraped recipe", extra={"recipeId": item.RecipeId})
+
+    return item.RecipeId
+
+
+def run_scrape(
+    job: ScrapeRecipeJob,
+    env: ScrapeEnvironment,
+    *,
+    pool: HttpConnectionPool,
+    log: Logger,
+    deadline: float | None = None,
+) -> str:
+    item = cached_recipe_item(job, env, log)
+
+    if item is not None:
+        return store_recipe(job, env, item, log, deadline=deadline)
+
+    # only the ingredient parsing runs long enough for duplicates to pile up
+    if not job.parseIngredients or env.scrapeLease is None:
+        return store_recipe(
+            job,
+            env,
+            scrape_recipe_page(job, env, pool=pool, log=log),
+            log,
+            deadline=deadline,
+        )
+
+    job.recipeId = job.recipeId or str(uuid4())
+    leaseKey = scrape_lease_key(job.url, job.defaultToLang)
+
+    joined = join_running_scrape(env, job, leaseKey, log)
+
+    if joined:
+        return job.recipeId
+
+    # the waiters are only completed or failed by the run holding the lease
+    if joined is None:
+        return store_recipe(
+            job,
+            env,
+            scrape_recipe_page(job, env, pool=pool, log=log),
+            log,
+            deadline=deadline,
+        )
+
+    try:
+        item = scrape_recipe_page(job, env, pool=pool, log=log)
+        item.LeaseKey = leaseKey
+
+        return store_recipe(job, env, item, log, deadline=deadline)
+    except Exception as e:
+        fail_scrape_waiters(
+            env.scrapeLease,
+            env.recipesTableName,
+            leaseKey,
+            job.recipeId,
+            describe_scrape_failure(e),
+            log,
+        )
+        raise
@@ -0,0 +1,291 @@
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+import itertools
+from aws_lambda_powertools import Logger, Metrics
+from aws_lambda_powertools.metrics import MetricUnit
+import boto3
+from shared.models.Ingredient import Ingredient
+from shared.models.IngredientGroup import IngredientGroup
+from shared.models.IngredientParseStatus import IngredientParseStatus
+from shared.models.SupportedLanguage import SupportedLanguage
+from shared.models.database.PendingRecipeRefresh import PendingRecipeRefresh
+from shared.models.database.RecipeDbItem import RecipeDbItem
+from shared.models.database.ScrapedRecipe import ScrapedRecipe
+from shared.models.environment.ScrapeEnvironment import ScrapeEnvironment
+from shared.scraping.archive import archive_page
+from shared.scraping.extract import ExtractionResult, extract_recipe
+from shared.scraping.pipeline import (
+    fetch_recipe_page,
+    record_field_metrics,
+    start_ingredient_processing,
+)
+from shared.scraping.strategies import get_domain_strategy
+from shared.utils.http_pool import HttpConnectionPool
+from shared.utils.recipe_cache import (
+    is_cacheable,
+    put_cached_recipe,
+    recipe_cache_keys,
+)
+from shared.utils.url import url_host
+
+metrics = Metrics()
+
+NOT_MODIFIED = 304
+
+# a pending refresh can wait for the batch api for up to a day, after that it is considered lost
+PENDING_REFRESH_TIMEOUT = timedelta(days=1, hours=1)
+
+
+@dataclass
+class IngredientMerge:
+    content: ScrapedRecipe
+    changedIngredients: list[Ingredient]
+    reusedLines: int
+
+
+@dataclass
+class RefreshOutcome:
+    item: RecipeDbItem
+    changed: bool
+    changedIngredients: list[Ingredient] = field(default_factory=list)
+    cacheKeys: list[str] = field(default_factory=list)
+
+
+def were_ingredients_parsed(content: ScrapedRecipe) -> bool:
+    return any(
+        status != IngredientParseStatus.off
+        for status in content.ingredientStatuses.values()
+    )
+
+
+def is_refreshing(item: RecipeDbItem) -> bool:
+    return (
+        item.PendingRefresh is not None
+        and item.PendingRefresh.StartedAt.timestamp() + PENDING_REFRESH_TIMEOUT.total_seconds()
+        > datetime.now().timestamp()
+    )
+
+
+def conditional_headers(item: RecipeDbItem) -> dict[str, str]:
+    headers: dict[str, str] = {}
+
+    if item.SourceETag is not None:
+        headers["If-None-Match"] = item.SourceETag
+
+    if item.SourceLastModified is not None:
+        headers["If-Modified-Since"] = item.SourceLastModified
+
+    return headers
+
+
+def _previous_lines(content: ScrapedRecipe) -> dict[str, deque[list[Ingredient]]]:
+    lines: dict[str, deque[list[Ingredient]]] = defaultdict(deque)
+
+    for group in content.recipe.ingredientGroups:
+        # the ingredients parsed from a single line share its text and are stored next to each other
+        for line, ingredients in itertools.groupby(
+            group.ingredients, key=lambda ingredient: ingredient.originalText
+        ):
+            lines[line].append(list(ingredients))
+
+    return lines
+
+
+def merge_ingredients(
+    previous: ScrapedRecipe, extraction: ExtractionResult, parseIngredients: bool
+) -> IngredientMerge:
+    previousLines = _previous_lines(previous)
+    ingredientStatuses: dict[str, IngredientParseStatus] = {}
+    changedIngredients: list[Ingredient] = []
+    ingredientGroups: list[IngredientGroup] = []
+    reusedLines = 0
+
+    for group in extraction.recipe.ingredientGroups:
+        ingredients: list[Ingredient] = []
+
+        for ingredient in group.ingredients:
+            matches = previousLines.get(ingredient.originalText)
+
+            if matches:
+                carriedOver = matches.popleft()
+                ingredients.extend(carriedOver)
+                ingredientStatuses.update(
+                    (carried.id, previous.ingredientStatuses[carried.id])
+                    for carried in carriedOver
+                    if carried.id in previous.ingredientStatuses
+                )
+                reusedLines += 1
+                continue
+
+            ingredients.append(ingredient)
+
+            if parseIngredients:
+                changedIngredients.append(ingredient)
+            else:
+                ingredientStatuses[ingredient.id] = IngredientParseStatus.off
+
+        ingredientGroups.append(IngredientGroup(name=group.name, ingredients=ingredients))
+
+    return IngredientMerge(
+        content=ScrapedRecipe(
+            wildModeUsed=extraction.wildModeUsed,
+            recipe=extraction.recipe.model_copy(
+                update={
+                    "id": previous.recipe.id,
+                    "ingredientGroups": ingredientGroups,
+                }
+            ),
+            ingredientStatuses=ingredientStatuses,
+        ),
+        changedIngredients=changedIngredients,
+        reusedLines=reusedLines,
+    )
+
+
+def prepare_refresh(
+    item: RecipeDbItem,
+    env: ScrapeEnvironment,
+    *,
+    defaultToLang: SupportedLanguage,
+    pool: HttpConnectionPool,
+    log: Logger,
+) -> RefreshOutcome:
+    recipeExpiresAt = datetime.now() + env.recipeTTL
+    sourceUrl = item.SourceUrl or item.Content.recipe.url
+
+    page = fetch_recipe_page(
+        sourceUrl, env, pool=pool, log=log, headers=conditional_headers(item)
+    )
+
+    if page.statusCode == NOT_MODIFIED:
+        log.info("The recipe page has not changed", extra={"url": sourceUrl})
+        metrics.add_metric(name="RecipeRefreshNotModified", unit=MetricUnit.Count, value=1)
+
+        return RefreshOutcome(
+            item=item.model_copy(update={"ExpiresAt": recipeExpiresAt}),
+            changed=False,
+        )
+
+    archiveKey = archive_page(env.archive.bucket, page, env.archive.compression, log)
+
+    domainStrategy = get_domain_strategy(
+        env.domainStrategiesTableName, url_host(page.url), log
+    )
+    parseIngredients = were_ingredients_parsed(item.Content)
+
+    extraction = extract_recipe(
+        page.text,
+        page.url,
+        parseIngredients=parseIngredients,
+        preferredStrategy=domainStrategy.Strategy
+        if domainStrategy is not None
+        else None,
+    )
+
+    record_field_metrics(extraction)
+
+    merge = merge_ingredients(item.Content, extraction, parseIngredients)
+
+    log.info(
+        "Merged the refreshed ingredients",
+        extra={
+            "reusedLines": merge.reusedLines,
+            "changedIngredients": len(merge.changedIngredients),
+        },
+    )
+    metrics.add_metric(
+        name="RecipeRefreshReparsedIngredients",
+        unit=MetricUnit.Count,
+        value=len(merge.changedIngredients),
+    )
+
+    cacheKeys = (
+        item.CacheKeys
+        if parseIngredients
+        else recipe_cache_keys(
+            sourceUrl, page.url, extraction.recipe.url, False, defaultToLang
+        )
+    )
+
+    if len(merge.changedIngredients) > 0:
+        # the previous content stays complete and served until the changed lines are parsed
+        return RefreshOutcome(
+            item=item.model_copy(
+                update={
+                    "ExpiresAt": recipeExpiresAt,
+                    "NotificationEndpointARN": None,
+                    "LeaseKey": None,
+                    "PendingRefresh": PendingRecipeRefresh(
+                        Content=merge.content,
+                        StartedAt=datetime.now(),
+                        ArchiveKey=archiveKey or item.ArchiveKey,
+                        SourceUrl=page.url,
+                        SourceETag=page.headers.get("ETag"),
+                        SourceLastModified=page.headers.get("Last-Modified"),
+                    ),
+                }
+            ),
+            changed=True,
+            changedIngredients=merge.changedIngredients,
+            cacheKeys=cacheKeys,
+        )
+
+    return RefreshOutcome(
+        item=RecipeDbItem(
+            RecipeId=item.RecipeId,
+            Content=merge.content,
+            IsComplete=True,
+            HasParsingSucceeded=item.HasParsingSucceeded,
+            ExpiresAt=recipeExpiresAt,
+            NotificationEndpointARN=None,
+            OwnerId=item.OwnerId,
+            CacheKeys=item.CacheKeys,
+            ArchiveKey=archiveKey or item.ArchiveKey,
+            SourceUrl=page.url,
+            SourceETag=page.headers.get("ETag"),
+            SourceLastModified=page.headers.get("Last-Modified"),
+        ),
+        changed=True,
+        cacheKeys=cacheKeys,
+    )
+
+
+def run_refresh(
+    item: RecipeDbItem,
+    env: ScrapeEnvironment,
+    *,
+    defaultToLang: SupportedLanguage,
+    pool: HttpConnectionPool,
+    log: Logger,
+) -> RefreshOutcome:
+    outcome = prepare_refresh(
+        item, env, defaultToLang=defaultToLang, pool=pool, log=log
+    )
+    refreshed = outcome.item
+
+    boto3.resource("dynamodb").Table(env.recipesTableName).put_item(
+        Item=refreshed.model_dump(), ReturnValues="NONE"
+    )
+
+    if refreshed.PendingRefresh is not None:
+        start_ingredient_processing(
+            env,
+            refreshed.model_copy(update={"Content": refreshed.PendingRefresh.Content}),
+            defaultToLang,
+            outcome.changedIngredients,
+        )
+    elif len(outcome.cacheKeys) > 0 and is_cacheable(refreshed.Content):
+        put_cached_recipe(
+            env.recipeCacheTableName,
+            outcome.cacheKeys,
+            refreshed.Content,
+            datetime.now() + env.recipeCacheTTL,
+        )
+
+    log.info(
+        "Refreshed the recipe",
+        extra={"recipeId": refreshed.RecipeId, "changed": outcome.changed},
+    )
+
+    return outcome
@@ -0,0 +1,18 @@
+from shared.models.ExtractionStrategy import ExtractionStrategy
+from shared.models.database.ScrapedRecipe import ScrapedRecipe
+from shared.scraping.archive import ArchivedPage
+from shared.scraping.extract import extract_recipe
+
+
+def reprocess_archived_page(
+    page: ArchivedPage,
+    *,
+    parseIngredients: bool = False,
+    preferredStrategy: ExtractionStrategy | None = None,
+) -> ScrapedRecipe:
+    return extract_recipe(
+        page.text,
+        page.url,
+        parseIngredients=parseIngredients,
+        preferredStrategy=preferredStrategy,
+    ).to_scraped_recipe(parseIngredients)
@@ -0,0 +1,199 @@
+from datetime import datetime
+from aws_lambda_powertools import Logger, Metrics
+from aws_lambda_powertools.metrics import MetricUnit
+import boto3
+import botocore.exceptions
+from shared.models.RecipeScrapeStatus import RecipeScrapeStatus
+from shared.models.database.RecipeDbItem import PendingRecipeDbItem, RecipeDbItem
+from shared.models.database.ScrapeLeaseItem import ScrapeLeaseItem, ScrapeWaiter
+from shared.models.environment.ScrapeLeaseConfig import ScrapeLeaseConfig
+from shared.utils.messages import PushNotificationContent
+from shared.utils.notifications import send_recipe_notification
+from shared.utils.recipe_cache import recipe_cache_key
+
+metrics = Metrics()
+
+
+def scrape_lease_key(url: str, lang: str) -> str:
+    return recipe_cache_key(url, True, lang)
+
+
+def _is_condition_failure(e: botocore.exceptions.ClientError) -> bool:
+    return e.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException"
+
+
+def claim_scrape_lease(
+    config: ScrapeLeaseConfig, leaseKey: str, recipeId: str, log: Logger
+) -> bool | None:
+    now = datetime.now()
+
+    try:
+        # waiters of an expired lease are kept, the new leader completes them as well
+        boto3.resource("dynamodb").Table(config.tableName).update_item(
+            Key={ScrapeLeaseItem.get_primary_key_name(): leaseKey},
+            UpdateExpression="SET LeaderRecipeId = :recipeId, ExpiresAt = :expiresAt, Waiters = if_not_exists(Waiters, :noWaiters)",
+            ConditionExpression="attribute_not_exists(LeaseKey) OR ExpiresAt < :now",
+            ExpressionAttributeValues={
+                ":recipeId": recipeId,
+                ":expiresAt": int((now + config.ttl).timestamp()),
+                ":noWaiters": [],
+                ":now": int(now.timestamp()),
+            },
+            ReturnValues="NONE",
+        )
+    except botocore.exceptions.ClientError as e:
+        if _is_condition_failure(e):
+            return False
+
+        # None scrapes without the lease, nobody can wait for a lease that was never written
+        log.warning("Unable to claim the scrape lease", exc_info=True)
+        return None
+
+    return True
+
+
+def join_scrape_lease(
+    config: ScrapeLeaseConfig, leaseKey: str, waiter: ScrapeWaiter, log: Logger
+) -> bool:
+    try:
+        boto3.resource("dynamodb").Table(config.tableName).update_item(
+            Key={ScrapeLeaseItem.get_primary_key_name(): leaseKey},
+            UpdateExpression="SET Waiters = list_append(if_not_exists(Waiters, :noWaiters), :waiters)",
+            ConditionExpression="attribute_exists(LeaseKey) AND ExpiresAt >= :now",
+            ExpressionAttributeValues={
+                ":waiters": [waiter.model_dump()],
+                ":noWaiters": [],
+                ":now": int(datetime.now().timestamp()),
+            },
+            ReturnValues="NONE",
+        )
+    except botocore.exceptions.ClientError as e:
+        if not _is_condition_failure(e):
+            log.warning("Unable to join the scrape lease", exc_info=True)
+
+        return False
+
+    return True
+
+
+def release_scrape_lease(
+    config: ScrapeLeaseConfig, leaseKey: str, recipeId: str, log: Logger
+) -> list[ScrapeWaiter]:
+    try:
+        rawItem = (
+            boto3.resource("dynamodb")
+            .Table(config.tableName)
+            .delete_item(
+                Key={ScrapeLeaseItem.get_primary_key_name(): leaseKey},
+                ConditionExpression="LeaderRecipeId = :recipeId",
+                ExpressionAttributeValues={":recipeId": recipeId},
+                ReturnValues="ALL_OLD",
+            )
+            .get("Attributes")
+        )
+    except botocore.exceptions.ClientError as e:
+        # an expired lease taken over by another run is released by that run
+        if not _is_condition_failure(e):
+            log.warning("Unable to release the scrape lease", exc_info=True)
+
+        return []
+
+    return ScrapeLeaseItem.from_dynamo(rawItem).Waiters if rawItem is not None else []
+
+
+def waiter_recipe_item(item: RecipeDbItem, waiter: ScrapeWaiter) -> RecipeDbItem:
+    content = item.Content.with_fresh_ids()
+
+    return RecipeDbItem(
+        RecipeId=waiter.RecipeId,
+        Content=content.model_copy(
+            update={"recipe": content.recipe.model_copy(update={"id": waiter.RecipeId})}
+        ),
+        IsComplete=item.IsComplete,
+        HasParsingSucceeded=item.HasParsingSucceeded,
+        ExpiresAt=waiter.ExpiresAt,
+        NotificationEndpointARN=None,
+        OwnerId=waiter.OwnerId,
+        ArchiveKey=item.ArchiveKey,
+        SourceUrl=item.SourceUrl,
+        SourceETag=item.SourceETag,
+        SourceLastModified=item.SourceLastModified,
+    )
+
+
+def complete_scrape_waiters(
+    config: ScrapeLeaseConfig,
+    recipesTableName: str,
+    item: RecipeDbItem,
+    message: PushNotificationContent,
+    log: Logger,
+):
+    if item.LeaseKey is None:
+        return
+
+    waiters = release_scrape_lease(config, item.LeaseKey, item.RecipeId, log)
+
+    if len(waiters) == 0:
+        return
+
+    with boto3.resource("dynamodb").Table(recipesTableName).batch_writer() as batch:
+        for waiter in waiters:
+            batch.put_item(Item=waiter_recipe_item(item, waiter).model_dump())
+
+    for waiter in waiters:
+        if waiter.NotificationEndpointARN is not None:
+            send_recipe_notification(
+                waiter.NotificationEndpointARN, message, waiter.RecipeId
+            )
+
+    log.info(
+        "Completed the recipes waiting for the scrape",
+        extra={
+            "recipeId": item.RecipeId,
+            "waiterRecipeIds": [waiter.RecipeId for waiter in waiters],
+        },
+    )
+    metrics.add_metric(
+        name="ScrapeWaitersCompleted", unit=MetricUnit.Count, value=len(waiters)
+    )
+
+
+def fail_scrape_waiters(
+    config: ScrapeLeaseConfig,
+    recipesTableName: str,
+    leaseKey: str,
+    recipeId: str,
+    reason: str,
+    log: Logger,
+):
+    waiters = release_scrape_lease(config, leaseKey, recipeId, log)
+
+    if len(waiters) == 0:
+        return
+
+    with boto3.resource("dynamodb").Table(recipesTableName).batch_writer() as batch:
+        for waiter in waiters:
+            batch.put_item(
+                Item=PendingRecipeDbItem(
+                    RecipeId=waiter.RecipeId,
+                    NotificationEndpointARN=None,
+                    OwnerId=waiter.OwnerId,
+                    ExpiresAt=waiter.ExpiresAt,
+                    ScrapeStatus=RecipeScrapeStatus.failed,
+                    FailureReason=reason,
+                ).model_dump()
+            )
+
+    snsClient = boto3.client("sns")
+
+    for waiter in waiters:
+        if waiter.NotificationEndpointARN is not None:
+            snsClient.delete_endpoint(EndpointArn=waiter.NotificationEndpointARN)
+
+    log.info(
+        "Failed the recipes waiting for the scrape",
+        extra={
+            "recipeId": recipeId,
+            "waiterRecipeIds": [waiter.RecipeId for waiter in waiters],
+        },
+    )
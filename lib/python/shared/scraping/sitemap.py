@@ -0,0 +1,99 @@
+import gzip
+import io
+from typing import IO, Callable, Iterator
+from urllib.error import HTTPError
+from xml.etree import ElementTree
+import zlib
+from aws_lambda_powertools import Logger
+from shared.models.environment.FetchConfig import FetchConfig
+from shared.models.exceptions.fetchExceptions import PageFetchException
+from shared.utils.fetch import fetch_page
+from shared.utils.http_pool import HttpConnectionPool
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+sitemapExceptions = (
+    HTTPError,
+    PageFetchException,
+    ElementTree.ParseError,
+    OSError,
+    EOFError,
+    zlib.error,
+)
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _child_text(element: ElementTree.Element, name: str) -> str | None:
+    for child in element:
+        if _local_name(child.tag) == name and child.text:
+            return child.text.strip()
+
+    return None
+
+
+def _open_sitemap(content: bytes) -> io.BufferedIOBase:
+    # .xml.gz sitemaps are usually served as plain binary files, without a content encoding
+    stream = io.BytesIO(content)
+
+    return gzip.GzipFile(fileobj=stream) if content[:2] == GZIP_MAGIC else stream
+
+
+def iter_sitemap_urls(
+    url: str,
+    config: FetchConfig,
+    *,
+    pool: HttpConnectionPool,
+    log: Logger,
+    onError: Callable[[str, Exception], None],
+    maxDepth: int = 3,
+) -> Iterator[str]:
+    try:
+        page = fetch_page(url, config, pool=pool)
+
+        # entries are yielded as soon as they are parsed, and cleared right after
+        for _, element in ElementTree.iterparse(
+            _open_sitemap(page.content), events=("end",)
+        ):
+            match _local_name(element.tag):
+                case "url":
+                    location = _child_text(element, "loc")
+
+                    if location:
+                        yield location
+
+                    element.clear()
+                case "sitemap":
+                    location = _child_text(element, "loc")
+                    element.clear()
+
+                    if not location:
+                        continue
+
+                    if maxDepth <= 0:
+                        log.warning(
+                            "Sitemap nested too deeply", extra={"url": location}
+                        )
+                        continue
+
+                    yield from iter_sitemap_urls(
+                        location,
+                        config,
+                        pool=pool,
+                        log=log,
+                        onError=onError,
+                        maxDepth=maxDepth - 1,
+                    )
+    except sitemapExceptions as e:
+        # a broken sitemap only skips its own urls, the urls already yielded are kept
+        onError(url, e)
+
+
+def iter_seed_urls(lines: IO[str]) -> Iterator[str]:
+    for line in lines:
+        url = line.strip()
+
+        if url and not url.startswith("#"):
+            yield url
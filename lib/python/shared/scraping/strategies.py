@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta
+from aws_lambda_powertools import Logger
+import boto3
+import botocore.exceptions
+from pydantic import ValidationError
+from shared.models.ExtractionStrategy import ExtractionStrategy
+from shared.models.database.DomainStrategyItem import DomainStrategyItem
+from shared.utils.lru import LruCache
+
+LATENCY_SMOOTHING = 0.2
+
+_strategies = LruCache[str, DomainStrategyItem | None](
+    maxSize=512, ttl=timedelta(minutes=5)
+)
+
+
+def get_domain_strategy(
+    tableName: str, host: str, log: Logger
+) -> DomainStrategyItem | None:
+    if host in _strategies:
+        return _strategies.get(host)
+
+    table = boto3.resource("dynamodb").Table(tableName)
+
+    try:
+        rawItem = table.get_item(
+            Key={DomainStrategyItem.get_primary_key_name(): host},
+            ReturnConsumedCapacity="NONE",
+        ).get("Item")
+    except botocore.exceptions.ClientError:
+        log.warning("Unable to load the domain strategy", exc_info=True)
+        return None
+
+    item: DomainStrategyItem | None = None
+
+    if rawItem is not None:
+        try:
+            item = DomainStrategyItem.from_dynamo(rawItem)
+        except ValidationError:
+            log.warning("Invalid domain strategy item", extra={"item": rawItem})
+
+    # dynamodb ttl deletion is lazy, so expired items can still be returned
+    if item is not None and item.ExpiresAt.timestamp() <= datetime.now().timestamp():
+        item = None
+
+    _strategies.put(host, item)
+
+    return item
+
+
+def record_extraction_success(
+    tableName: str,
+    host: str,
+    strategy: ExtractionStrategy,
+    latencyMs: float,
+    ttl: timedelta,
+    previous: DomainStrategyItem | None,
+    log: Logger,
+):
+    table = boto3.resource("dynamodb").Table(tableName)
+    now = datetime.now()
+
+    try:
+        if previous is not None and previous.Strategy == strategy:
+            updated = previous.model_copy(
+                update={
+                    "SuccessCount": previous.SuccessCount + 1,
+                    "AverageLatencyMs": round(
+                        previous.AverageLatencyMs * (1 - LATENCY_SMOOTHING)
+                        + latencyMs * LATENCY_SMOOTHING
+                    ),
+                }
+            )
+
+            table.update_item(
+                Key={DomainStrategyItem.get_primary_key_name(): host},
+                UpdateExpression="ADD SuccessCount :one SET AverageLatencyMs = :latency",
+                ConditionExpression="attribute_exists(#host)",
+                ExpressionAttributeNames={"#host": "Host"},
+                ExpressionAttributeValues={
+                    ":one": 1,
+                    ":latency": updated.AverageLatencyMs,
+                },
+                ReturnValues="NONE",
+            )
+        else:
+            updated = DomainStrategyItem(
+                Host=host,
+                Strategy=strategy,
+                SuccessCount=1,
+                AverageLatencyMs=round(latencyMs),
+                LearnedAt=now,
+                ExpiresAt=now + ttl,
+            )
+
+            table.put_item(Item=updated.model_dump(), ReturnValues="NONE")
+
+        _strategies.put(host, updated)
+    except botocore.exceptions.ClientError:
+        log.warning("Unable to store the domain strategy", exc_info=True)
+        _strategies.pop(host)
+
+
+def record_extraction_failure(
+    tableName: str, host: str, previous: DomainStrategyItem | None, log: Logger
+):
+    if previous is None:
+        return
+
+    table = boto3.resource("dynamodb").Table(tableName)
+
+    try:
+        table.update_item(
+            Key={DomainStrategyItem.get_primary_key_name(): host},
+            UpdateExpression="ADD FailureCount :one",
+            ConditionExpression="attribute_exists(#host)",
+            ExpressionAttributeNames={"#host": "Host"},
+            ExpressionAttributeValues={":one": 1},
+            ReturnValues="NONE",
+        )
+    except botocore.exceptions.ClientError:
+        log.warning("Unable to store the domain strategy failure", exc_info=True)
+
+    _strategies.pop(host)
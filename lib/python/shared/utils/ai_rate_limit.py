@@ -0,0 +1,232 @@
+from decimal import Decimal
+import random
+from time import monotonic, sleep, time
+from aws_lambda_powertools import Logger
+from aws_lambda_powertools.metrics import MetricUnit
+import boto3
+import botocore.exceptions
+from shared.models.database.AiRateLimitItem import AiRateLimitItem
+from shared.models.environment.AiRateLimitConfig import AiRateLimitConfig
+from shared.models.exceptions.chatExceptions import AiRateLimitedException
+from shared.utils.buffered_metrics import BufferedMetrics
+
+metrics = BufferedMetrics()
+
+LIMITER_KEY = "openai"
+
+ATTRIBUTE_NAMES = {
+    "#rate": "Rate",
+    "#tokens": "Tokens",
+    "#refilledAt": "RefilledAt",
+    "#version": "Version",
+    "#lastDecreaseAt": "LastDecreaseAt",
+    "#throttles": "Throttles",
+    "#rejections": "Rejections",
+}
+
+
+def _decimal(value: float) -> Decimal:
+    return Decimal(str(round(value, 6)))
+
+
+def _is_conditional_check_failure(e: botocore.exceptions.ClientError) -> bool:
+    return e.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException"
+
+
+def _capacity(config: AiRateLimitConfig, rate: float) -> float:
+    return max(1.0, rate * config.burst.total_seconds())
+
+
+def _load_limiter(config: AiRateLimitConfig) -> AiRateLimitItem:
+    rawItem = (
+        boto3.resource("dynamodb")
+        .Table(config.tableName)
+        .get_item(
+            Key={AiRateLimitItem.get_primary_key_name(): LIMITER_KEY},
+            ConsistentRead=True,
+            ReturnConsumedCapacity="NONE",
+        )
+        .get("Item")
+    )
+
+    if rawItem is None:
+        return AiRateLimitItem(
+            LimiterKey=LIMITER_KEY,
+            Rate=config.initialRate,
+            Tokens=_capacity(config, config.initialRate),
+            RefilledAt=time(),
+            Version=0,
+        )
+
+    return AiRateLimitItem.from_dynamo(rawItem)
+
+
+def _take_token(config: AiRateLimitConfig, limiter: AiRateLimitItem, tokens: float):
+    boto3.resource("dynamodb").Table(config.tableName).update_item(
+        Key={AiRateLimitItem.get_primary_key_name(): LIMITER_KEY},
+        UpdateExpression="SET #tokens = :tokens, #refilledAt = :now, #version = :nextVersion, #rate = if_not_exists(#rate, :rate)",
+        ConditionExpression="attribute_not_exists(#version) OR #version = :version",
+        ExpressionAttributeNames={
+            name: ATTRIBUTE_NAMES[name]
+            for name in ["#tokens", "#refilledAt", "#version", "#rate"]
+        },
+        ExpressionAttributeValues={
+            ":tokens": _decimal(tokens - 1),
+            ":now": _decimal(time()),
+            ":version": limiter.Version,
+            ":nextVersion": limiter.Version + 1,
+            ":rate": _decimal(limiter.Rate),
+        },
+        ReturnValues="NONE",
+    )
+
+
+def _record_rejection(config: AiRateLimitConfig, log: Logger):
+    try:
+        boto3.resource("dynamodb").Table(config.tableName).update_item(
+            Key={AiRateLimitItem.get_primary_key_name(): LIMITER_KEY},
+            UpdateExpression="ADD #rejections :one",
+            ExpressionAttributeNames={"#rejections": ATTRIBUTE_NAMES["#rejections"]},
+            ExpressionAttributeValues={":one": 1},
+            ReturnValues="NONE",
+        )
+    except botocore.exceptions.ClientError:
+        log.warning("Unable to record the AI rate limiter rejection", exc_info=True)
+
+
+def acquire_ai_request(config: AiRateLimitConfig, log: Logger) -> float:
+    start = monotonic()
+
+    while True:
+        try:
+            limiter = _load_limiter(config)
+        except botocore.exceptions.ClientError:
+            # the limiter only smooths the load, the AI is still called when it is unavailable
+            log.warning("Unable to read the AI rate limiter", exc_info=True)
+            return monotonic() - start
+
+        tokens = min(
+            _capacity(config, limiter.Rate),
+            limiter.Tokens + max(0.0, time() - limiter.RefilledAt) * limiter.Rate,
+        )
+
+        if tokens >= 1:
+            try:
+                _take_token(config, limiter, tokens)
+            except botocore.exceptions.ClientError as e:
+                # another invocation changed the bucket in between
+                if _is_conditional_check_failure(e):
+                    continue
+
+                log.warning("Unable to update the AI rate limiter", exc_info=True)
+
+            waited = monotonic() - start
+
+            metrics.add_metric(
+                name="AiLimiterWaitTime",
+                unit=MetricUnit.Milliseconds,
+                value=waited * 1000,
+            )
+            metrics.add_metric(
+                name="AiLimiterWindow",
+                unit=MetricUnit.CountPerSecond,
+                value=limiter.Rate,
+            )
+
+            return waited
+
+        wait = (1 - tokens) / limiter.Rate
+
+        if monotonic() - start + wait > config.maxWait.total_seconds():
+            _record_rejection(config, log)
+            metrics.add_metric(name="AiLimiterRejected", unit=MetricUnit.Count, value=1)
+            log.warning(
+                "AI rate limiter wait exceeded",
+                extra={"rate": limiter.Rate, "waited": monotonic() - start},
+            )
+
+            raise AiRateLimitedException()
+
+        # jitter spreads the invocations woken up for the same refill
+        sleep(wait * random.uniform(1, 1.5))
+
+
+def record_ai_success(config: AiRateLimitConfig, log: Logger):
+    try:
+        boto3.resource("dynamodb").Table(config.tableName).update_item(
+            Key={AiRateLimitItem.get_primary_key_name(): LIMITER_KEY},
+            UpdateExpression="SET #rate = #rate + :increase",
+            ConditionExpression="#rate <= :maxRate",
+            ExpressionAttributeNames={"#rate": ATTRIBUTE_NAMES["#rate"]},
+            ExpressionAttributeValues={
+                ":increase": _decimal(config.increase),
+                ":maxRate": _decimal(config.maxRate - config.increase),
+            },
+            ReturnValues="NONE",
+        )
+    except botocore.exceptions.ClientError as e:
+        if not _is_conditional_check_failure(e):
+            log.warning("Unable to grow the AI rate limiter window", exc_info=True)
+
+
+def record_ai_throttle(config: AiRateLimitConfig, log: Logger):
+    metrics.add_metric(name="AiRateLimitHit", unit=MetricUnit.Count, value=1)
+    table = boto3.resource("dynamodb").Table(config.tableName)
+    now = time()
+
+    try:
+        limiter = _load_limiter(config)
+        rate = max(config.minRate, limiter.Rate * config.decreaseFactor)
+
+        # the bucket is emptied too, so the waiting invocations back off right away
+        table.update_item(
+            Key={AiRateLimitItem.get_primary_key_name(): LIMITER_KEY},
+            UpdateExpression="SET #rate = :rate, #tokens = :zero, #refilledAt = :now, #lastDecreaseAt = :now ADD #throttles :one, #version :one",
+            ConditionExpression="attribute_not_exists(#lastDecreaseAt) OR #lastDecreaseAt < :cooldownStart",
+            ExpressionAttributeNames={
+                name: ATTRIBUTE_NAMES[name]
+                for name in [
+                    "#rate",
+                    "#tokens",
+                    "#refilledAt",
+                    "#lastDecreaseAt",
+                    "#throttles",
+                    "#version",
+                ]
+            },
+            ExpressionAttributeValues={
+                ":rate": _decimal(rate),
+                ":zero": 0,
+                ":now": _decimal(now),
+                ":one": 1,
+                ":cooldownStart": _decimal(
+                    now - config.decreaseCooldown.total_seconds()
+                ),
+            },
+            ReturnValues="NONE",
+        )
+
+        log.info(
+            "Shrunk the AI rate limiter window",
+            extra={"previousRate": limiter.Rate, "rate": rate},
+        )
+        metrics.add_metric(
+            name="AiLimiterWindow", unit=MetricUnit.CountPerSecond, value=rate
+        )
+        return
+    except botocore.exceptions.ClientError as e:
+        if not _is_conditional_check_failure(e):
+            log.warning("Unable to shrink the AI rate limiter window", exc_info=True)
+            return
+
+    # already shrunk for this burst of 429s, only counted
+    try:
+        table.update_item(
+            Key={AiRateLimitItem.get_primary_key_name(): LIMITER_KEY},
+            UpdateExpression="ADD #throttles :one",
+            ExpressionAttributeNames={"#throttles": ATTRIBUTE_NAMES["#throttles"]},
+            ExpressionAttributeValues={":one": 1},
+            ReturnValues="NONE",
+        )
+    except botocore.exceptions.ClientError:
+        log.warning("Unable to record the AI rate limit hit", exc_info=True)
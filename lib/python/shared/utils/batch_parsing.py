@@ -0,0 +1,187 @@
+from collections import defaultdict
+from dataclasses import dataclass
+import itertools
+import json
+from typing import Any, Iterable
+from aws_lambda_powertools import Logger, Metrics
+from aws_lambda_powertools.metrics import MetricUnit
+import boto3
+import botocore.exceptions
+from shared.models.DTO.ProcessIngredientsInput import (
+    ProcessIngredientsInput,
+    ProcessIngredientsInputTypeAdapter,
+)
+from shared.models.DTO.ProcessedIngredient import ProcessIngredientsMapResult
+from shared.models.database.StoredResponse import StoredParseRequest
+from shared.models.environment.ParseCacheConfig import ParseCacheConfig
+from shared.utils.ingredient_parsing import (
+    cache_parsed_lines,
+    missing_ingredients,
+    parse_results,
+    parsed_lines,
+)
+
+metrics = Metrics()
+
+BATCH_ENDPOINT = "/v1/responses"
+
+BATCH_GET_LIMIT = 100
+
+
+@dataclass
+class BatchOutput:
+    outputText: str | None
+    totalTokens: int
+
+
+def enqueue_batch_parsing(queueUrl: str, batches: ProcessIngredientsInput):
+    # all batches of a recipe travel in one message, so that they end up in the same batch job
+    boto3.client("sqs").send_message(
+        QueueUrl=queueUrl,
+        MessageBody=ProcessIngredientsInputTypeAdapter.dump_json(
+            batches, ensure_ascii=True
+        ).decode("utf-8"),
+    )
+
+    metrics.add_metric(
+        name="IngredientParseBatchRecipesQueued", unit=MetricUnit.Count, value=1
+    )
+
+
+def batch_request_line(requestId: str, body: dict[str, Any]) -> str:
+    return json.dumps(
+        {"custom_id": requestId, "method": "POST", "url": BATCH_ENDPOINT, "body": body},
+        ensure_ascii=False,
+    )
+
+
+def read_batch_output(line: str) -> tuple[str, BatchOutput]:
+    data = json.loads(line)
+    response = data.get("response") or {}
+    body = response.get("body") or {}
+
+    if response.get("status_code") != 200 or body.get("status") != "completed":
+        return data["custom_id"], BatchOutput(outputText=None, totalTokens=0)
+
+    return data["custom_id"], BatchOutput(
+        outputText="".join(
+            content.get("text", "")
+            for item in body.get("output", [])
+            if item.get("type") == "message"
+            for content in item.get("content", [])
+            if content.get("type") == "output_text"
+        ),
+        totalTokens=(body.get("usage") or {}).get("total_tokens", 0),
+    )
+
+
+def get_parse_requests(
+    tableName: str, requestIds: Iterable[str]
+) -> list[StoredParseRequest]:
+    keyName = StoredParseRequest.get_primary_key_name()
+    requests: list[StoredParseRequest] = []
+
+    for chunk in itertools.batched(requestIds, BATCH_GET_LIMIT):
+        keys: list[dict[str, Any]] = [{keyName: requestId} for requestId in chunk]
+
+        while len(keys) > 0:
+            response = boto3.resource("dynamodb").batch_get_item(
+                RequestItems={tableName: {"Keys": keys}},
+                ReturnConsumedCapacity="NONE",
+            )
+
+            requests += [
+                StoredParseRequest.from_dynamo(rawItem)
+                for rawItem in response.get("Responses", {}).get(tableName, [])
+            ]
+            keys = (
+                response.get("UnprocessedKeys", {}).get(tableName, {}).get("Keys", [])
+            )
+
+    return requests
+
+
+def delete_parse_requests(tableName: str, requests: list[StoredParseRequest]):
+    keyName = StoredParseRequest.get_primary_key_name()
+
+    with boto3.resource("dynamodb").Table(tableName).batch_writer() as batch:
+        for request in requests:
+            batch.delete_item(Key={keyName: request.ResponseId})
+
+
+def complete_parse_requests(
+    requests: list[StoredParseRequest],
+    outputs: dict[str, BatchOutput],
+    *,
+    parseCache: ParseCacheConfig,
+    assembleRecipeFunctionName: str,
+    processIngredientStepFnArn: str,
+    log: Logger,
+    responsesTableName: str | None = None,
+):
+    recipes: dict[str, list[StoredParseRequest]] = defaultdict(list)
+
+    for request in requests:
+        recipes[request.OriginalBatchInput.recipeId].append(request)
+
+    completed = 0
+
+    for recipeId, recipeRequests in recipes.items():
+        results = []
+        isComplete = True
+
+        for request in recipeRequests:
+            output = outputs.get(request.ResponseId, BatchOutput(None, 0))
+            parsedLines = parsed_lines(request, output.outputText, log)
+
+            cache_parsed_lines(
+                parseCache, request, parsedLines, output.totalTokens, log
+            )
+
+            if len(missing_ingredients(request, parsedLines)) > 0:
+                isComplete = False
+
+            results.append(parse_results(request, parsedLines))
+
+        if isComplete:
+            boto3.client("lambda").invoke(
+                FunctionName=assembleRecipeFunctionName,
+                InvocationType="Event",
+                Payload=ProcessIngredientsMapResult(results=results).model_dump_json(),
+            )
+            completed += 1
+        else:
+            log.warning(
+                "The batch did not parse every ingredient line of the recipe, falling back to the step function",
+                extra={"recipeId": recipeId},
+            )
+
+            # the step function retries the missing lines, the parsed ones are served from the parse cache
+            try:
+                boto3.client("stepfunctions").start_execution(
+                    stateMachineArn=processIngredientStepFnArn,
+                    name=recipeRequests[0].ResponseId,
+                    input=ProcessIngredientsInputTypeAdapter.dump_json(
+                        [request.OriginalBatchInput for request in recipeRequests],
+                        ensure_ascii=True,
+                    ).decode("utf-8"),
+                )
+            except botocore.exceptions.ClientError as e:
+                # the execution name makes a repeated start of the same recipe a no-op
+                if e.response.get("Error", {}).get("Code") != "ExecutionAlreadyExists":
+                    raise
+
+        # a retried job only completes the recipes that were not handed over yet
+        if responsesTableName is not None:
+            delete_parse_requests(responsesTableName, recipeRequests)
+
+    metrics.add_metric(
+        name="IngredientParseBatchRecipesCompleted",
+        unit=MetricUnit.Count,
+        value=completed,
+    )
+    metrics.add_metric(
+        name="IngredientParseBatchFallbacks",
+        unit=MetricUnit.Count,
+        value=len(recipes) - completed,
+    )
@@ -0,0 +1,57 @@
+from contextlib import contextmanager
+from dataclasses import dataclass
+import threading
+from typing import Iterator
+from aws_lambda_powertools import Metrics
+from aws_lambda_powertools.metrics import MetricResolution, MetricUnit
+
+_local = threading.local()
+
+
+@dataclass
+class BufferedMetric:
+    name: str
+    unit: MetricUnit | str
+    value: float
+    resolution: MetricResolution | int
+
+
+class BufferedMetrics(Metrics):
+    # the powertools metric set is shared and not thread safe, so worker threads write to their own buffer
+    def add_metric(
+        self,
+        name: str,
+        unit: MetricUnit | str,
+        value: float,
+        resolution: MetricResolution | int = 60,
+    ) -> None:
+        buffer: list[BufferedMetric] | None = getattr(_local, "buffer", None)
+
+        if buffer is None:
+            super().add_metric(name=name, unit=unit, value=value, resolution=resolution)
+            return
+
+        buffer.append(BufferedMetric(name, unit, value, resolution))
+
+
+@contextmanager
+def buffer_metrics() -> Iterator[list[BufferedMetric]]:
+    buffer: list[BufferedMetric] = []
+    _local.buffer = buffer
+
+    try:
+        yield buffer
+    finally:
+        del _local.buffer
+
+
+def emit_metrics(buffer: list[BufferedMetric]):
+    metrics = Metrics()
+
+    for metric in buffer:
+        metrics.add_metric(
+            name=metric.name,
+            unit=metric.unit,
+            value=metric.value,
+            resolution=metric.resolution,
+        )
@@ -10,6 +10,12 @@ def dump_response(func):
         if isinstance(result, BaseModel):
             return result.model_dump()
 
+        if isinstance(result, list):
+            return [
+                item.model_dump() if isinstance(item, BaseModel) else item
+                for item in result
+            ]
+
         return result
 
     return wrapper
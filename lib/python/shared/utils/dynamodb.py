@@ -75,4 +75,6 @@ class DynamoDBItemNotFoundException(Exception):
     pass
 
 
-TTLField = Annotated[datetime, PlainSerializer(lambda x: int(x.timestamp()))]
+EpochDatetime = Annotated[datetime, PlainSerializer(lambda x: int(x.timestamp()))]
+
+TTLField = EpochDatetime
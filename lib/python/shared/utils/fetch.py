@@ -0,0 +1,383 @@
+import codecs
+from dataclasses import dataclass, field
+from email.message import Message
+from http.client import HTTPResponse, RemoteDisconnected
+import re
+import socket
+from time import monotonic
+from typing import Callable
+from urllib.error import HTTPError
+from urllib.parse import urljoin, urlsplit
+import zlib
+from aws_lambda_powertools.metrics import MetricUnit
+import brotli
+from shared.models.environment.FetchConfig import FetchConfig
+from shared.models.exceptions.fetchExceptions import (
+    PageFetchException,
+    PageFetchTimeoutException,
+    PageTooLargeException,
+)
+from shared.utils.buffered_metrics import BufferedMetrics
+from shared.utils.http_pool import HttpConnectionPool
+
+metrics = BufferedMetrics()
+
+CHUNK_SIZE = 64 * 1024
+
+DECODE_STEP = 1024 * 1024
+
+CHARSET_SNIFF_BYTES = 4096
+
+REDIRECT_STATUS_CODES = {301, 302, 303, 307, 308}
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (compatible; recipe-scraper/1.0)",
+    "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+    "Accept-Encoding": "gzip, deflate, br",
+}
+
+meta_charset_regex = re.compile(
+    rb"""<meta[^>]+charset\s*=\s*["']?\s*([a-zA-Z0-9_\-:.]+)""", re.IGNORECASE
+)
+
+boms = [
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+]
+
+
+@dataclass
+class FetchTimings:
+    connectMs: float = 0
+    firstByteMs: float = 0
+    totalMs: float = 0
+
+
+@dataclass
+class FetchResult:
+    url: str
+    statusCode: int
+    headers: Message
+    content: bytes
+    charset: str
+    bytesTransferred: int
+    connectionReused: bool
+    timings: FetchTimings = field(default_factory=FetchTimings)
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.charset, errors="replace")
+
+
+class _Decoder:
+    def __init__(self, contentEncoding: str | None):
+        self._flush: Callable[[], bytes] = lambda: b""
+
+        match (contentEncoding or "identity").strip().lower():
+            case "gzip" | "x-gzip":
+                self._use_zlib(16 + zlib.MAX_WBITS)
+            case "deflate":
+                self._use_zlib(zlib.MAX_WBITS)
+            case "br":
+                self._use_brotli()
+            case "identity":
+                self._process = lambda data, limit: (data, None)
+            case other:
+                raise PageFetchException(f"Unsupported content encoding: {other}")
+
+    def _use_zlib(self, wbits: int):
+        decompressor = zlib.decompressobj(wbits)
+
+        def process(data: bytes, limit: int) -> tuple[bytes, bytes | None]:
+            decoded = decompressor.decompress(data, limit)
+
+            # a full output can leave input in the tail or output in the inflate state
+            if decompressor.unconsumed_tail or len(decoded) >= limit:
+                return decoded, decompressor.unconsumed_tail
+
+            return decoded, None
+
+        self._process = process
+        self._flush = decompressor.flush
+
+    def _use_brotli(self):
+        decompressor = brotli.Decompressor()
+
+        def process(data: bytes, limit: int) -> tuple[bytes, bytes | None]:
+            decoded = decompressor.process(data, output_buffer_limit=limit)
+
+            if decompressor.can_accept_more_data():
+                return decoded, None
+
+            return decoded, b""
+
+        self._process = process
+
+    def decode(self, data: bytes, limit: int) -> tuple[bytes, bytes | None]:
+        # returns at most about limit bytes and the input to pass to the next call, None once the data is decoded
+        return self._process(data, limit)
+
+    def flush(self) -> bytes:
+        return self._flush()
+
+
+def detect_charset(headers: Message, content: bytes) -> str:
+    candidates: list[str | None] = [headers.get_content_charset()]
+
+    for bom, bomCharset in boms:
+        if content.startswith(bom):
+            candidates.insert(0, bomCharset)
+
+    metaMatch = meta_charset_regex.search(content[:CHARSET_SNIFF_BYTES])
+
+    if metaMatch is not None:
+        candidates.append(metaMatch.group(1).decode("ascii", errors="ignore"))
+
+    for candidate in candidates:
+        if not candidate:
+            continue
+
+        try:
+            return codecs.lookup(candidate).name
+        except LookupError:
+            continue
+
+    return "utf-8"
+
+
+def _limit_wait(sock: socket.socket, config: FetchConfig, deadline: float):
+    # a server trickling bytes would otherwise keep every single read alive for the whole read timeout
+    remaining = deadline - monotonic()
+
+    if remaining <= 0:
+        raise PageFetchTimeoutException("Page download took too long")
+
+    sock.settimeout(min(config.readTimeout.total_seconds(), remaining))
+
+
+def _read_body(
+    response: HTTPResponse,
+    sock: socket.socket,
+    config: FetchConfig,
+    deadline: float,
+) -> tuple[bytes, int]:
+    contentLength = response.getheader("Content-Length")
+
+    if contentLength is not None and contentLength.isdigit():
+        if int(contentLength) > config.maxBytes:
+            raise PageTooLargeException(
+                f"Declared content length {contentLength} exceeds {config.maxBytes} bytes"
+            )
+
+    decoder = _Decoder(response.getheader("Content-Encoding"))
+    chunks: list[bytes] = []
+    bytesTransferred = 0
+    remaining = config.maxBytes
+
+    while True:
+        _limit_wait(sock, config, deadline)
+
+        # read1 waits on the socket at most once, so a read can not outlast the deadline
+        chunk = response.read1(CHUNK_SIZE)
+
+        if not chunk:
+            break
+
+        bytesTransferred += len(chunk)
+
+        if bytesTransferred > config.maxBytes:
+            raise PageTooLargeException(f"Page exceeds {config.maxBytes} bytes")
+
+        data: bytes | None = chunk
+
+        # a small compressed chunk can expand to gigabytes, so it is decoded in bounded steps
+        while data is not None:
+            if monotonic() > deadline:
+                raise PageFetchTimeoutException("Page download took too long")
+
+            decoded, data = decoder.decode(data, min(remaining + 1, DECODE_STEP))
+            remaining -= len(decoded)
+
+            if remaining < 0:
+                raise PageTooLargeException(f"Page exceeds {config.maxBytes} bytes")
+
+            chunks.append(decoded)
+
+    flushed = decoder.flush()
+
+    if len(flushed) > remaining:
+        raise PageTooLargeException(f"Page exceeds {config.maxBytes} bytes")
+
+    chunks.append(flushed)
+
+    return b"".join(chunks), bytesTransferred
+
+
+def _target(url: str) -> tuple[str, str, int | None, str]:
+    parts = urlsplit(url)
+
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise PageFetchException(f"Unsupported url: {url}")
+
+    path = parts.path or "/"
+
+    if parts.query:
+        path += f"?{parts.query}"
+
+    return parts.scheme, parts.hostname, parts.port, path
+
+
+class _StaleConnectionError(Exception):
+    pass
+
+
+@dataclass
+class _Response:
+    url: str
+    status: int
+    headers: Message
+    content: bytes = b""
+    bytesTransferred: int = 0
+    connectionReused: bool = False
+    location: str | None = None
+
+
+def _request(
+    url: str,
+    config: FetchConfig,
+    pool: HttpConnectionPool,
+    headers: dict[str, str],
+    deadline: float,
+    timings: FetchTimings,
+    start: float,
+    *,
+    allowReuse: bool = True,
+) -> _Response:
+    scheme, host, port, path = _target(url)
+
+    connectStart = monotonic()
+
+    with pool.connection(scheme, host, port, config, allowReuse=allowReuse) as pooled:
+        timings.connectMs += (monotonic() - connectStart) * 1000
+
+        sock = pooled.connection.sock
+        assert sock is not None
+
+        try:
+            _limit_wait(sock, config, deadline)
+            pooled.connection.request("GET", path, headers=headers)
+            response = pooled.connection.getresponse()
+        except (RemoteDisconnected, ConnectionResetError, BrokenPipeError) as e:
+            if pooled.reused:
+                raise _StaleConnectionError() from e
+
+            raise
+
+        timings.firstByteMs = (monotonic() - start) * 1000
+
+        location = response.getheader("Location")
+
+        if response.status in REDIRECT_STATUS_CODES and location:
+            return _Response(
+                url=url,
+                status=response.status,
+                headers=response.msg,
+                location=location,
+            )
+
+        if response.status >= 400:
+            raise HTTPError(url, response.status, response.reason, response.msg, None)
+
+        content, bytesTransferred = _read_body(response, sock, config, deadline)
+
+        pooled.reusable = not response.will_close
+
+        return _Response(
+            url=url,
+            status=response.status,
+            headers=response.msg,
+            content=content,
+            bytesTransferred=bytesTransferred,
+            connectionReused=pooled.reused,
+        )
+
+
+def fetch_page(
+    url: str,
+    config: FetchConfig,
+    *,
+    pool: HttpConnectionPool,
+    headers: dict[str, str] | None = None,
+) -> FetchResult:
+    start = monotonic()
+    deadline = start + config.totalTimeout.total_seconds()
+    timings = FetchTimings()
+    requestHeaders = {**DEFAULT_HEADERS, **(headers or {})}
+
+    try:
+        for _ in range(config.maxRedirects + 1):
+            try:
+                response = _request(
+                    url, config, pool, requestHeaders, deadline, timings, start
+                )
+            except _StaleConnectionError:
+                # the server closed the kept-alive connection in the meantime
+                response = _request(
+                    url,
+                    config,
+                    pool,
+                    requestHeaders,
+                    deadline,
+                    timings,
+                    start,
+                    allowReuse=False,
+                )
+
+            if response.location is not None:
+                url = urljoin(url, response.location)
+                continue
+
+            timings.totalMs = (monotonic() - start) * 1000
+
+            result = FetchResult(
+                url=url,
+                statusCode=response.status,
+                headers=response.headers,
+                content=response.content,
+                charset=detect_charset(response.headers, response.content),
+                bytesTransferred=response.bytesTransferred,
+                connectionReused=response.connectionReused,
+                timings=timings,
+            )
+
+            metrics.add_metric(
+                name="PageFetchConnectTime",
+                unit=MetricUnit.Milliseconds,
+                value=timings.connectMs,
+            )
+            metrics.add_metric(
+                name="PageFetchFirstByteTime",
+                unit=MetricUnit.Milliseconds,
+                value=timings.firstByteMs,
+            )
+            metrics.add_metric(
+                name="PageFetchTotalTime",
+                unit=MetricUnit.Milliseconds,
+                value=timings.totalMs,
+            )
+            metrics.add_metric(
+                name="PageFetchBytesTransferred",
+                unit=MetricUnit.Bytes,
+                value=response.bytesTransferred,
+            )
+
+            return result
+    except (socket.timeout, TimeoutError) as e:
+        raise PageFetchTimeoutException(f"Timed out while fetching {url}") from e
+    except HTTPError:
+        raise
+    except (OSError, zlib.error, brotli.error) as e:
+        raise PageFetchException(f"Unable to fetch {url}") from e
+
+    raise PageFetchException(f"Too many redirects while fetching {url}")
@@ -0,0 +1,151 @@
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from http.client import HTTPConnection, HTTPSConnection
+import ssl
+from threading import BoundedSemaphore, Lock
+from time import monotonic
+from typing import Iterator
+from aws_lambda_powertools.metrics import MetricUnit
+from shared.models.environment.FetchConfig import FetchConfig
+from shared.models.exceptions.fetchExceptions import PageFetchTimeoutException
+from shared.utils.buffered_metrics import BufferedMetrics
+
+metrics = BufferedMetrics()
+
+_ssl_context = ssl.create_default_context()
+
+HostKey = tuple[str, str, int | None]
+
+
+def open_connection(
+    scheme: str, host: str, port: int | None, config: FetchConfig
+) -> HTTPConnection:
+    connection = (
+        HTTPSConnection(
+            host,
+            port,
+            timeout=config.connectTimeout.total_seconds(),
+            context=_ssl_context,
+        )
+        if scheme == "https"
+        else HTTPConnection(host, port, timeout=config.connectTimeout.total_seconds())
+    )
+    connection.connect()
+
+    assert connection.sock is not None
+    connection.sock.settimeout(config.readTimeout.total_seconds())
+
+    return connection
+
+
+@dataclass
+class PooledConnection:
+    connection: HTTPConnection
+    reused: bool
+    reusable: bool = False
+
+
+@dataclass
+class _IdleConnection:
+    connection: HTTPConnection
+    releasedAt: float
+
+
+class HttpConnectionPool:
+    def __init__(self):
+        self._lock = Lock()
+        self._idle: dict[HostKey, deque[_IdleConnection]] = {}
+        self._slots: dict[HostKey, BoundedSemaphore] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "idle": sum(len(idle) for idle in self._idle.values()),
+            }
+
+    def _slot(self, key: HostKey, config: FetchConfig) -> BoundedSemaphore:
+        with self._lock:
+            if key not in self._slots:
+                self._slots[key] = BoundedSemaphore(config.maxConnectionsPerHost)
+
+            return self._slots[key]
+
+    def _take_idle(self, key: HostKey, config: FetchConfig) -> HTTPConnection | None:
+        maxIdleSeconds = config.poolIdleTimeout.total_seconds()
+
+        with self._lock:
+            idle = self._idle.get(key)
+
+            while idle:
+                candidate = idle.pop()
+
+                if monotonic() - candidate.releasedAt < maxIdleSeconds:
+                    return candidate.connection
+
+                candidate.connection.close()
+
+        return None
+
+    def _put_idle(self, key: HostKey, connection: HTTPConnection):
+        with self._lock:
+            self._idle.setdefault(key, deque()).append(
+                _IdleConnection(connection=connection, releasedAt=monotonic())
+            )
+
+    @contextmanager
+    def connection(
+        self,
+        scheme: str,
+        host: str,
+        port: int | None,
+        config: FetchConfig,
+        *,
+        allowReuse: bool = True,
+    ) -> Iterator[PooledConnection]:
+        key = (scheme, host, port)
+        slot = self._slot(key, config)
+
+        if not slot.acquire(timeout=config.totalTimeout.total_seconds()):
+            raise PageFetchTimeoutException(
+                f"Timed out waiting for a free connection to {host}"
+            )
+
+        try:
+            connection = self._take_idle(key, config) if allowReuse else None
+
+            if connection is not None:
+                assert connection.sock is not None
+                connection.sock.settimeout(config.readTimeout.total_seconds())
+                pooled = PooledConnection(connection=connection, reused=True)
+            else:
+                pooled = PooledConnection(
+                    connection=open_connection(scheme, host, port, config),
+                    reused=False,
+                )
+
+            with self._lock:
+                if pooled.reused:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+
+            metrics.add_metric(
+                name="HttpPoolHit" if pooled.reused else "HttpPoolMiss",
+                unit=MetricUnit.Count,
+                value=1,
+            )
+
+            try:
+                yield pooled
+            finally:
+                if pooled.reusable:
+                    self._put_idle(key, pooled.connection)
+                else:
+                    pooled.connection.close()
+        finally:
+            slot.release()
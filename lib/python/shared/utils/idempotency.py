@@ -0,0 +1,218 @@
+from datetime import datetime
+import functools
+import hashlib
+import json
+from time import monotonic, sleep
+from typing import Any
+from aws_lambda_powertools import Logger, Metrics
+from aws_lambda_powertools.metrics import MetricUnit
+from aws_lambda_powertools.utilities.parser import parse
+from aws_lambda_powertools.utilities.parser.models import APIGatewayProxyEventV2Model
+import boto3
+import botocore
+import botocore.exceptions
+from pydantic import ValidationError
+from shared.models.IdempotencyStatus import IdempotencyStatus
+from shared.models.database.IdempotencyItem import IdempotencyItem
+from shared.models.environment.IdempotencyBaseEnv import IdempotencyBaseEnv
+from shared.models.environment.IdempotencyConfig import IdempotencyConfig
+from shared.models.responses.HttpResponse import (
+    BadRequestResponse,
+    ConflictResponse,
+    UnprocessableEntityResponse,
+)
+from .openapi import OpenApiMetadata, openapi_meta_key_name
+from .verify_quota import InvalidClaimsError, get_cognito_claims
+
+metrics = Metrics()
+
+IDEMPOTENCY_KEY_HEADER = "idempotency-key"
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+MAX_KEY_LENGTH = 255
+
+
+def _request_hash(event: APIGatewayProxyEventV2Model) -> str:
+    return hashlib.sha256(
+        json.dumps([event.rawPath, event.rawQueryString, event.body or ""]).encode()
+    ).hexdigest()
+
+
+def _is_replayable(response: Any) -> bool:
+    # server errors and quota rejections are not final, a retry may succeed
+    if not isinstance(response, dict):
+        return False
+
+    statusCode = response.get("statusCode", 500)
+
+    return statusCode < 500 and statusCode != 429
+
+
+def _replay(item: IdempotencyItem) -> dict[str, Any]:
+    response = json.loads(item.Response or "{}")
+    response["headers"] = {**response.get("headers", {}), REPLAYED_HEADER: "true"}
+
+    metrics.add_metric(name="IdempotentReplay", unit=MetricUnit.Count, value=1)
+
+    return response
+
+
+def _claim(
+    table, config: IdempotencyConfig, itemKey: str, requestHash: str
+) -> bool:
+    now = datetime.now()
+
+    try:
+        table.put_item(
+            Item=IdempotencyItem(
+                IdempotencyKey=itemKey,
+                RequestHash=requestHash,
+                Status=IdempotencyStatus.inProgress,
+                InProgressUntil=now + config.inProgressTimeout,
+                ExpiresAt=now + config.ttl,
+            ).model_dump(),
+            # expired records and abandoned claims can be taken over
+            ConditionExpression="attribute_not_exists(IdempotencyKey) OR ExpiresAt < :now OR (#status = :inProgress AND InProgressUntil < :now)",
+            ExpressionAttributeNames={"#status": "Status"},
+            ExpressionAttributeValues={
+                ":now": int(now.timestamp()),
+                ":inProgress": IdempotencyStatus.inProgress.value,
+            },
+            ReturnValues="NONE",
+        )
+    except botocore.exceptions.ClientError as e:
+        if e.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException":
+            return False
+
+        raise
+
+    return True
+
+
+def _get_record(table, itemKey: str) -> IdempotencyItem | None:
+    rawItem = table.get_item(
+        Key={IdempotencyItem.get_primary_key_name(): itemKey},
+        ConsistentRead=True,
+        ReturnConsumedCapacity="NONE",
+    ).get("Item")
+
+    return IdempotencyItem.from_dynamo(rawItem) if rawItem is not None else None
+
+
+def _complete(
+    table, config: IdempotencyConfig, itemKey: str, requestHash: str, response: dict
+):
+    now = datetime.now()
+
+    table.put_item(
+        Item=IdempotencyItem(
+            IdempotencyKey=itemKey,
+            RequestHash=requestHash,
+            Status=IdempotencyStatus.completed,
+            InProgressUntil=now,
+            Response=json.dumps(response),
+            ExpiresAt=now + config.ttl,
+        ).model_dump(),
+        ReturnValues="NONE",
+    )
+
+
+def _release(table, itemKey: str, log: Logger):
+    try:
+        table.delete_item(
+            Key={IdempotencyItem.get_primary_key_name(): itemKey},
+            ReturnValues="NONE",
+        )
+    except botocore.exceptions.ClientError:
+        log.warning("Unable to release the idempotency key", exc_info=True)
+
+
+def idempotent_request(log: Logger):
+    def decorator(func):
+        openapi_def: OpenApiMetadata | None = getattr(func, openapi_meta_key_name, None)
+
+        if openapi_def is not None:
+            if ConflictResponse not in openapi_def.responses:
+                openapi_def.responses.append(ConflictResponse)
+
+            if UnprocessableEntityResponse not in openapi_def.responses:
+                openapi_def.responses.append(UnprocessableEntityResponse)
+
+        @functools.wraps(func)
+        def wrapper(raw_event: dict[str, Any], *args, **kwargs):
+            headers = {
+                name.lower(): value
+                for name, value in (raw_event.get("headers") or {}).items()
+            }
+            key = headers.get(IDEMPOTENCY_KEY_HEADER)
+
+            if key is None:
+                return func(raw_event, *args, **kwargs)
+
+            if not 0 < len(key) <= MAX_KEY_LENGTH:
+                return BadRequestResponse(
+                    body=f"The idempotency key must have between 1 and {MAX_KEY_LENGTH} characters"
+                ).model_dump()
+
+            try:
+                event = parse(model=APIGatewayProxyEventV2Model, event=raw_event)
+                claims = get_cognito_claims(event)
+                config = IdempotencyBaseEnv().idempotency
+            except (ValidationError, InvalidClaimsError, ValueError):
+                # the wrapped handler rejects the request with a proper response
+                return func(raw_event, *args, **kwargs)
+
+            table = boto3.resource("dynamodb").Table(config.tableName)
+            itemKey = f"{claims.userId}#{key}"
+            requestHash = _request_hash(event)
+            deadline = monotonic() + config.waitTimeout.total_seconds()
+
+            try:
+                while not _claim(table, config, itemKey, requestHash):
+                    existing = _get_record(table, itemKey)
+
+                    if existing is not None and existing.RequestHash != requestHash:
+                        return UnprocessableEntityResponse(
+                            body="The idempotency key was already used for a different request"
+                        ).model_dump()
+
+                    if (
+                        existing is not None
+                        and existing.Status == IdempotencyStatus.completed
+                    ):
+                        log.info("Replaying the stored response", extra={"key": key})
+                        return _replay(existing)
+
+                    if monotonic() >= deadline:
+                        return ConflictResponse(
+                            body="A request with this idempotency key is still in progress"
+                        ).model_dump()
+
+                    # released in the meantime when missing, the next claim takes it over
+                    if existing is not None:
+                        sleep(config.pollInterval.total_seconds())
+            except botocore.exceptions.ClientError:
+                log.warning("Unable to claim the idempotency key", exc_info=True)
+                return func(raw_event, *args, **kwargs)
+
+            try:
+                response = func(raw_event, *args, **kwargs)
+            except Exception:
+                _release(table, itemKey, log)
+                raise
+
+            if not _is_replayable(response):
+                _release(table, itemKey, log)
+                return response
+
+            try:
+                _complete(table, config, itemKey, requestHash, response)
+            except botocore.exceptions.ClientError:
+                log.warning("Unable to store the idempotent response", exc_info=True)
+
+            return response
+
+        return wrapper
+
+    return decorator
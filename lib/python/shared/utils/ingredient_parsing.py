@@ -0,0 +1,352 @@
+from dataclasses import dataclass
+import json
+from typing import Any
+from aws_lambda_powertools import Logger, Metrics
+from aws_lambda_powertools.metrics import MetricUnit
+from pydantic import BaseModel, ValidationError
+from shared.models.DTO.ProcessIngredientsInput import (
+    IngredientBatchToProcessDTO,
+    IngredientToProcessDTO,
+)
+from shared.models.DTO.ProcessedIngredient import (
+    ProcessedIngredientCollection,
+    ProcessedIngredientCollectionList,
+)
+from shared.models.Ingredient import Ingredient
+from shared.models.IngredientParseStatus import IngredientParseStatus
+from shared.models.SupportedLanguage import SupportedLanguage
+from shared.models.chat.chat_models import (
+    batch_response_schema,
+    batch_schema_name,
+    create_batch_chat_models,
+    create_chat_models,
+)
+from shared.models.database.StoredResponse import StoredParseRequest
+from shared.models.environment.ParseCacheConfig import ParseCacheConfig
+from shared.parsing.rules import parse_ingredient_line
+from shared.utils.parse_cache import (
+    get_cached_parses,
+    parse_cache_key,
+    put_cached_parses,
+    to_recipe_ingredients,
+)
+
+metrics = Metrics()
+
+# the maximum length of the openai request input string
+MAX_INPUT_LENGTH = 10_485_760
+
+
+@dataclass
+class CachedLines:
+    cacheKeys: dict[str, str]
+    cachedResults: ProcessedIngredientCollectionList
+    pendingIngredients: list[IngredientToProcessDTO]
+    tokensSaved: int
+    localParses: int
+
+    @property
+    def pendingCacheKeys(self) -> dict[str, str]:
+        return {
+            ingredient.ingredientId: self.cacheKeys[ingredient.ingredientId]
+            for ingredient in self.pendingIngredients
+        }
+
+
+def batch_lang(batch: IngredientBatchToProcessDTO) -> SupportedLanguage:
+    if batch.lang is not None and "pl" in batch.lang:
+        return "pl"
+
+    if batch.lang is not None and "en" in batch.lang:
+        return "en"
+
+    return batch.defaultLang
+
+
+def unparsed_result(
+    ingredient: IngredientToProcessDTO, status: IngredientParseStatus
+) -> ProcessedIngredientCollection:
+    return ProcessedIngredientCollection(
+        originalIngredient=ingredient,
+        result=[
+            Ingredient(
+                name=ingredient.content,
+                originalText=ingredient.content,
+                isProcessed=True,
+            )
+        ],
+        status=status,
+    )
+
+
+def request_input(ingredients: list[IngredientToProcessDTO]) -> str:
+    # line ids are positions in the batch, short enough for the model to copy reliably
+    return json.dumps(
+        {
+            str(lineId): ingredient.content
+            for lineId, ingredient in enumerate(ingredients, start=1)
+        },
+        ensure_ascii=False,
+    )
+
+
+def too_long_ingredients(
+    ingredients: list[IngredientToProcessDTO],
+) -> list[IngredientToProcessDTO]:
+    remaining = sorted(ingredients, key=lambda ingredient: len(ingredient.content))
+    tooLong: list[IngredientToProcessDTO] = []
+
+    # the longest lines are left out until the rest fits in a single request
+    while len(remaining) > 0 and len(request_input(remaining)) > MAX_INPUT_LENGTH:
+        tooLong.append(remaining.pop())
+
+    return tooLong
+
+
+def parse_lines_locally(
+    ingredients: list[IngredientToProcessDTO],
+    lang: SupportedLanguage,
+    minConfidence: float,
+) -> ProcessedIngredientCollectionList:
+    ChatIngredient, ChatIngredients = create_chat_models(lang)
+    results: ProcessedIngredientCollectionList = []
+
+    for ingredient in ingredients:
+        parse = parse_ingredient_line(ingredient.content, lang)
+
+        if parse.confidence < minConfidence:
+            continue
+
+        results.append(
+            ProcessedIngredientCollection(
+                originalIngredient=ingredient,
+                result=to_recipe_ingredients(
+                    ChatIngredients(
+                        ingredients=[
+                            ChatIngredient(
+                                name=parse.name,
+                                quantity=parse.quantity,
+                                unit=parse.unit,
+                                preparationNotes=parse.preparationNotes,
+                            )
+                        ]
+                    )
+                ),
+                status=IngredientParseStatus.ok,
+            )
+        )
+
+    return results
+
+
+def resolve_cached_lines(
+    batch: IngredientBatchToProcessDTO,
+    lang: SupportedLanguage,
+    promptId: str,
+    model: str,
+    config: ParseCacheConfig,
+    minLocalConfidence: float,
+    log: Logger,
+) -> CachedLines:
+    _, Ingredients = create_chat_models(lang)
+
+    tooLongIds = set(batch.tooLongIngredientIds)
+    tooLongResults = [
+        unparsed_result(ingredient, IngredientParseStatus.ingredientTooLong)
+        for ingredient in batch.ingredients
+        if ingredient.ingredientId in tooLongIds
+    ]
+
+    # unambiguous lines are parsed by the rules and never reach the cache or the AI
+    localResults = parse_lines_locally(
+        [
+            ingredient
+            for ingredient in batch.ingredients
+            if ingredient.ingredientId not in tooLongIds
+        ],
+        lang,
+        minLocalConfidence,
+    )
+    localIds = {result.originalIngredient.ingredientId for result in localResults}
+    ingredients = [
+        ingredient
+        for ingredient in batch.ingredients
+        if ingredient.ingredientId not in localIds
+        and ingredient.ingredientId not in tooLongIds
+    ]
+
+    cacheKeys = {
+        ingredient.ingredientId: parse_cache_key(
+            ingredient.content, lang, promptId, model
+        )
+        for ingredient in ingredients
+    }
+    cachedParses = get_cached_parses(config, cacheKeys.values(), log)
+
+    cachedResults = [
+        ProcessedIngredientCollection(
+            originalIngredient=ingredient,
+            result=to_recipe_ingredients(
+                Ingredients.model_validate_json(
+                    cachedParses[cacheKeys[ingredient.ingredientId]].Output
+                )
+            ),
+            status=IngredientParseStatus.ok,
+        )
+        for ingredient in ingredients
+        if cacheKeys[ingredient.ingredientId] in cachedParses
+    ]
+    pendingIngredients = [
+        ingredient
+        for ingredient in ingredients
+        if cacheKeys[ingredient.ingredientId] not in cachedParses
+    ]
+
+    tokensSaved = sum(
+        cachedParses[cacheKeys[result.originalIngredient.ingredientId]].Tokens
+        for result in cachedResults
+    )
+
+    metrics.add_metric(
+        name="IngredientParseCacheHit", unit=MetricUnit.Count, value=len(cachedResults)
+    )
+    metrics.add_metric(
+        name="IngredientParseCacheMiss",
+        unit=MetricUnit.Count,
+        value=len(pendingIngredients),
+    )
+    metrics.add_metric(
+        name="IngredientParseTokensSaved", unit=MetricUnit.Count, value=tokensSaved
+    )
+    metrics.add_metric(
+        name="IngredientLocalParse", unit=MetricUnit.Count, value=len(localResults)
+    )
+
+    return CachedLines(
+        cacheKeys=cacheKeys,
+        cachedResults=[*tooLongResults, *localResults, *cachedResults],
+        pendingIngredients=pendingIngredients,
+        tokensSaved=tokensSaved,
+        localParses=len(localResults),
+    )
+
+
+def parse_request_body(
+    ingredients: list[IngredientToProcessDTO],
+    lang: SupportedLanguage,
+    promptId: str,
+    model: str,
+) -> dict[str, Any]:
+    return {
+        "prompt": {
+            "id": promptId,
+        },
+        "input": request_input(ingredients),
+        "text": {
+            "format": {
+                "type": "json_schema",
+                "name": batch_schema_name[lang],
+                "strict": False,
+                "schema": batch_response_schema(lang),
+            },
+            "verbosity": "low",
+        },
+        "reasoning": {"effort": "minimal"},
+        "model": model,
+    }
+
+
+def pending_ingredients(request: StoredParseRequest) -> list[IngredientToProcessDTO]:
+    cachedIds = {
+        result.originalIngredient.ingredientId for result in request.CachedResults
+    }
+
+    return [
+        ingredient
+        for ingredient in request.OriginalBatchInput.ingredients
+        if ingredient.ingredientId not in cachedIds
+    ]
+
+
+def parsed_lines(
+    request: StoredParseRequest, outputText: str | None, log: Logger
+) -> dict[str, BaseModel]:
+    return read_parsed_lines(pending_ingredients(request), outputText, log)
+
+
+def read_parsed_lines(
+    ingredients: list[IngredientToProcessDTO], outputText: str | None, log: Logger
+) -> dict[str, BaseModel]:
+    _, IngredientLines = create_batch_chat_models("en")
+
+    if outputText is None:
+        return {}
+
+    try:
+        lines = {
+            line.lineId.strip(): line
+            for line in IngredientLines.model_validate_json(outputText).lines
+            if len(line.ingredients) > 0
+        }
+    except ValidationError:
+        log.exception("Unable to parse ai response into an object")
+        return {}
+
+    # line ids are the positions of the ingredients in the request input
+    return {
+        ingredient.ingredientId: lines[str(lineId)]
+        for lineId, ingredient in enumerate(ingredients, start=1)
+        if str(lineId) in lines
+    }
+
+
+def missing_ingredients(
+    request: StoredParseRequest, parsedLines: dict[str, BaseModel]
+) -> list[IngredientToProcessDTO]:
+    return [
+        ingredient
+        for ingredient in pending_ingredients(request)
+        if ingredient.ingredientId not in parsedLines
+    ]
+
+
+def cache_parsed_lines(
+    config: ParseCacheConfig,
+    request: StoredParseRequest,
+    parsedLines: dict[str, BaseModel],
+    totalTokens: int,
+    log: Logger,
+):
+    if len(parsedLines) == 0:
+        return
+
+    put_cached_parses(
+        config,
+        {
+            request.ParseCacheKeys[ingredientId]: line.model_dump_json(
+                include={"ingredients"}
+            )
+            for ingredientId, line in parsedLines.items()
+            if ingredientId in request.ParseCacheKeys
+        },
+        totalTokens // len(parsedLines),
+        log,
+    )
+
+
+def parse_results(
+    request: StoredParseRequest, parsedLines: dict[str, BaseModel]
+) -> ProcessedIngredientCollectionList:
+    return [
+        *request.CachedResults,
+        *(
+            ProcessedIngredientCollection(
+                originalIngredient=ingredient,
+                result=to_recipe_ingredients(parsedLines[ingredient.ingredientId]),
+                status=IngredientParseStatus.ok,
+            )
+            if ingredient.ingredientId in parsedLines
+            else unparsed_result(ingredient, IngredientParseStatus.failedToParseAIOutput)
+            for ingredient in pending_ingredients(request)
+        ),
+    ]
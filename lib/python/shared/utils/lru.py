@@ -0,0 +1,48 @@
+from collections import OrderedDict
+from datetime import timedelta
+from threading import Lock
+from time import monotonic
+
+
+class LruCache[K, V]:
+    def __init__(self, maxSize: int, ttl: timedelta):
+        self._maxSize = maxSize
+        self._ttl = ttl.total_seconds()
+        self._items: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = Lock()
+
+    def __contains__(self, key: K) -> bool:
+        with self._lock:
+            return self._get(key) is not None
+
+    def _get(self, key: K) -> tuple[float, V] | None:
+        entry = self._items.get(key)
+
+        if entry is None:
+            return None
+
+        if monotonic() - entry[0] > self._ttl:
+            del self._items[key]
+            return None
+
+        self._items.move_to_end(key)
+
+        return entry
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            entry = self._get(key)
+
+            return entry[1] if entry is not None else None
+
+    def put(self, key: K, value: V):
+        with self._lock:
+            self._items[key] = (monotonic(), value)
+            self._items.move_to_end(key)
+
+            while len(self._items) > self._maxSize:
+                self._items.popitem(last=False)
+
+    def pop(self, key: K):
+        with self._lock:
+            self._items.pop(key, None)
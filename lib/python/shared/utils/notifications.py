@@ -0,0 +1,28 @@
+import boto3
+from shared.models.notifications.GCMNotification import (
+    GCMNotification,
+    Notification,
+    NotificationContent,
+)
+from shared.models.notifications.RecipeReadyNotificationData import (
+    RecipeReadyNotificationData,
+)
+from shared.utils.messages import PushNotificationContent
+
+
+def send_recipe_notification(
+    endpointArn: str, message: PushNotificationContent, recipeId: str
+):
+    snsClient = boto3.client("sns")
+
+    snsClient.publish(
+        MessageStructure="json",
+        Message=GCMNotification(
+            GCM=Notification(
+                notification=NotificationContent(body=message.body, title=message.title),
+                data=RecipeReadyNotificationData(recipeId=recipeId),
+            )
+        ).model_dump_json(),
+        TargetArn=endpointArn,
+    )
+    snsClient.delete_endpoint(EndpointArn=endpointArn)
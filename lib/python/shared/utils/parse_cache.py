@@ -0,0 +1,100 @@
+from datetime import datetime
+import hashlib
+import itertools
+from typing import Iterable
+import unicodedata
+from aws_lambda_powertools import Logger
+import boto3
+import botocore
+import botocore.exceptions
+from pydantic import BaseModel, ValidationError
+from shared.models.Ingredient import Ingredient
+from shared.models.database.ParseCacheItem import ParseCacheItem
+from shared.models.environment.ParseCacheConfig import ParseCacheConfig
+
+BATCH_GET_LIMIT = 100
+
+
+def normalize_ingredient_text(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def parse_cache_key(text: str, lang: str, promptId: str, model: str) -> str:
+    textHash = hashlib.sha256(normalize_ingredient_text(text).encode()).hexdigest()
+
+    # a new prompt or model version starts with an empty cache
+    return f"{model}#{promptId}#{lang}#{textHash}"
+
+
+def to_recipe_ingredients(parsed: BaseModel) -> list[Ingredient]:
+    return [
+        Ingredient(
+            name=i.name,
+            originalText=i.name,
+            unit=i.unit,
+            quantity=i.quantity,
+            isProcessed=True,
+        )
+        for i in parsed.ingredients  # pyright: ignore[reportAttributeAccessIssue]
+    ]
+
+
+def get_cached_parses(
+    config: ParseCacheConfig, cacheKeys: Iterable[str], log: Logger
+) -> dict[str, ParseCacheItem]:
+    keyName = ParseCacheItem.get_primary_key_name()
+    now = datetime.now().timestamp()
+    result: dict[str, ParseCacheItem] = {}
+
+    # unprocessed keys are treated as misses
+    for chunk in itertools.batched(set(cacheKeys), BATCH_GET_LIMIT):
+        try:
+            rawItems = (
+                boto3.resource("dynamodb")
+                .batch_get_item(
+                    RequestItems={
+                        config.tableName: {"Keys": [{keyName: key} for key in chunk]}
+                    },
+                    ReturnConsumedCapacity="NONE",
+                )
+                .get("Responses", {})
+                .get(config.tableName, [])
+            )
+        except botocore.exceptions.ClientError:
+            log.warning("Unable to read the ingredient parse cache", exc_info=True)
+            continue
+
+        for rawItem in rawItems:
+            try:
+                item = ParseCacheItem.from_dynamo(rawItem)
+            except ValidationError:
+                continue
+
+            # dynamodb ttl deletion is lazy, so expired items can still be returned
+            if item.ExpiresAt.timestamp() > now:
+                result[item.CacheKey] = item
+
+    return result
+
+
+def put_cached_parses(
+    config: ParseCacheConfig,
+    outputs: dict[str, str],
+    tokensPerLine: int,
+    log: Logger,
+):
+    expiresAt = datetime.now() + config.ttl
+
+    try:
+        with boto3.resource("dynamodb").Table(config.tableName).batch_writer() as batch:
+            for cacheKey, output in outputs.items():
+                batch.put_item(
+                    Item=ParseCacheItem(
+                        CacheKey=cacheKey,
+                        Output=output,
+                        Tokens=tokensPerLine,
+                        ExpiresAt=expiresAt,
+                    ).model_dump()
+                )
+    except botocore.exceptions.ClientError:
+        log.warning("Unable to store the ingredient parses", exc_info=True)
@@ -0,0 +1,586 @@
+from datetime import datetime, timedelta
+from time import time_ns
+from typing import TYPE_CHECKING
+import uuid
+from aws_lambda_powertools import Logger
+from aws_lambda_powertools.metrics import MetricUnit, single_metric
+import boto3
+import botocore.exceptions
+from pydantic import ValidationError
+from shared.models.DTO.ParseIngredientInput import ParseIngredientInput
+from shared.models.database.ParseOwnerItem import ParseOwnerItem
+from shared.models.database.ParseSlotItem import ParseSlotItem
+from shared.models.database.QueuedParseItem import QueuedParseItem
+from shared.models.environment.ParseSchedulingConfig import ParseSchedulingConfig
+
+if TYPE_CHECKING:
+    from mypy_boto3_dynamodb.type_defs import TransactWriteItemTypeDef
+
+# holds the in flight count of all the owners and the virtual time of the last dispatch
+GLOBAL_KEY = "#all"
+
+QUEUED_INDEX_NAME = "QueuedOwners"
+QUEUED = "queued"
+
+# every taken slot is leased, so that the slots that are never released can be found
+LEASED_INDEX_NAME = "LeasedSlots"
+LEASED = "leased"
+
+# pass increment of an owner with the weight of 1
+STRIDE = 1000
+
+MAX_DISPATCH_CANDIDATES = 25
+
+MAX_RECLAIMED_SLOTS = 25
+
+# the expired entries are failed by the dispatcher, the ttl only removes the ones it could not fail
+QUEUE_TTL_GRACE = timedelta(days=1)
+
+QUEUE_TIMEOUT_ERROR = "ParseQueueTimeout"
+
+
+def _is_condition_failure(e: botocore.exceptions.ClientError) -> bool:
+    return e.response.get("Error", {}).get("Code") == "ConditionalCheckFailedException"
+
+
+def _cancelled_by(e: botocore.exceptions.ClientError) -> list[bool]:
+    if e.response.get("Error", {}).get("Code") != "TransactionCanceledException":
+        raise e
+
+    return [
+        reason.get("Code") == "ConditionalCheckFailed"
+        for reason in e.response.get("CancellationReasons", [])
+    ]
+
+
+def _now_ms() -> int:
+    return time_ns() // 1_000_000
+
+
+def _owner_key(ownerId: str) -> dict[str, str]:
+    return {ParseOwnerItem.get_primary_key_name(): ownerId}
+
+
+def _add_in_flight(
+    ownerId: str,
+    maxInFlight: int,
+    tableName: str,
+    extraUpdate: str = "",
+    extraCondition: str | None = None,
+    extraValues: dict[str, int] | None = None,
+) -> "TransactWriteItemTypeDef":
+    condition = "attribute_not_exists(InFlight) OR InFlight < :maxInFlight"
+
+    return {
+        "Update": {
+            "TableName": tableName,
+            "Key": _owner_key(ownerId),
+            "UpdateExpression": f"ADD InFlight :one{extraUpdate}",
+            "ConditionExpression": condition
+            if extraCondition is None
+            else f"({condition}) AND ({extraCondition})",
+            "ExpressionAttributeValues": {
+                ":one": 1,
+                ":maxInFlight": maxInFlight,
+                **(extraValues or {}),
+            },
+        }
+    }
+
+
+def _remove_in_flight(ownerId: str, tableName: str) -> "TransactWriteItemTypeDef":
+    return {
+        "Update": {
+            "TableName": tableName,
+            "Key": _owner_key(ownerId),
+            "UpdateExpression": "ADD InFlight :minusOne",
+            "ExpressionAttributeValues": {":minusOne": -1},
+        }
+    }
+
+
+def _lease_slot(
+    config: ParseSchedulingConfig, ownerId: str, slotId: str
+) -> "TransactWriteItemTypeDef":
+    return {
+        "Put": {
+            "TableName": config.slotsTableName,
+            "Item": ParseSlotItem(
+                SlotId=slotId,
+                OwnerId=ownerId,
+                LeaseIndexKey=LEASED,
+                LeaseUntilMs=_now_ms()
+                + int(config.slotLease.total_seconds() * 1000),
+            ).model_dump(),
+            "ConditionExpression": "attribute_not_exists(SlotId)",
+        }
+    }
+
+
+def admit_parse(
+    config: ParseSchedulingConfig, ownerId: str, log: Logger
+) -> str | None:
+    slotId = str(uuid.uuid4())
+
+    # an owner with queued batches waits for its turn, so its batches keep their order
+    transactItems = [
+        _add_in_flight(GLOBAL_KEY, config.maxInFlight, config.ownersTableName),
+        _add_in_flight(
+            ownerId,
+            config.ownerMaxInFlight,
+            config.ownersTableName,
+            extraCondition="attribute_not_exists(Queued) OR Queued = :zero",
+            extraValues={":zero": 0},
+        ),
+        _lease_slot(config, ownerId, slotId),
+    ]
+
+    while True:
+        try:
+            boto3.resource("dynamodb").meta.client.transact_write_items(
+                TransactItems=transactItems
+            )
+        except botocore.exceptions.ClientError as e:
+            if (
+                e.response.get("Error", {}).get("Code")
+                != "TransactionCanceledException"
+            ):
+                # the scheduler only orders the requests, the AI is still called when it is unavailable
+                # the slot was never leased, so its release does nothing
+                log.warning("Unable to admit the parse in the scheduler", exc_info=True)
+                return slotId
+
+            # the batch is queued only when no leaked slot could make room for it
+            if reclaim_expired_slots(config, log) == 0:
+                return None
+
+            continue
+
+        return slotId
+
+
+def enqueue_parse(
+    config: ParseSchedulingConfig,
+    ownerId: str,
+    event: ParseIngredientInput,
+    log: Logger,
+):
+    dynamo = boto3.resource("dynamodb")
+    ownersTable = dynamo.Table(config.ownersTableName)
+    now = datetime.now()
+    nowMs = _now_ms()
+
+    dynamo.Table(config.queueTableName).put_item(
+        Item=QueuedParseItem(
+            OwnerId=ownerId,
+            EntryId=f"{nowMs:015d}#{uuid.uuid4()}",
+            TaskToken=event.taskToken,
+            Batch=event.batch,
+            EnqueuedAtMs=nowMs,
+            ExpiresAt=now + config.queueTtl + QUEUE_TTL_GRACE,
+        ).model_dump(),
+        ReturnValues="NONE",
+    )
+
+    globalPass = ParseOwnerItem.from_dynamo(
+        ownersTable.get_item(
+            Key=_owner_key(GLOBAL_KEY),
+            ConsistentRead=True,
+            ReturnConsumedCapacity="NONE",
+        ).get("Item", {ParseOwnerItem.get_primary_key_name(): GLOBAL_KEY})
+    ).Pass
+
+    try:
+        # an idle owner joins at the current virtual time instead of catching up on its idle turns
+        ownersTable.update_item(
+            Key=_owner_key(ownerId),
+            UpdateExpression="SET Pass = :globalPass",
+            ConditionExpression="attribute_not_exists(Pass) OR Pass < :globalPass",
+            ExpressionAttributeValues={":globalPass": globalPass},
+            ReturnValues="NONE",
+        )
+    except botocore.exceptions.ClientError as e:
+        if not _is_condition_failure(e):
+            raise
+
+    queued = ParseOwnerItem.from_dynamo(
+        {
+            **ownersTable.update_item(
+                Key=_owner_key(ownerId),
+                UpdateExpression="SET QueuedIndexKey = :queued ADD Queued :one",
+                ExpressionAttributeValues={":queued": QUEUED, ":one": 1},
+                ReturnValues="UPDATED_NEW",
+            ).get("Attributes", {}),
+            ParseOwnerItem.get_primary_key_name(): ownerId,
+        }
+    ).Queued
+
+    log.info(
+        "Queued the ingredient batch in the parse scheduler",
+        extra={"ownerId": ownerId, "queued": queued},
+    )
+
+    with single_metric(
+        name="ParseQueueDepth", unit=MetricUnit.Count, value=queued
+    ) as metric:
+        metric.add_dimension(name="OwnerId", value=ownerId)
+
+    # the slots may have been released between the admission and the enqueue
+    dispatch_parses(config, log)
+
+
+def _claim_slot(
+    config: ParseSchedulingConfig, owner: ParseOwnerItem, slotId: str
+) -> bool | None:
+    weight = owner.Weight if owner.Weight is not None else config.defaultWeight
+
+    try:
+        boto3.resource("dynamodb").meta.client.transact_write_items(
+            TransactItems=[
+                _add_in_flight(
+                    GLOBAL_KEY,
+                    config.maxInFlight,
+                    config.ownersTableName,
+                    " SET Pass = :pass",
+                    extraValues={":pass": owner.Pass},
+                ),
+                _add_in_flight(
+                    owner.OwnerId,
+                    config.ownerMaxInFlight,
+                    config.ownersTableName,
+                    ", Queued :minusOne SET Pass = Pass + :stride",
+                    extraCondition="Queued > :zero",
+                    extraValues={
+                        ":minusOne": -1,
+                        ":stride": max(1, round(STRIDE / weight)),
+                        ":zero": 0,
+                    },
+                ),
+                _lease_slot(config, owner.OwnerId, slotId),
+            ]
+        )
+    except botocore.exceptions.ClientError as e:
+        globalFull, *_ = _cancelled_by(e) + [False]
+
+        # None stops the dispatch, no owner gets a slot until one is released
+        return None if globalFull else False
+
+    return True
+
+
+def _take_oldest_entry(
+    config: ParseSchedulingConfig, ownerId: str
+) -> QueuedParseItem | None:
+    queueTable = boto3.resource("dynamodb").Table(config.queueTableName)
+
+    while True:
+        rawItems = queueTable.query(
+            KeyConditionExpression="OwnerId = :ownerId",
+            ExpressionAttributeValues={":ownerId": ownerId},
+            ConsistentRead=True,
+            Limit=1,
+        ).get("Items", [])
+
+        if len(rawItems) == 0:
+            return None
+
+        entry = QueuedParseItem.from_dynamo(rawItems[0])
+
+        try:
+            queueTable.delete_item(
+                Key={
+                    QueuedParseItem.get_primary_key_name(): entry.OwnerId,
+                    QueuedParseItem.get_primary_key_name("sort"): entry.EntryId,
+                },
+                ConditionExpression="attribute_exists(EntryId)",
+                ReturnValues="NONE",
+            )
+        except botocore.exceptions.ClientError as e:
+            if _is_condition_failure(e):
+                continue
+
+            raise
+
+        return entry
+
+
+def _release_slot(
+    config: ParseSchedulingConfig, ownerId: str, slotId: str, log: Logger
+) -> bool:
+    # the lease is deleted with the counts, so a slot released twice or reclaimed meanwhile is counted once
+    try:
+        boto3.resource("dynamodb").meta.client.transact_write_items(
+            TransactItems=[
+                {
+                    "Delete": {
+                        "TableName": config.slotsTableName,
+                        "Key": {ParseSlotItem.get_primary_key_name(): slotId},
+                        "ConditionExpression": "attribute_exists(SlotId)",
+                    }
+                },
+                _remove_in_flight(ownerId, config.ownersTableName),
+                _remove_in_flight(GLOBAL_KEY, config.ownersTableName),
+            ]
+        )
+    except botocore.exceptions.ClientError as e:
+        if e.response.get("Error", {}).get("Code") != "TransactionCanceledException":
+            # the lease expires and the slot is reclaimed later
+            log.warning(
+                "Unable to release the parse scheduler slot",
+                extra={"ownerId": ownerId, "slotId": slotId},
+                exc_info=True,
+            )
+
+        return False
+
+    return True
+
+
+def reclaim_expired_slots(config: ParseSchedulingConfig, log: Logger) -> int:
+    try:
+        rawSlots = (
+            boto3.resource("dynamodb")
+            .Table(config.slotsTableName)
+            .query(
+                IndexName=LEASED_INDEX_NAME,
+                KeyConditionExpression="LeaseIndexKey = :leased AND LeaseUntilMs < :now",
+                ExpressionAttributeValues={":leased": LEASED, ":now": _now_ms()},
+                Limit=MAX_RECLAIMED_SLOTS,
+            )
+            .get("Items", [])
+        )
+    except botocore.exceptions.ClientError:
+        log.warning("Unable to find the expired parse scheduler slots", exc_info=True)
+        return 0
+
+    reclaimed = [
+        slot
+        for slot in map(ParseSlotItem.from_dynamo, rawSlots)
+        if _release_slot(config, slot.OwnerId, slot.SlotId, log)
+    ]
+
+    if len(reclaimed) > 0:
+        with single_metric(
+            name="ParseSlotsReclaimed", unit=MetricUnit.Count, value=len(reclaimed)
+        ):
+            # responses whose webhook never came, or start invocations that died after the admission
+            log.warning(
+                "Reclaimed the expired parse scheduler slots",
+                extra={"ownerIds": [slot.OwnerId for slot in reclaimed]},
+            )
+
+    return len(reclaimed)
+
+
+def _clear_queued_flag(config: ParseSchedulingConfig, ownerId: str):
+    try:
+        boto3.resource("dynamodb").Table(config.ownersTableName).update_item(
+            Key=_owner_key(ownerId),
+            UpdateExpression="REMOVE QueuedIndexKey",
+            ConditionExpression="Queued <= :zero",
+            ExpressionAttributeValues={":zero": 0},
+            ReturnValues="NONE",
+        )
+    except botocore.exceptions.ClientError as e:
+        if not _is_condition_failure(e):
+            raise
+
+
+def _dispatch(
+    config: ParseSchedulingConfig, owner: ParseOwnerItem, slotId: str, log: Logger
+):
+    entry = _take_oldest_entry(config, owner.OwnerId)
+
+    _clear_queued_flag(config, owner.OwnerId)
+
+    if entry is None:
+        log.warning(
+            "The parse scheduler counted a queued batch that is gone",
+            extra={"ownerId": owner.OwnerId},
+        )
+        _release_slot(config, owner.OwnerId, slotId, log)
+        return
+
+    boto3.client("lambda").invoke(
+        FunctionName=config.startFunctionName,
+        InvocationType="Event",
+        Payload=ParseIngredientInput(
+            taskToken=entry.TaskToken,
+            batch=entry.Batch,
+            admitted=True,
+            schedulerSlotId=slotId,
+        ).model_dump_json(),
+    )
+
+    waitMs = _now_ms() - entry.EnqueuedAtMs
+
+    log.info(
+        "Dispatched the queued ingredient batch",
+        extra={"ownerId": owner.OwnerId, "waitMs": waitMs},
+    )
+
+    with single_metric(
+        name="ParseQueueWaitTime", unit=MetricUnit.Milliseconds, value=waitMs
+    ) as metric:
+        metric.add_dimension(name="OwnerId", value=owner.OwnerId)
+
+
+def dispatch_parses(config: ParseSchedulingConfig, log: Logger):
+    ownersTable = boto3.resource("dynamodb").Table(config.ownersTableName)
+
+    reclaim_expired_slots(config, log)
+
+    try:
+        while True:
+            # the owner with the lowest pass is the next one in the weighted round robin
+            rawOwners = ownersTable.query(
+                IndexName=QUEUED_INDEX_NAME,
+                KeyConditionExpression="QueuedIndexKey = :queued",
+                ExpressionAttributeValues={":queued": QUEUED},
+                Limit=MAX_DISPATCH_CANDIDATES,
+            ).get("Items", [])
+
+            dispatched = False
+
+            for rawOwner in rawOwners:
+                try:
+                    owner = ParseOwnerItem.from_dynamo(rawOwner)
+                except ValidationError:
+                    log.exception("Invalid parse scheduler owner")
+                    continue
+
+                if owner.Queued <= 0 or owner.InFlight >= config.ownerMaxInFlight:
+                    continue
+
+                slotId = str(uuid.uuid4())
+                claimed = _claim_slot(config, owner, slotId)
+
+                if claimed is None:
+                    return
+
+                if claimed:
+                    _dispatch(config, owner, slotId, log)
+                    dispatched = True
+                    break
+
+            # every queued owner is at its own limit
+            if not dispatched:
+                return
+    except botocore.exceptions.ClientError:
+        log.warning("Unable to dispatch the queued ingredient batches", exc_info=True)
+
+
+def _fail_entry(
+    config: ParseSchedulingConfig, entry: QueuedParseItem, log: Logger
+) -> bool:
+    dynamo = boto3.resource("dynamodb")
+
+    try:
+        dynamo.Table(config.queueTableName).delete_item(
+            Key={
+                QueuedParseItem.get_primary_key_name(): entry.OwnerId,
+                QueuedParseItem.get_primary_key_name("sort"): entry.EntryId,
+            },
+            ConditionExpression="attribute_exists(EntryId)",
+            ReturnValues="NONE",
+        )
+    except botocore.exceptions.ClientError as e:
+        # dispatched in the meantime
+        if _is_condition_failure(e):
+            return False
+
+        raise
+
+    try:
+        # a dispatch that claimed a slot for this entry has already counted it out
+        dynamo.Table(config.ownersTableName).update_item(
+            Key=_owner_key(entry.OwnerId),
+            UpdateExpression="ADD Queued :minusOne",
+            ConditionExpression="Queued > :zero",
+            ExpressionAttributeValues={":minusOne": -1, ":zero": 0},
+            ReturnValues="NONE",
+        )
+    except botocore.exceptions.ClientError as e:
+        if not _is_condition_failure(e):
+            raise
+
+    _clear_queued_flag(config, entry.OwnerId)
+
+    try:
+        boto3.client("stepfunctions").send_task_failure(
+            taskToken=entry.TaskToken,
+            error=QUEUE_TIMEOUT_ERROR,
+            cause="The ingredient batch waited in the parse scheduler queue for too long",
+        )
+    except botocore.exceptions.ClientError:
+        # the task timeout of the state machine fails it later
+        log.warning(
+            "Unable to fail the expired ingredient batch",
+            extra={"ownerId": entry.OwnerId},
+            exc_info=True,
+        )
+
+    return True
+
+
+def fail_expired_parses(config: ParseSchedulingConfig, log: Logger) -> int:
+    dynamo = boto3.resource("dynamodb")
+    # the entry ids start with the enqueue time
+    cutoff = f"{_now_ms() - int(config.queueTtl.total_seconds() * 1000):015d}"
+    failedOwnerIds: list[str] = []
+    queryArgs = {}
+
+    try:
+        while True:
+            page = dynamo.Table(config.ownersTableName).query(
+                IndexName=QUEUED_INDEX_NAME,
+                KeyConditionExpression="QueuedIndexKey = :queued",
+                ExpressionAttributeValues={":queued": QUEUED},
+                **queryArgs,
+            )
+
+            for rawOwner in page.get("Items", []):
+                ownerId = rawOwner[ParseOwnerItem.get_primary_key_name()]
+                rawEntries = (
+                    dynamo.Table(config.queueTableName)
+                    .query(
+                        KeyConditionExpression="OwnerId = :ownerId AND EntryId < :cutoff",
+                        ExpressionAttributeValues={
+                            ":ownerId": ownerId,
+                            ":cutoff": cutoff,
+                        },
+                        ConsistentRead=True,
+                    )
+                    .get("Items", [])
+                )
+
+                failedOwnerIds += [
+                    entry.OwnerId
+                    for entry in map(QueuedParseItem.from_dynamo, rawEntries)
+                    if _fail_entry(config, entry, log)
+                ]
+
+            if "LastEvaluatedKey" not in page:
+                break
+
+            queryArgs["ExclusiveStartKey"] = page["LastEvaluatedKey"]
+    except botocore.exceptions.ClientError:
+        log.warning("Unable to fail the expired ingredient batches", exc_info=True)
+
+    if len(failedOwnerIds) > 0:
+        with single_metric(
+            name="ParseQueueExpired", unit=MetricUnit.Count, value=len(failedOwnerIds)
+        ):
+            log.warning(
+                "Failed the ingredient batches queued for too long",
+                extra={"ownerIds": failedOwnerIds},
+            )
+
+    return len(failedOwnerIds)
+
+
+def release_parse(
+    config: ParseSchedulingConfig, ownerId: str, slotId: str, log: Logger
+):
+    _release_slot(config, ownerId, slotId, log)
+    dispatch_parses(config, log)
@@ -0,0 +1,23 @@
+from threading import Lock
+from time import monotonic, sleep
+
+
+class HostRateLimiter:
+    def __init__(self, requestsPerSecond: float):
+        self._interval = 1 / requestsPerSecond
+        self._nextSlot: dict[str, float] = {}
+        self._lock = Lock()
+
+    def reserve(self, host: str) -> float:
+        with self._lock:
+            now = monotonic()
+            slot = max(now, self._nextSlot.get(host, now))
+            self._nextSlot[host] = slot + self._interval
+
+            return slot - now
+
+    def wait(self, host: str):
+        delay = self.reserve(host)
+
+        if delay > 0:
+            sleep(delay)
@@ -0,0 +1,78 @@
+from datetime import datetime
+import boto3
+from pydantic import ValidationError
+from shared.models.IngredientParseStatus import IngredientParseStatus
+from shared.models.database.RecipeCacheItem import RecipeCacheItem
+from shared.models.database.ScrapedRecipe import ScrapedRecipe
+from shared.utils.url import normalize_url, url_host
+
+
+def recipe_cache_key(url: str, parseIngredients: bool, lang: str) -> str:
+    return f"{normalize_url(url)}#{'parsed' if parseIngredients else 'raw'}#{lang}"
+
+
+def recipe_cache_keys(
+    requestedUrl: str,
+    fetchedUrl: str,
+    canonicalUrl: str | None,
+    parseIngredients: bool,
+    lang: str,
+) -> list[str]:
+    urls = [requestedUrl, fetchedUrl]
+
+    # the canonical url is declared by the page itself, so it can only name a page of the fetched host
+    if canonicalUrl is not None and url_host(canonicalUrl) == url_host(fetchedUrl):
+        urls.append(canonicalUrl)
+
+    return list(
+        dict.fromkeys(recipe_cache_key(url, parseIngredients, lang) for url in urls)
+    )
+
+
+def get_cached_recipe(tableName: str, cacheKey: str) -> ScrapedRecipe | None:
+    table = boto3.resource("dynamodb").Table(tableName)
+
+    rawItem = table.get_item(
+        Key={RecipeCacheItem.get_primary_key_name(): cacheKey},
+        ReturnConsumedCapacity="NONE",
+    ).get("Item")
+
+    if rawItem is None:
+        return None
+
+    try:
+        item = RecipeCacheItem.from_dynamo(rawItem)
+    except ValidationError:
+        return None
+
+    # dynamodb ttl deletion is lazy, so expired items can still be returned
+    if item.ExpiresAt.timestamp() <= datetime.now().timestamp():
+        return None
+
+    return item.Content
+
+
+def is_cacheable(content: ScrapedRecipe) -> bool:
+    return all(
+        status in (IngredientParseStatus.ok, IngredientParseStatus.off)
+        for status in content.ingredientStatuses.values()
+    )
+
+
+def put_cached_recipe(
+    tableName: str,
+    cacheKeys: list[str],
+    content: ScrapedRecipe,
+    expiresAt: datetime,
+):
+    table = boto3.resource("dynamodb").Table(tableName)
+
+    with table.batch_writer() as batch:
+        for cacheKey in set(cacheKeys):
+            batch.put_item(
+                Item=RecipeCacheItem(
+                    CacheKey=cacheKey,
+                    Content=content,
+                    ExpiresAt=expiresAt,
+                ).model_dump()
+            )
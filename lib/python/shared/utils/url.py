@@ -0,0 +1,56 @@
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+tracking_query_params = {
+    "fbclid",
+    "gclid",
+    "dclid",
+    "msclkid",
+    "igshid",
+    "mc_cid",
+    "mc_eid",
+    "ref",
+    "ref_src",
+}
+
+default_ports = {"http": 80, "https": 443}
+
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name.startswith("utm_") or name in tracking_query_params
+
+
+def normalize_url(url: str) -> str:
+    parts = urlsplit(url.strip())
+
+    scheme = parts.scheme.lower() or "https"
+    host = (parts.hostname or "").lower()
+
+    if host.startswith("www."):
+        host = host[4:]
+
+    netloc = host
+
+    if parts.port is not None and default_ports.get(scheme) != parts.port:
+        netloc = f"{host}:{parts.port}"
+
+    path = parts.path or "/"
+
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    query = urlencode(
+        sorted(
+            (name, value)
+            for name, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not _is_tracking_param(name)
+        )
+    )
+
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+def url_host(url: str) -> str:
+    host = (urlsplit(url).hostname or "").lower()
+
+    return host[4:] if host.startswith("www.") else host
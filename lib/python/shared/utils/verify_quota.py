@@ -1,6 +1,6 @@
 from decimal import Decimal
 import functools
-from typing import Any
+from typing import Any, Callable
 from aws_lambda_powertools import Logger
 import boto3
 import botocore
@@ -42,7 +42,10 @@ def get_cognito_claims(event: APIGatewayProxyEventV2Model) -> CognitoUserClaims:
             raise ValueError("Missing authentication info")
 
 
-def verify_user_quota(log: Logger):
+def verify_user_quota(
+    log: Logger,
+    cost: Callable[[APIGatewayProxyEventV2Model], int] = lambda _: 1,
+):
     def decorator(func):
         openapi_def: OpenApiMetadata | None = getattr(func, openapi_meta_key_name, None)
 
@@ -66,6 +69,8 @@ def verify_user_quota(log: Logger):
 
                 claims = get_cognito_claims(event)
 
+                requestCost = cost(event)
+
                 quotaTable = boto3.resource("dynamodb").Table(env.quotaTableName)
 
                 result = quotaTable.query(
@@ -78,7 +83,7 @@ def verify_user_quota(log: Logger):
 
                 if (
                     result.get("LastEvaluatedKey") is not None
-                    or result["Count"] >= claims.quotaValue
+                    or result["Count"] + requestCost > claims.quotaValue
                 ):
                     return TooManyRequestsResponse(
                         headers=TooManyRequestsHeaders(
@@ -86,22 +91,34 @@ def verify_user_quota(log: Logger):
                         )
                     )
 
-                quotaItemDict = QuotaItem(
-                    UserId=claims.userId,
-                    RequestTimestamp=Decimal(
-                        str(event.requestContext.timeEpoch.timestamp())
-                    ),
-                    ExpiresAt=event.requestContext.timeEpoch + claims.quotaWindow,
-                ).model_dump()
+                requestTimestamp = Decimal(
+                    str(event.requestContext.timeEpoch.timestamp())
+                )
 
-                log.debug(quotaItemDict)
+                # the request time has millisecond precision, so the offsets keep the sort keys unique
+                quotaItems = [
+                    QuotaItem(
+                        UserId=claims.userId,
+                        RequestTimestamp=requestTimestamp + Decimal(i) / 1_000_000,
+                        ExpiresAt=event.requestContext.timeEpoch + claims.quotaWindow,
+                    )
+                    for i in range(requestCost)
+                ]
 
-                quotaTable.put_item(
-                    Item=quotaItemDict,
-                    ReturnValues="NONE",
-                )
+                log.debug(quotaItems)
+
+                if len(quotaItems) == 1:
+                    quotaTable.put_item(
+                        Item=quotaItems[0].model_dump(),
+                        ReturnValues="NONE",
+                    )
+                else:
+                    with quotaTable.batch_writer() as batch:
+                        for quotaItem in quotaItems:
+                            batch.put_item(Item=quotaItem.model_dump())
 
                 kwargs["jwtClaims"] = claims
+                kwargs["quotaItems"] = quotaItems
             except ValidationError:
                 log.exception("Invalid quota table env config")
                 return InternalServerErrorResponse(
@@ -119,3 +136,24 @@ def verify_user_quota(log: Logger):
         return wrapper
 
     return decorator
+
+
+def refund_user_quota(quotaItems: list[QuotaItem], log: Logger):
+    if len(quotaItems) == 0:
+        return
+
+    try:
+        env = QuotaBaseEnv()
+
+        with boto3.resource("dynamodb").Table(env.quotaTableName).batch_writer() as batch:
+            for quotaItem in quotaItems:
+                batch.delete_item(
+                    Key={
+                        QuotaItem.get_primary_key_name(): quotaItem.UserId,
+                        QuotaItem.get_primary_key_name(
+                            "sort"
+                        ): quotaItem.RequestTimestamp,
+                    }
+                )
+    except botocore.exceptions.ClientError:
+        log.warning("Unable to refund the user quota", exc_info=True)
@@ -0,0 +1,218 @@
+import argparse
+from collections import defaultdict
+from dataclasses import dataclass
+import json
+import os
+import sys
+from time import perf_counter
+from typing import Iterator
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "lib", "python"))
+
+import boto3
+from pydantic import ValidationError
+from shared.models.IngredientParseStatus import IngredientParseStatus
+from shared.models.SupportedLanguage import SupportedLanguage
+from shared.models.database.RecipeDbItem import RecipeDbItem
+from shared.parsing.rules import RuleParse, parse_ingredient_line
+from shared.utils.parse_cache import normalize_ingredient_text
+
+# hand picked lines the rules used to get wrong, used when no recipes table is given
+DEFAULT_SAMPLES = os.path.join(
+    os.path.dirname(__file__), "..", "benchmarks", "rule_parser_samples.jsonl"
+)
+
+
+@dataclass
+class Sample:
+    text: str
+    lang: SupportedLanguage
+    # every ingredient the AI parsed out of the line
+    expected: list[dict[str, str | None]]
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {"text": self.text, "lang": self.lang, "expected": self.expected},
+            ensure_ascii=False,
+        )
+
+
+def recipe_lang(lang: str | None, defaultLang: SupportedLanguage) -> SupportedLanguage:
+    if lang is not None and "pl" in lang:
+        return "pl"
+
+    if lang is not None and "en" in lang:
+        return "en"
+
+    return defaultLang
+
+
+def table_samples(tableName: str, defaultLang: SupportedLanguage) -> Iterator[Sample]:
+    table = boto3.resource("dynamodb").Table(tableName)
+    scanArgs = {}
+
+    while True:
+        page = table.scan(**scanArgs)
+
+        for rawItem in page.get("Items", []):
+            try:
+                item = RecipeDbItem.from_dynamo(rawItem)
+            except ValidationError:
+                continue
+
+            if not item.IsComplete:
+                continue
+
+            recipe = item.Content.recipe
+            lang = recipe_lang(recipe.lang, defaultLang)
+
+            for group in recipe.ingredientGroups:
+                # a line parsed into several ingredients keeps its text on each of them
+                lines: dict[str, list[dict[str, str | None]]] = defaultdict(list)
+
+                for ingredient in group.ingredients:
+                    status = item.Content.ingredientStatuses.get(ingredient.id)
+
+                    if status != IngredientParseStatus.ok:
+                        continue
+
+                    lines[ingredient.originalText].append(
+                        {
+                            "name": ingredient.name,
+                            "quantity": ingredient.quantity,
+                            "unit": ingredient.unit,
+                        }
+                    )
+
+                for text, expected in lines.items():
+                    yield Sample(text=text, lang=lang, expected=expected)
+
+        if "LastEvaluatedKey" not in page:
+            break
+
+        scanArgs["ExclusiveStartKey"] = page["LastEvaluatedKey"]
+
+
+def file_samples(path: str) -> Iterator[Sample]:
+    with open(path) as file:
+        for line in file:
+            if line.strip() != "":
+                yield Sample(**json.loads(line))
+
+
+def same_value(parsed: str | None, expected: str | None) -> bool:
+    return normalize_ingredient_text(parsed or "") == normalize_ingredient_text(
+        expected or ""
+    )
+
+
+def is_match(parse: RuleParse, sample: Sample) -> bool:
+    if len(sample.expected) != 1:
+        return False
+
+    expected = sample.expected[0]
+
+    return (
+        same_value(parse.name, expected["name"])
+        and same_value(parse.quantity, expected["quantity"])
+        and same_value(parse.unit, expected["unit"])
+    )
+
+
+def run(args: argparse.Namespace):
+    samples = list(
+        file_samples(args.samples)
+        if args.samples is not None
+        else table_samples(args.recipes_table, args.lang)
+    )
+
+    if args.export is not None:
+        with open(args.export, "w") as file:
+            for sample in samples:
+                file.write(sample.to_json() + "\n")
+
+    if len(samples) == 0:
+        print("No stored parses to compare against", file=sys.stderr)
+        return
+
+    parses = [parse_ingredient_line(sample.text, sample.lang) for sample in samples]
+
+    accepted = 0
+    acceptedMatches = 0
+    matches = 0
+
+    for sample, parse in zip(samples, parses):
+        match = is_match(parse, sample)
+        matches += match
+
+        if parse.confidence >= args.min_confidence:
+            accepted += 1
+            acceptedMatches += match
+        elif args.show_misses and match:
+            print(f"rejected match: {sample.text!r} {parse}", file=sys.stderr)
+
+        if args.show_misses and not match and parse.confidence >= args.min_confidence:
+            print(
+                f"accepted miss: {sample.text!r} {parse} expected {sample.expected}",
+                file=sys.stderr,
+            )
+
+    start = perf_counter()
+
+    for _ in range(args.repeat):
+        for sample in samples:
+            parse_ingredient_line(sample.text, sample.lang)
+
+    elapsed = perf_counter() - start
+
+    print(f"lines:                    {len(samples)}")
+    print(f"matching the ai overall:  {matches / len(samples):.1%}")
+    print(
+        f"above {args.min_confidence:<4} confidence:   {accepted / len(samples):.1%} of the lines"
+    )
+    print(
+        f"accuracy of those lines:  {acceptedMatches / accepted:.1%}"
+        if accepted > 0
+        else "accuracy of those lines:  -"
+    )
+    print(f"lines per second:         {len(samples) * args.repeat / elapsed:,.0f}")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Compares the rule based ingredient parser with the stored AI parses of the scraped recipes"
+    )
+    parser.add_argument(
+        "--recipes-table",
+        default=os.environ.get("RECIPES_TABLE_NAME"),
+        help="read the AI parses from the completed recipes in this table",
+    )
+    parser.add_argument(
+        "--samples", help="read the AI parses from a jsonl file made with --export"
+    )
+    parser.add_argument("--export", help="write the AI parses to a jsonl file")
+    parser.add_argument(
+        "--lang",
+        choices=["pl", "en"],
+        default="pl",
+        help="language of the recipes without one",
+    )
+    parser.add_argument("--min-confidence", type=float, default=0.9)
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=20,
+        help="passes over the lines when measuring the throughput",
+    )
+    parser.add_argument("--show-misses", action="store_true")
+
+    args = parser.parse_args(argv)
+
+    if args.recipes_table is None and args.samples is None:
+        args.samples = DEFAULT_SAMPLES
+
+    return args
+
+
+if __name__ == "__main__":
+    run(parse_args())
@@ -0,0 +1,371 @@
+import argparse
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+import itertools
+import json
+import os
+import re
+import sys
+from threading import Lock
+from time import monotonic
+from typing import Iterator
+from urllib.error import HTTPError
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "lib", "python"))
+
+from aws_lambda_powertools import Logger
+import boto3
+from shared.models.database.RecipeCacheItem import RecipeCacheItem
+from shared.models.database.RecipeDbItem import RecipeDbItem
+from shared.models.database.ScrapedRecipe import ScrapedRecipe
+from shared.models.environment.FetchConfig import FetchConfig
+from shared.models.exceptions.apiExceptions import UnableToParseRecipeException
+from shared.models.exceptions.fetchExceptions import PageFetchException
+from shared.scraping.archive import archive_page
+from shared.scraping.extract import extract_recipe
+from shared.scraping.sitemap import iter_seed_urls, iter_sitemap_urls
+from shared.utils.fetch import fetch_page
+from shared.utils.http_pool import HttpConnectionPool
+from shared.utils.rate_limit import HostRateLimiter
+from shared.utils.recipe_cache import recipe_cache_key
+from shared.utils.str_to_timedelta import str_to_timedelta
+from shared.utils.url import normalize_url, url_host
+
+log = Logger("bulk-import")
+
+SITEMAP_MAX_BYTES = 50 * 1024 * 1024
+
+
+@dataclass
+class HostStats:
+    succeeded: int = 0
+    failed: int = 0
+    bytesTransferred: int = 0
+    fetchMs: float = 0
+
+    @property
+    def attempted(self) -> int:
+        return self.succeeded + self.failed
+
+
+class ImportStats:
+    def __init__(self):
+        self._lock = Lock()
+        self._start = monotonic()
+        self.hosts: dict[str, HostStats] = {}
+
+    def record(self, host: str, succeeded: bool, bytesTransferred=0, fetchMs=0.0):
+        with self._lock:
+            stats = self.hosts.setdefault(host, HostStats())
+
+            if succeeded:
+                stats.succeeded += 1
+            else:
+                stats.failed += 1
+
+            stats.bytesTransferred += bytesTransferred
+            stats.fetchMs += fetchMs
+
+    def report(self) -> str:
+        elapsed = max(monotonic() - self._start, 1e-9)
+        lines = [
+            f"{'host':<40} {'ok':>7} {'failed':>7} {'err %':>7} {'urls/s':>8} {'avg ms':>8} {'MB':>8}"
+        ]
+
+        with self._lock:
+            for host, stats in sorted(self.hosts.items()):
+                lines.append(
+                    f"{host:<40} {stats.succeeded:>7} {stats.failed:>7} "
+                    f"{100 * stats.failed / max(stats.attempted, 1):>7.1f} "
+                    f"{stats.attempted / elapsed:>8.2f} "
+                    f"{stats.fetchMs / max(stats.attempted, 1):>8.0f} "
+                    f"{stats.bytesTransferred / 1024 / 1024:>8.2f}"
+                )
+
+        return "\n".join(lines)
+
+
+class Checkpoint:
+    def __init__(self, path: str | None, retryFailed: bool):
+        self._path = path
+        self._done: set[str] = set()
+
+        if path is not None and os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    entry = json.loads(line)
+
+                    if entry["status"] == "ok" or not retryFailed:
+                        self._done.add(entry["url"])
+
+        self._file = open(path, "a") if path is not None else None
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._done
+
+    def mark(self, url: str, status: str):
+        self._done.add(url)
+
+        if self._file is not None:
+            self._file.write(json.dumps({"url": url, "status": status}) + "\n")
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+@dataclass
+class ImportOutcome:
+    url: str
+    content: ScrapedRecipe | None = None
+    error: str | None = None
+
+
+@dataclass
+class Importer:
+    args: argparse.Namespace
+    fetchConfig: FetchConfig
+    pool: HttpConnectionPool = field(default_factory=HttpConnectionPool)
+    stats: ImportStats = field(default_factory=ImportStats)
+
+    def __post_init__(self):
+        self.limiter = HostRateLimiter(self.args.host_rate)
+
+    def candidate_urls(self, checkpoint: Checkpoint) -> Iterator[str]:
+        sitemapConfig = self.fetchConfig.model_copy(
+            update={"maxBytes": SITEMAP_MAX_BYTES}
+        )
+        include = re.compile(self.args.include) if self.args.include else None
+        seen: set[str] = set()
+
+        def sitemap_failed(sitemapUrl: str, e: Exception):
+            log.warning(
+                "Unable to read the sitemap",
+                extra={"url": sitemapUrl, "error": f"{type(e).__name__}: {e}"},
+            )
+            checkpoint.mark(normalize_url(sitemapUrl), "failed")
+
+        sources: list[Iterator[str]] = [
+            iter_sitemap_urls(
+                sitemapUrl,
+                sitemapConfig,
+                pool=self.pool,
+                log=log,
+                onError=sitemap_failed,
+            )
+            for sitemapUrl in self.args.sitemap
+        ]
+
+        if self.args.seeds is not None:
+            sources.append(iter_seed_urls(self.args.seeds))
+
+        for url in itertools.chain.from_iterable(sources):
+            normalizedUrl = normalize_url(url)
+
+            if normalizedUrl in seen or normalizedUrl in checkpoint:
+                continue
+
+            seen.add(normalizedUrl)
+
+            if include is not None and not include.search(url):
+                continue
+
+            yield url
+
+    def import_url(self, url: str) -> ImportOutcome:
+        try:
+            return self._import_url(url)
+        except Exception as e:
+            # a scraper bug on one page must not stop the whole import
+            log.exception("Unexpected exception while importing", extra={"url": url})
+            self.stats.record(url_host(url), succeeded=False)
+            return ImportOutcome(url=url, error=f"{type(e).__name__}: {e}")
+
+    def _import_url(self, url: str) -> ImportOutcome:
+        host = url_host(url)
+        self.limiter.wait(host)
+
+        try:
+            page = fetch_page(url, self.fetchConfig, pool=self.pool)
+        except (HTTPError, PageFetchException) as e:
+            self.stats.record(host, succeeded=False)
+            return ImportOutcome(url=url, error=f"{type(e).__name__}: {e}")
+
+        if self.args.archive_bucket is not None and not self.args.dry_run:
+            archive_page(
+                self.args.archive_bucket, page, self.args.archive_compression, log
+            )
+
+        try:
+            extraction = extract_recipe(page.text, page.url, parseIngredients=False)
+        except UnableToParseRecipeException:
+            self.stats.record(host, False, page.bytesTransferred, page.timings.totalMs)
+            return ImportOutcome(url=url, error="Unable to parse the recipe")
+
+        self.stats.record(host, True, page.bytesTransferred, page.timings.totalMs)
+
+        return ImportOutcome(url=url, content=extraction.to_scraped_recipe(False))
+
+    def persist(self, outcomes: list[ImportOutcome]):
+        if self.args.dry_run:
+            return
+
+        dynamodb = boto3.resource("dynamodb")
+        now = datetime.now()
+        imported = [outcome for outcome in outcomes if outcome.content is not None]
+
+        with dynamodb.Table(self.args.recipes_table).batch_writer() as batch:
+            for outcome in imported:
+                assert outcome.content is not None
+
+                batch.put_item(
+                    Item=RecipeDbItem(
+                        RecipeId=outcome.content.recipe.id,
+                        Content=outcome.content,
+                        IsComplete=True,
+                        HasParsingSucceeded=True,
+                        ExpiresAt=now + self.args.recipe_ttl,
+                        NotificationEndpointARN=None,
+                        OwnerId=self.args.owner_id,
+                    ).model_dump()
+                )
+
+        if self.args.cache_table is None:
+            return
+
+        with dynamodb.Table(self.args.cache_table).batch_writer(
+            overwrite_by_pkeys=[RecipeCacheItem.get_primary_key_name()]
+        ) as batch:
+            for outcome in imported:
+                assert outcome.content is not None
+
+                for url in (outcome.url, outcome.content.recipe.url):
+                    batch.put_item(
+                        Item=RecipeCacheItem(
+                            CacheKey=recipe_cache_key(url, False, self.args.lang),
+                            Content=outcome.content,
+                            ExpiresAt=now + self.args.cache_ttl,
+                        ).model_dump()
+                    )
+
+
+def run(args: argparse.Namespace):
+    importer = Importer(
+        args=args,
+        fetchConfig=FetchConfig.model_validate(
+            {"MAX_CONNECTIONS_PER_HOST": args.concurrency}
+        ),
+    )
+    checkpoint = Checkpoint(args.checkpoint, args.retry_failed)
+    pending: list[ImportOutcome] = []
+
+    def flush():
+        importer.persist(pending)
+
+        for outcome in pending:
+            checkpoint.mark(
+                normalize_url(outcome.url), "ok" if outcome.error is None else "failed"
+            )
+
+        checkpoint.flush()
+        pending.clear()
+
+        print(importer.stats.report(), file=sys.stderr)
+
+    def collect(done: set[Future[ImportOutcome]]):
+        for future in done:
+            outcome = future.result()
+
+            if outcome.error is not None:
+                log.warning(
+                    "Unable to import the recipe",
+                    extra={"url": outcome.url, "error": outcome.error},
+                )
+
+            pending.append(outcome)
+
+        if len(pending) >= args.batch_size:
+            flush()
+
+    try:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            inFlight: set[Future[ImportOutcome]] = set()
+
+            for url in importer.candidate_urls(checkpoint):
+                # the sitemap is consumed only as fast as the pages are imported
+                if len(inFlight) >= args.concurrency * 2:
+                    done, inFlight = wait(inFlight, return_when=FIRST_COMPLETED)
+                    collect(done)
+
+                inFlight.add(executor.submit(importer.import_url, url))
+
+            collect(wait(inFlight).done)
+
+        flush()
+    finally:
+        checkpoint.close()
+
+    print(importer.stats.report())
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Imports whole recipe sites from sitemaps or seed lists"
+    )
+    parser.add_argument(
+        "--sitemap", action="append", default=[], help="sitemap or sitemap index url"
+    )
+    parser.add_argument(
+        "--seeds",
+        type=argparse.FileType("r"),
+        help="file with one recipe url per line",
+    )
+    parser.add_argument(
+        "--include", help="only import urls matching this regular expression"
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--host-rate",
+        type=float,
+        default=2,
+        help="maximum requests per second sent to a single host",
+    )
+    parser.add_argument("--batch-size", type=int, default=25)
+    parser.add_argument(
+        "--checkpoint", help="progress file, a run with the same file resumes"
+    )
+    parser.add_argument("--retry-failed", action="store_true")
+    parser.add_argument(
+        "--recipes-table", default=os.environ.get("RECIPES_TABLE_NAME", "Recipes")
+    )
+    parser.add_argument("--cache-table", default=os.environ.get("RECIPE_CACHE_TABLE_NAME"))
+    parser.add_argument(
+        "--archive-bucket",
+        default=os.environ.get("ARCHIVE__BUCKET"),
+        help="bucket for the raw html archive, skipped when not set",
+    )
+    parser.add_argument("--archive-compression", choices=["gzip", "zstd"], default="gzip")
+    parser.add_argument("--owner-id", default="bulk-import")
+    parser.add_argument("--lang", choices=["pl", "en"], default="pl")
+    parser.add_argument("--recipe-ttl", type=str_to_timedelta, default="30d")
+    parser.add_argument("--cache-ttl", type=str_to_timedelta, default="30d")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="scrape without writing to dynamodb"
+    )
+
+    args = parser.parse_args(argv)
+
+    if not args.sitemap and args.seeds is None:
+        parser.error("provide at least one --sitemap or --seeds")
+
+    return args
+
+
+if __name__ == "__main__":
+    run(parse_args())
@@ -0,0 +1,113 @@
+import argparse
+import gzip
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import os
+import random
+from time import sleep
+from urllib.parse import urlsplit
+from xml.sax.saxutils import escape
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def fixture_handler(directory: str, latency: float, errorRate: float):
+    pages = sorted(name for name in os.listdir(directory) if name.endswith(".html"))
+
+    class FixtureHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status: int, body: bytes, contentType: str, gzipped=False):
+            if gzipped:
+                body = gzip.compress(body)
+
+            self.send_response(status)
+            self.send_header("Content-Type", contentType)
+            self.send_header("Content-Length", str(len(body)))
+
+            if gzipped:
+                self.send_header("Content-Encoding", "gzip")
+
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _sitemap(self) -> bytes:
+            base = f"http://{self.headers.get('Host', 'localhost')}"
+            entries = "".join(
+                f"<url><loc>{escape(f'{base}/{page}')}</loc></url>" for page in pages
+            )
+
+            return (
+                '<?xml version="1.0" encoding="UTF-8"?>'
+                '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                f"{entries}</urlset>"
+            ).encode("utf-8")
+
+        def _sitemap_index(self) -> bytes:
+            base = f"http://{self.headers.get('Host', 'localhost')}"
+
+            return (
+                '<?xml version="1.0" encoding="UTF-8"?>'
+                '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                f"<sitemap><loc>{base}/sitemap.xml</loc></sitemap>"
+                f"<sitemap><loc>{base}/sitemap.xml.gz</loc></sitemap>"
+                "</sitemapindex>"
+            ).encode("utf-8")
+
+        def do_GET(self):
+            if latency > 0:
+                sleep(latency)
+
+            path = urlsplit(self.path).path.lstrip("/")
+            acceptsGzip = "gzip" in self.headers.get("Accept-Encoding", "")
+
+            match path:
+                case "sitemap.xml":
+                    return self._send(200, self._sitemap(), "application/xml")
+                case "sitemap.xml.gz":
+                    return self._send(
+                        200, gzip.compress(self._sitemap()), "application/gzip"
+                    )
+                case "sitemap_index.xml":
+                    return self._send(200, self._sitemap_index(), "application/xml")
+
+            if path not in pages:
+                return self._send(404, b"Not found", "text/plain")
+
+            if random.random() < errorRate:
+                return self._send(503, b"Service unavailable", "text/plain")
+
+            with open(os.path.join(directory, path), "rb") as f:
+                self._send(200, f.read(), "text/html; charset=utf-8", acceptsGzip)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FixtureHandler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serves fixture recipe pages and a generated sitemap, standing in for real recipe sites"
+    )
+    parser.add_argument("--directory", default=FIXTURES_DIR)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--latency", type=float, default=0, help="seconds to wait before responding"
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0,
+        help="fraction of page requests answered with a 503",
+    )
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(
+        (args.host, args.port),
+        fixture_handler(args.directory, args.latency, args.error_rate),
+    )
+
+    print(f"Serving {args.directory} on http://{args.host}:{args.port}/sitemap.xml")
+
+    server.serve_forever()
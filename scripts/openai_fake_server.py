@@ -0,0 +1,309 @@
+import argparse
+from email import policy
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import random
+import re
+from threading import Lock
+from time import sleep, time
+from urllib.parse import urlsplit
+from uuid import uuid4
+
+QUANTITY_PATTERN = re.compile(
+    r"^\s*(\d+(?:[.,/]\d+)?(?:\s*-\s*\d+(?:[.,]\d+)?)?)\s*(.*)$"
+)
+
+UNITS = {
+    "g",
+    "kg",
+    "dag",
+    "ml",
+    "l",
+    "łyżka",
+    "łyżki",
+    "łyżek",
+    "łyżeczka",
+    "łyżeczki",
+    "szklanka",
+    "szklanki",
+    "cup",
+    "cups",
+    "tbsp",
+    "tsp",
+    "oz",
+    "lb",
+}
+
+
+def parse_line(text: str) -> dict:
+    match = QUANTITY_PATTERN.match(text)
+
+    if match is None:
+        return {
+            "name": text.strip(),
+            "quantity": None,
+            "unit": None,
+            "preparationNotes": None,
+        }
+
+    quantity, rest = match.groups()
+    unit, _, name = rest.partition(" ")
+
+    if unit.lower() not in UNITS:
+        unit, name = "", rest
+
+    return {
+        "name": name.strip() or rest.strip(),
+        "quantity": quantity,
+        "unit": unit or None,
+        "preparationNotes": None,
+    }
+
+
+def response_body(request: dict) -> dict:
+    lines = json.loads(request["input"])
+    outputText = json.dumps(
+        {
+            "lines": [
+                {"lineId": lineId, "ingredients": [parse_line(text)]}
+                for lineId, text in lines.items()
+            ]
+        },
+        ensure_ascii=False,
+    )
+
+    return {
+        "id": f"resp_{uuid4().hex}",
+        "object": "response",
+        "created_at": int(time()),
+        "status": "completed",
+        "model": request.get("model"),
+        "output": [
+            {
+                "id": f"msg_{uuid4().hex}",
+                "type": "message",
+                "role": "assistant",
+                "status": "completed",
+                "content": [
+                    {"type": "output_text", "text": outputText, "annotations": []}
+                ],
+            }
+        ],
+        "usage": {
+            "input_tokens": len(request["input"]) // 4,
+            "output_tokens": len(outputText) // 4,
+            "total_tokens": (len(request["input"]) + len(outputText)) // 4,
+        },
+    }
+
+
+def fake_handler(completionDelay: float, responseDelay: float, errorRate: float):
+    files: dict[str, tuple[dict, bytes]] = {}
+    batches: dict[str, dict] = {}
+    lock = Lock()
+
+    def store_file(filename: str, purpose: str, content: bytes) -> dict:
+        fileObject = {
+            "id": f"file-{uuid4().hex}",
+            "object": "file",
+            "bytes": len(content),
+            "created_at": int(time()),
+            "filename": filename,
+            "purpose": purpose,
+            "status": "processed",
+        }
+        files[fileObject["id"]] = (fileObject, content)
+
+        return fileObject
+
+    def run_batch(batch: dict):
+        _, content = files[batch["input_file_id"]]
+        outputLines: list[str] = []
+        failures = 0
+
+        for line in content.decode("utf-8").splitlines():
+            if line.strip() == "":
+                continue
+
+            request = json.loads(line)
+            failed = random.random() < errorRate
+            failures += failed
+
+            outputLines.append(
+                json.dumps(
+                    {
+                        "id": f"batch_req_{uuid4().hex}",
+                        "custom_id": request["custom_id"],
+                        "response": {
+                            "status_code": 500 if failed else 200,
+                            "request_id": uuid4().hex,
+                            "body": {"error": {"message": "Simulated failure"}}
+                            if failed
+                            else response_body(request["body"]),
+                        },
+                        "error": None,
+                    },
+                    ensure_ascii=False,
+                )
+            )
+
+        output = store_file(
+            "batch_output.jsonl", "batch_output", "\n".join(outputLines).encode("utf-8")
+        )
+        batch.update(
+            status="completed",
+            completed_at=int(time()),
+            output_file_id=output["id"],
+            request_counts={
+                "total": len(outputLines),
+                "completed": len(outputLines) - failures,
+                "failed": failures,
+            },
+        )
+
+    class FakeHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send_json(self, status: int, body: dict):
+            self._send(status, json.dumps(body).encode("utf-8"), "application/json")
+
+        def _send(self, status: int, body: bytes, contentType: str):
+            self.send_response(status)
+            self.send_header("Content-Type", contentType)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_body(self) -> bytes:
+            return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        def do_POST(self):
+            path = urlsplit(self.path).path.rstrip("/")
+            body = self._read_body()
+
+            if path == "/v1/responses":
+                # answered outside the lock, so that concurrent requests overlap like in the api
+                sleep(responseDelay)
+
+                if random.random() < errorRate:
+                    return self._send_json(
+                        500, {"error": {"message": "Simulated failure"}}
+                    )
+
+                return self._send_json(200, response_body(json.loads(body)))
+
+            with lock:
+                match path:
+                    case "/v1/files":
+                        header = f"Content-Type: {self.headers['Content-Type']}\r\n\r\n"
+                        message = BytesParser(policy=policy.default).parsebytes(
+                            header.encode() + body
+                        )
+                        fields = {
+                            part.get_param("name", header="content-disposition"): part
+                            for part in message.iter_parts()
+                        }
+
+                        # the payload of a nested multipart part is not decoded
+                        content = fields["file"].get_payload(decode=True)
+
+                        if not isinstance(content, bytes):
+                            return self._send_json(
+                                400, {"error": {"message": "Invalid file upload"}}
+                            )
+
+                        return self._send_json(
+                            200,
+                            store_file(
+                                fields["file"].get_filename() or "input.jsonl",
+                                fields["purpose"].get_content().strip(),
+                                content,
+                            ),
+                        )
+                    case "/v1/batches":
+                        request = json.loads(body)
+
+                        if request.get("input_file_id") not in files:
+                            return self._send_json(
+                                404, {"error": {"message": "No such file"}}
+                            )
+
+                        batch = {
+                            "id": f"batch_{uuid4().hex}",
+                            "object": "batch",
+                            "endpoint": request["endpoint"],
+                            "input_file_id": request["input_file_id"],
+                            "completion_window": request["completion_window"],
+                            "status": "in_progress",
+                            "created_at": int(time()),
+                            "metadata": request.get("metadata"),
+                        }
+                        batches[batch["id"]] = batch
+
+                        return self._send_json(200, batch)
+
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+        def do_GET(self):
+            parts = urlsplit(self.path).path.strip("/").split("/")
+
+            with lock:
+                match parts:
+                    case ["v1", "batches", batchId] if batchId in batches:
+                        batch = batches[batchId]
+
+                        if (
+                            batch["status"] == "in_progress"
+                            and time() - batch["created_at"] >= completionDelay
+                        ):
+                            run_batch(batch)
+
+                        return self._send_json(200, batch)
+                    case ["v1", "files", fileId, "content"] if fileId in files:
+                        return self._send(200, files[fileId][1], "application/jsonl")
+
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+        def log_message(self, format, *args):
+            pass
+
+    return FakeHandler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Stands in for the openai responses, files and batch endpoints, parsing the ingredient lines with simple rules"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument(
+        "--completion-delay",
+        type=float,
+        default=5,
+        help="seconds after which a submitted batch is completed",
+    )
+    parser.add_argument(
+        "--response-delay",
+        type=float,
+        default=0.5,
+        help="seconds every response request takes",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0,
+        help="fraction of response and batch requests answered with an error",
+    )
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(
+        (args.host, args.port),
+        fake_handler(args.completion_delay, args.response_delay, args.error_rate),
+    )
+
+    print(
+        f"Serving the fake openai api on http://{args.host}:{args.port}/v1, use it as the AI base url"
+    )
+
+    server.serve_forever()
@@ -0,0 +1,163 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+import json
+import os
+import sys
+from typing import Iterator
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "lib", "python"))
+
+from aws_lambda_powertools import Logger
+import boto3
+from shared.models.database.RecipeCacheItem import RecipeCacheItem
+from shared.models.database.ScrapedRecipe import ScrapedRecipe
+from shared.models.exceptions.apiExceptions import UnableToParseRecipeException
+from shared.scraping.archive import (
+    ARCHIVE_PREFIX,
+    latest_archive_key,
+    latest_archive_keys,
+    load_archived_page,
+)
+from shared.scraping.reprocess import reprocess_archived_page
+from shared.utils.recipe_cache import recipe_cache_key
+from shared.utils.str_to_timedelta import str_to_timedelta
+
+log = Logger("reprocess-archive")
+
+
+@dataclass
+class ReprocessOutcome:
+    key: str
+    url: str | None = None
+    content: ScrapedRecipe | None = None
+    error: str | None = None
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "key": self.key,
+                "url": self.url,
+                "error": self.error,
+                "content": self.content.model_dump(mode="json")
+                if self.content is not None
+                else None,
+            },
+            ensure_ascii=False,
+        )
+
+
+def reprocess_key(bucket: str, key: str) -> ReprocessOutcome:
+    page = load_archived_page(bucket, key)
+
+    try:
+        content = reprocess_archived_page(page)
+    except UnableToParseRecipeException:
+        return ReprocessOutcome(key=key, url=page.url, error="Unable to parse the recipe")
+
+    return ReprocessOutcome(key=key, url=page.url, content=content)
+
+
+def archive_keys(args: argparse.Namespace) -> Iterator[str]:
+    for url in args.url:
+        key = latest_archive_key(args.bucket, url)
+
+        if key is None:
+            log.warning("No archived page for the url", extra={"url": url})
+            continue
+
+        yield key
+
+    if args.prefix is not None:
+        # older versions of a page would overwrite the newer ones in the cache
+        yield from latest_archive_keys(args.bucket, args.prefix)
+
+
+def refresh_cache(args: argparse.Namespace, outcomes: list[ReprocessOutcome]):
+    now = datetime.now()
+
+    with boto3.resource("dynamodb").Table(args.cache_table).batch_writer(
+        overwrite_by_pkeys=[RecipeCacheItem.get_primary_key_name()]
+    ) as batch:
+        for outcome in outcomes:
+            if outcome.content is None or outcome.url is None:
+                continue
+
+            for url in {outcome.url, outcome.content.recipe.url}:
+                batch.put_item(
+                    Item=RecipeCacheItem(
+                        CacheKey=recipe_cache_key(url, False, args.lang),
+                        Content=outcome.content,
+                        ExpiresAt=now + args.cache_ttl,
+                    ).model_dump()
+                )
+
+
+def run(args: argparse.Namespace):
+    keys = list(dict.fromkeys(archive_keys(args)))
+    output = open(args.output, "w") if args.output is not None else sys.stdout
+    outcomes: list[ReprocessOutcome] = []
+
+    # extraction is cpu bound, so the pages are parsed in separate processes
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for outcome in executor.map(
+            reprocess_key, [args.bucket] * len(keys), keys, chunksize=8
+        ):
+            if outcome.error is not None:
+                log.warning(
+                    "Unable to reprocess the page",
+                    extra={"key": outcome.key, "error": outcome.error},
+                )
+
+            output.write(outcome.to_json() + "\n")
+            outcomes.append(outcome)
+
+    if output is not sys.stdout:
+        output.close()
+
+    if args.cache_table is not None:
+        refresh_cache(args, outcomes)
+
+    succeeded = sum(outcome.content is not None for outcome in outcomes)
+    print(f"Reprocessed {succeeded} of {len(outcomes)} archived pages", file=sys.stderr)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Rebuilds scraped recipes from the raw html archive, without fetching the pages again"
+    )
+    parser.add_argument("--bucket", default=os.environ.get("ARCHIVE__BUCKET"))
+    parser.add_argument(
+        "--url",
+        action="append",
+        default=[],
+        help="reprocess the latest archived copy of this url",
+    )
+    parser.add_argument(
+        "--prefix",
+        help=f"reprocess the latest archived copy of every url under this key prefix, e.g. {ARCHIVE_PREFIX}/",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output", help="jsonl output file, stdout when not set")
+    parser.add_argument(
+        "--cache-table",
+        default=os.environ.get("RECIPE_CACHE_TABLE_NAME"),
+        help="refresh the recipe cache with the reprocessed recipes",
+    )
+    parser.add_argument("--lang", choices=["pl", "en"], default="pl")
+    parser.add_argument("--cache-ttl", type=str_to_timedelta, default="30d")
+
+    args = parser.parse_args(argv)
+
+    if args.bucket is None:
+        parser.error("provide the --bucket")
+
+    if not args.url and args.prefix is None:
+        parser.error("provide at least one --url or a --prefix")
+
+    return args
+
+
+if __name__ == "__main__":
+    run(parse_args())